@@ -0,0 +1,97 @@
+"""Size and load-time benchmark: saved JSON/NDJSON vs. memory-mapped .uilb.
+
+Builds synthetic layouts (see bench_layout_memory.py), saves each as
+indented JSON (what main.py writes for one image), compact JSON, NDJSON and
+.uilb, and reports per format:
+  - file size
+  - full load: file -> every component and relationship decoded
+  - one lookup: open the file and fetch a single component by ID, which is
+    all a query about one element needs
+
+    python benchmarks/bench_binary_layout.py [--sizes 100 1000 10000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_layout_memory import build_dataclass_layout
+from utils.layout_io import write_layout_json, write_layout_ndjson, read_layout_ndjson, layout_from_structured_output
+from utils.binary_layout import write_binary_layout, open_binary_layout
+
+
+def load_json(path):
+    with open(path) as f:
+        return layout_from_structured_output(json.load(f))
+
+
+def load_ndjson(path):
+    with open(path) as f:
+        return read_layout_ndjson(f)
+
+
+def load_uilb(path):
+    with open_binary_layout(path) as layout:
+        return layout.to_layout()
+
+
+def lookup_uilb(path, component_id):
+    with open_binary_layout(path) as layout:
+        return layout.components[component_id]
+
+
+FORMATS = [
+    ('json indent=2', '.json', lambda layout, f: write_layout_json(layout, f, indent=2), load_json),
+    ('json compact', '.json', lambda layout, f: write_layout_json(layout, f), load_json),
+    ('ndjson', '.ndjson', write_layout_ndjson, load_ndjson),
+    ('uilb', '.uilb', write_binary_layout, load_uilb),
+]
+
+
+def best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'relations':>10} {'format':<14} {'size KB':>10} {'ratio':>6} "
+          f"{'full load ms':>12} {'one lookup ms':>13}")
+    with tempfile.TemporaryDirectory(prefix='uilb_bench_') as work_dir:
+        for count in args.sizes:
+            layout = build_dataclass_layout(count, True)
+            target = random.Random(count).choice(list(layout.components))
+            reference_size = None
+            for index, (name, extension, write, load) in enumerate(FORMATS):
+                path = os.path.join(work_dir, f"layout_{count}_{index}{extension}")
+                with open(path, 'wb' if extension == '.uilb' else 'w') as f:
+                    write(layout, f)
+                size = os.path.getsize(path)
+                reference_size = reference_size or size
+
+                full = best_time(lambda: load(path), args.repeat)
+                if extension == '.uilb':
+                    lookup = best_time(lambda: lookup_uilb(path, target), args.repeat)
+                else:
+                    # Text formats have to be parsed completely to find one component
+                    lookup = best_time(lambda: load(path).components[target], args.repeat)
+                print(f"{count:>10} {len(layout.relationships):>10} {name:<14} {size / 1024:>10.1f} "
+                      f"{reference_size / size:>5.1f}x {full * 1000:>12.1f} {lookup * 1000:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
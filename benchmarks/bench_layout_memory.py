@@ -0,0 +1,105 @@
+"""Memory benchmark for UILayout vs. ColumnarLayout.
+
+Builds synthetic layouts (UUID IDs, a third of components with text, color
+info on all of them, neighbor-mode relationships) and measures with
+tracemalloc the bytes retained per component and per relationship by the
+dataclass UILayout and by models.columnar_layout.ColumnarLayout.
+
+    python benchmarks/bench_layout_memory.py [--sizes 100 1000 10000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from models.ui_component import UIComponent, ComponentType, BoundingBox
+from models.spatial_relationship import UILayout
+from models.columnar_layout import ColumnarLayout
+from core.relationship_mapper import RelationshipMapper
+
+WORDS = ['Submit', 'Cancel', 'Username', 'Password', 'Settings', 'Search', 'Save changes', 'Next']
+
+
+def make_components(count, seed=0):
+    rng = random.Random(seed)
+    width, height = 1440, max(900, count * 6)
+    components = []
+    for i in range(count):
+        w, h = rng.randint(20, 300), rng.randint(15, 120)
+        x, y = rng.randint(0, width - w), rng.randint(0, height - h)
+        r, g, b = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+        has_text = i % 3 == 0
+        components.append(UIComponent(
+            id=str(uuid.UUID(int=rng.getrandbits(128))),
+            component_type=ComponentType.TEXT_LABEL if has_text else rng.choice(
+                [ComponentType.BUTTON, ComponentType.CONTAINER, ComponentType.ICON]),
+            bounding_box=BoundingBox(x, y, w, h),
+            text_content=f"{rng.choice(WORDS)} {i}" if has_text else None,
+            color_info={'dominant_rgb': f"rgb({r}, {g}, {b})", 'dominant_hex': f"#{r:02x}{g:02x}{b:02x}"},
+            confidence=round(rng.random(), 2),
+            attributes={'shape': 'rectangle'} if not has_text else {}
+        ))
+    return components, (width, height)
+
+
+def retained_bytes(build):
+    """Bytes still allocated after build() returns, measured by tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def build_dataclass_layout(count, with_relationships):
+    components, dimensions = make_components(count)
+    relationships = RelationshipMapper(mode='neighbors').map_relationships(components) if with_relationships else []
+    return UILayout(
+        components={comp.id: comp for comp in components},
+        relationships=relationships,
+        screen_dimensions=dimensions,
+        ambiguities=[],
+        confidence_score=0.8
+    )
+
+
+def build_columnar_layout(count, with_relationships):
+    # The dataclass layout is temporary; only the columnar copy is retained
+    return ColumnarLayout.from_layout(build_dataclass_layout(count, with_relationships))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'relations':>10} | {'dataclass B/comp':>16} {'B/rel':>8} | "
+          f"{'columnar B/comp':>15} {'B/rel':>8} | {'total ratio':>11}")
+    for count in args.sizes:
+        row = {}
+        for label, build in (('dataclass', build_dataclass_layout), ('columnar', build_columnar_layout)):
+            _, components_only = retained_bytes(lambda: build(count, False))
+            layout, total = retained_bytes(lambda: build(count, True))
+            relationships = len(layout.relationships)
+            row[label] = (
+                components_only / count,
+                (total - components_only) / relationships if relationships else 0.0,
+                total
+            )
+            del layout
+
+        print(f"{count:>10} {relationships:>10} | "
+              f"{row['dataclass'][0]:>16.0f} {row['dataclass'][1]:>8.0f} | "
+              f"{row['columnar'][0]:>15.0f} {row['columnar'][1]:>8.0f} | "
+              f"{row['dataclass'][2] / row['columnar'][2]:>10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
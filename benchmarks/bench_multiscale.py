@@ -0,0 +1,146 @@
+"""Speed / accuracy benchmark for multi-scale shape detection.
+
+Runs ImageProcessor.detect_ui_elements single-scale and at each --scales
+factor, on the sample screens and on a synthetic screen of drawn buttons
+and circular icons, each optionally upscaled to mimic Retina/4K captures.
+Reports detection time and, per shape type, recall and precision at
+IoU >= 0.5, mean IoU of matched boxes and their mean corner error in
+pixels, measured:
+  - sample screens: against the single-scale boxes (agreement with the
+    current path)
+  - synthetic screen: against the drawn shapes (ground truth), for every
+    scale including 1.0
+
+    python benchmarks/bench_multiscale.py [--images examples/sample_screens]
+                                          [--upscale 1 2] [--scales 0.5 0.25] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+import numpy as np
+
+from utils.image_processor import ImageProcessor
+from utils.box_ops import boxes_to_array, pairwise_iou
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SHAPES = ('rectangle', 'circle')
+
+
+def load_screens(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.png')
+    return [(os.path.basename(path), cv2.imread(path), None) for path in sorted(glob.glob(pattern))]
+
+
+def synthetic_screen(seed=1):
+    """A 1920x1080 screen of labelled buttons and circular icons, with their true boxes"""
+    rng = random.Random(seed)
+    image = np.full((1080, 1920, 3), 245, np.uint8)
+    truth = {'rectangle': [], 'circle': []}
+    for row in range(6):
+        for col in range(6):
+            x, y = 40 + col * 300, 40 + row * 170
+            w, h = rng.randint(80, 220), rng.randint(30, 90)
+            shade = rng.randint(0, 200)
+            cv2.rectangle(image, (x, y), (x + w, y + h), (shade, shade, shade), -1 if rng.random() < 0.5 else 2)
+            cv2.putText(image, 'Label', (x + 5, y + h // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (20, 20, 20), 1)
+            truth['rectangle'].append((x, y, w + 1, h + 1))
+
+            radius = rng.randint(12, 40)
+            cx, cy = x + w + 40, y + radius + 10
+            cv2.circle(image, (cx, cy), radius, (60, 60, 200), -1)
+            truth['circle'].append((cx - radius, cy - radius, 2 * radius, 2 * radius))
+    return 'synthetic', image, truth
+
+
+def detect(processor, gray, scale, repeat):
+    """Best-of-repeat seconds and the detected boxes per shape type"""
+    processor.multiscale_params['scale'] = scale
+    best, elements = float('inf'), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        elements = processor.detect_ui_elements(gray, gray)
+        best = min(best, time.perf_counter() - start)
+    boxes = {shape: [] for shape in SHAPES}
+    for element in elements:
+        boxes[element['type']].append(tuple(int(v) for v in element['bbox']))
+    return best, boxes
+
+
+def compare(reference, candidate, threshold=0.5):
+    """(recall, precision, mean IoU, mean corner error px) of candidate vs reference boxes"""
+    if not reference or not candidate:
+        return (1.0 if not reference else 0.0), (1.0 if not candidate else 0.0), 0.0, 0.0
+    ref, cand = boxes_to_array(reference), boxes_to_array(candidate)
+    overlaps = pairwise_iou(ref, cand)
+    best = overlaps.argmax(axis=1)
+    best_iou = overlaps[np.arange(len(ref)), best]
+    matched = best_iou >= threshold
+    recall = float(matched.mean())
+    precision = float((overlaps.max(axis=0) >= threshold).mean())
+    if not matched.any():
+        return recall, precision, 0.0, 0.0
+    corner_error = np.abs(ref[matched] - cand[best[matched]]).mean()
+    return recall, precision, float(best_iou[matched].mean()), float(corner_error)
+
+
+def accuracy_columns(reference, boxes):
+    columns = []
+    for shape in SHAPES:
+        recall, precision, iou, error = compare(reference[shape], boxes[shape])
+        columns.append(f"{len(boxes[shape]):>5} {recall:>5.2f} {precision:>5.2f} {iou:>5.2f} {error:>5.1f}")
+    return "  ".join(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', default=os.path.join(REPO_ROOT, 'examples', 'sample_screens'),
+                        help="Directory or glob of screenshots")
+    parser.add_argument('--upscale', type=float, nargs='+', default=[1, 2],
+                        help="Resize factors applied to each screen first (2 ~ Retina)")
+    parser.add_argument('--scales', type=float, nargs='+', default=[0.5, 0.25])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    screens = load_screens(args.images) + [synthetic_screen()]
+    processor = ImageProcessor()
+
+    shape_header = "  ".join(f"{shape[:4] + ' n':>5} {'rec':>5} {'prec':>5} {'IoU':>5} {'err':>5}" for shape in SHAPES)
+    print(f"{'screen':<18} {'size':>10} {'vs':>6} {'scale':>5} {'ms':>8} {'speedup':>7}  {shape_header}")
+    for name, image, truth in screens:
+        for upscale in args.upscale:
+            scaled = image if upscale == 1 else cv2.resize(image, None, fx=upscale, fy=upscale,
+                                                           interpolation=cv2.INTER_CUBIC)
+            gray = processor.to_grayscale(scaled)
+            size = f"{gray.shape[1]}x{gray.shape[0]}"
+
+            base_time, base_boxes = detect(processor, gray, 1.0, args.repeat)
+            if truth is None:
+                reference, versus = base_boxes, 'single'
+                base_columns = "  ".join(f"{len(base_boxes[shape]):>5} {'-':>5} {'-':>5} {'-':>5} {'-':>5}"
+                                         for shape in SHAPES)
+            else:
+                reference, versus = {
+                    shape: [tuple(int(round(v * upscale)) for v in box) for box in boxes]
+                    for shape, boxes in truth.items()
+                }, 'truth'
+                base_columns = accuracy_columns(reference, base_boxes)
+            print(f"{name[:18]:<18} {size:>10} {versus:>6} {1.0:>5.2f} {base_time * 1000:>8.1f} {'-':>7}  "
+                  f"{base_columns}")
+
+            for scale in args.scales:
+                elapsed, boxes = detect(processor, gray, scale, args.repeat)
+                print(f"{'':<18} {'':>10} {versus:>6} {scale:>5.2f} {elapsed * 1000:>8.1f} "
+                      f"{base_time / elapsed:>6.1f}x  {accuracy_columns(reference, boxes)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Micro-benchmark for ComponentDetector duplicate removal.
+
+Compares the original pure-Python pairwise loop with the vectorized
+pairwise filter and greedy NMS from utils.box_ops on synthetic boxes, from
+10 to 10,000 boxes, and checks the vectorized filter matches the loop.
+
+    python benchmarks/bench_nms.py [--sizes 10 100 1000 10000] [--legacy-limit 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+from models.ui_component import BoundingBox
+from utils.box_ops import boxes_to_array, suppress_lower_confidence, greedy_nms
+
+
+def make_boxes(count, seed=0):
+    """Random UI-sized boxes, a third of them jittered copies of earlier ones"""
+    rng = random.Random(seed)
+    width, height = 1440, max(900, count * 4)
+    boxes, scores = [], []
+    for i in range(count):
+        if boxes and rng.random() < 0.33:
+            x, y, w, h = boxes[rng.randrange(len(boxes))]
+            x, y = x + rng.randint(-3, 3), y + rng.randint(-3, 3)
+        else:
+            w, h = rng.randint(20, 300), rng.randint(15, 120)
+            x, y = rng.randint(0, width - w), rng.randint(0, height - h)
+        boxes.append((x, y, w, h))
+        scores.append(round(rng.random(), 3))
+    return boxes, scores
+
+
+def legacy_overlap(bbox1, bbox2):
+    """Copy of the original ComponentDetector._calculate_overlap"""
+    x_overlap = max(0, min(bbox1.x + bbox1.width, bbox2.x + bbox2.width) - max(bbox1.x, bbox2.x))
+    y_overlap = max(0, min(bbox1.y + bbox1.height, bbox2.y + bbox2.height) - max(bbox1.y, bbox2.y))
+    intersection = x_overlap * y_overlap
+    union = bbox1.area + bbox2.area - intersection
+    return intersection / union if union > 0 else 0
+
+
+def legacy_remove_duplicates(bboxes, scores, threshold=0.8):
+    """The original all-pairs loop, returning kept indices"""
+    kept = []
+    for i, box1 in enumerate(bboxes):
+        if not any(
+            i != j and legacy_overlap(box1, box2) > threshold and scores[i] < scores[j]
+            for j, box2 in enumerate(bboxes)
+        ):
+            kept.append(i)
+    return kept
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 30, 100, 300, 1000, 3000, 10000])
+    parser.add_argument('--legacy-limit', type=int, default=2000,
+                        help="Skip the O(n^2) Python loop above this many boxes")
+    args = parser.parse_args()
+
+    print(f"{'boxes':>7} {'legacy (s)':>11} {'pairwise (s)':>13} {'greedy (s)':>11} {'speedup':>8} {'kept':>6} match")
+    for size in args.sizes:
+        raw, raw_scores = make_boxes(size)
+        boxes = boxes_to_array(raw)
+        scores = np.array(raw_scores, dtype=np.float64)
+        thresholds = np.full(size, 0.8)
+
+        pairwise_time, keep = timed(suppress_lower_confidence, boxes, scores, thresholds)
+        greedy_time, _ = timed(greedy_nms, boxes, scores, thresholds)
+
+        if size <= args.legacy_limit:
+            legacy_time, legacy_kept = timed(
+                legacy_remove_duplicates, [BoundingBox(*b) for b in raw], raw_scores, repeat=1
+            )
+            match = 'yes' if legacy_kept == list(np.flatnonzero(keep)) else 'NO'
+            legacy_col = f"{legacy_time:11.4f}"
+            speedup = f"{legacy_time / pairwise_time:7.1f}x" if pairwise_time > 0 else '     n/a'
+        else:
+            legacy_col, speedup, match = f"{'skipped':>11}", f"{'-':>8}", '-'
+
+        print(f"{size:>7} {legacy_col} {pairwise_time:13.4f} {greedy_time:11.4f} {speedup} {int(keep.sum()):>6} {match}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Query latency benchmark for QueryHandler on a large synthetic layout.
+
+Builds a layout of --components synthetic components (default 5,000) with
+neighbor-mode relationships, then times each query kind with the indexed
+QueryHandler against the linear scans it replaced (text search, color
+pattern matching, type lookup and a relationship-list walk for
+"what is above X").
+
+    python benchmarks/bench_query.py [--components 5000] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_layout_memory import build_dataclass_layout
+from models.ui_component import ComponentType
+from models.spatial_relationship import RelationType
+from utils.query_handler import QueryHandler
+
+LEGACY_COLOR_PATTERNS = {
+    'red': ['#ff', '#f00', 'rgb(255', 'red', '#ff0000'],
+    'blue': ['#00f', '#0000ff', 'rgb(0', 'blue', '#0066cc', '#4169e1'],
+}
+
+
+def legacy_text(layout, text):
+    for comp in layout.components.values():
+        if comp.text_content and text.lower() in comp.text_content.lower():
+            return comp
+    return None
+
+
+def legacy_color(layout, color_name):
+    patterns = LEGACY_COLOR_PATTERNS[color_name]
+    return [
+        comp for comp in layout.components.values()
+        if comp.color_info and any(p in comp.color_info.get('dominant_hex', '').lower() for p in patterns)
+    ][:3]
+
+
+def legacy_button(layout):
+    buttons = [comp for comp in layout.components.values() if comp.component_type == ComponentType.BUTTON]
+    return buttons[0] if buttons else None
+
+
+def legacy_above(layout, text):
+    target = legacy_text(layout, text)
+    if target is None:
+        return []
+    return [
+        rel.component1_id for rel in layout.relationships
+        if rel.component2_id == target.id and rel.relation_type == RelationType.ABOVE
+    ][:5]
+
+
+def time_per_call(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--components', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    layout = build_dataclass_layout(args.components, True)
+    texts = [comp.text_content for comp in layout.components.values() if comp.text_content]
+    target = texts[len(texts) // 2]
+    print(f"Layout: {len(layout.components)} components, {len(layout.relationships)} relationships")
+
+    handler = QueryHandler()
+    start = time.perf_counter()
+    handler.get_index(layout)
+    build = time.perf_counter() - start
+    print(f"Index build: {build * 1000:.1f} ms (once per layout)\n")
+
+    cases = [
+        ("text search", f"where is the text '{target}'", lambda: legacy_text(layout, target)),
+        ("color", "find red elements", lambda: legacy_color(layout, 'red')),
+        ("type", "where is the button", lambda: legacy_button(layout)),
+        ("count", "how many components are there?", None),
+        ("above X", f"what is above '{target}'", lambda: legacy_above(layout, target)),
+    ]
+
+    print(f"{'query':>12} | {'linear scan':>12} | {'indexed':>10} | {'speedup':>8}")
+    for label, query, legacy in cases:
+        indexed = time_per_call(lambda: handler.process_query(layout, query), args.repeat)
+        legacy_time = time_per_call(legacy, args.repeat) if legacy else None
+        legacy_text_out = f"{legacy_time * 1e6:>9.0f} us" if legacy_time else f"{'-':>12}"
+        speedup = f"{legacy_time / indexed:>7.1f}x" if legacy_time else f"{'-':>8}"
+        print(f"{label:>12} | {legacy_text_out} | {indexed * 1e6:>7.0f} us | {speedup}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Cold-start benchmark for the CLI and library entry points.
+
+Runs each entry point in a fresh interpreter under `python -X importtime`,
+and reports wall time, total import time, whether the heavy stacks
+(OpenCV, NumPy, easyocr/torch, scikit-learn) were imported, and the slowest
+top-level imports. Use it to catch a heavy import creeping back into a
+path that should stay light, such as `main.py --load`.
+
+    python benchmarks/bench_startup.py [--runs 3] [--top 5]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(REPO_ROOT, 'src')
+MAIN = os.path.join(SRC, 'main.py')
+
+HEAVY_MODULES = ('cv2', 'numpy', 'easyocr', 'torch', 'sklearn')
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+SAMPLE_ANALYSIS = """{"screen_analysis": {"dimensions": {"width": 400, "height": 300},
+ "confidence_score": 0.8, "ambiguities": [],
+ "components": [{"id": "a", "type": "button", "position": {"x": 10, "y": 10, "width": 80,
+   "height": 30, "center": [50, 25]}, "text_content": "Submit",
+   "color_info": {"dominant_rgb": "rgb(0, 102, 204)", "dominant_hex": "#0066cc"},
+   "confidence": 0.9, "attributes": {}}],
+ "relationships": []}}
+"""
+
+
+def entry_points(analysis_path):
+    library = f"import sys; sys.path.insert(0, {SRC!r}); "
+    return [
+        ("main.py --help", [MAIN, '--help']),
+        ("main.py (usage)", [MAIN]),
+        ("main.py --load <json> <query>", [MAIN, '--load', analysis_path, 'how many buttons are there?']),
+        ("import core.screen_analyzer", ['-c', library + "import core.screen_analyzer"]),
+        ("ScreenAnalyzer()", ['-c', library + "from core.screen_analyzer import ScreenAnalyzer; ScreenAnalyzer()"]),
+        ("import server", ['-c', library + "import server"]),
+    ]
+
+
+def run_once(arguments):
+    """Wall seconds plus {module: (self_us, cumulative_us, depth)} for one cold run"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + arguments,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=REPO_ROOT
+    )
+    wall = time.perf_counter() - start
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help="Runs per entry point (best is reported)")
+    parser.add_argument('--top', type=int, default=5, help="Slowest top-level imports to list")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='_analysis.json', delete=False) as f:
+        f.write(SAMPLE_ANALYSIS)
+        analysis_path = f.name
+
+    try:
+        for label, arguments in entry_points(analysis_path):
+            runs = [run_once(arguments) for _ in range(args.runs)]
+            wall, modules = min(runs, key=lambda run: run[0])
+            top_level = sorted(
+                ((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 0),
+                reverse=True
+            )
+            import_total = sum(cumulative for cumulative, _ in top_level)
+            heavy = [name for name in HEAVY_MODULES if name in modules] or ['none']
+
+            print(f"{label}")
+            print(f"  wall {wall * 1000:.0f} ms, imports {import_total / 1000:.0f} ms, "
+                  f"heavy: {', '.join(heavy)}")
+            for cumulative, name in top_level[:args.top]:
+                print(f"    {cumulative / 1000:8.1f} ms  {name}")
+    finally:
+        os.unlink(analysis_path)
+
+
+if __name__ == '__main__':
+    main()
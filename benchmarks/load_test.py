@@ -0,0 +1,118 @@
+"""Load test for src/server.py.
+
+Fires concurrent analyze (+ optional query) requests at a running server
+and reports p50/p95/p99 latency and throughput. With --cold-cli N it also
+times N cold `python src/main.py <image> <query> --no-cache` runs, the
+path the server replaces.
+
+    python src/server.py &
+    python benchmarks/load_test.py --image examples/sample_screens/test_image.png \
+        --requests 50 --concurrency 8 --query "how many buttons are there?" --cold-cli 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+def post(url, data, content_type, timeout):
+    request = urllib.request.Request(url, data=data, method='POST', headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def one_request(base_url, image_bytes, query, timeout):
+    start = time.perf_counter()
+    status, payload = post(f"{base_url}/analyze", image_bytes, 'application/octet-stream', timeout)
+    if status == 200 and query:
+        status, _ = post(
+            f"{base_url}/layouts/{payload['layout_id']}/query",
+            json.dumps({'query': query}).encode(), 'application/json', timeout
+        )
+    return status, time.perf_counter() - start
+
+
+def summarize(label, latencies, wall):
+    print(f"{label}: {len(latencies)} ok, "
+          f"p50 {percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.0f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.0f} ms, "
+          f"{len(latencies) / wall if wall > 0 else 0.0:.2f} req/s")
+
+
+def run_cold_cli(image, query, runs):
+    latencies = []
+    output_dir = tempfile.mkdtemp(prefix='ui_parser_load_test_')
+    command = [sys.executable, os.path.join(REPO_ROOT, 'src', 'main.py'), image,
+               query or 'how many components are there?', '--no-cache', '--output-dir', output_dir]
+    start_all = time.perf_counter()
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        latencies.append(time.perf_counter() - start)
+    summarize("cold CLI", latencies, time.perf_counter() - start_all)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--image', required=True)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--query', default=None, help="Also query each new layout")
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--cold-cli', type=int, default=0, metavar='N',
+                        help="Also time N cold CLI invocations for comparison")
+    args = parser.parse_args()
+
+    with open(args.image, 'rb') as f:
+        image_bytes = f.read()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(
+            lambda _: one_request(args.url, image_bytes, args.query, args.timeout), range(args.requests)
+        ))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for status, latency in results if status == 200]
+    errors = {}
+    for status, _ in results:
+        if status != 200:
+            errors[status] = errors.get(status, 0) + 1
+
+    summarize(f"server (concurrency {args.concurrency})", latencies, wall)
+    if errors:
+        print(f"errors by status: {errors}")
+
+    try:
+        with urllib.request.urlopen(f"{args.url}/health", timeout=args.timeout) as response:
+            print(f"server stats: {json.loads(response.read())}")
+    except urllib.error.URLError:
+        pass
+
+    if args.cold_cli:
+        run_cold_cli(args.image, args.query, args.cold_cli)
+
+
+if __name__ == '__main__':
+    main()
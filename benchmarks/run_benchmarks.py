@@ -0,0 +1,253 @@
+"""Reproducible end-to-end benchmark on synthetic screens.
+
+For every --sizes x --components combination, draws --screens synthetic
+screens (benchmarks/synthetic_screens.py, fixed seeds) and runs
+ScreenAnalyzer.analyze_screen on each with profiling on and the result
+cache off. Records, per combination:
+  - latency p50/p95/p99/mean and throughput (screens per second)
+  - per-stage timings aggregated across screens (TimingAggregator)
+  - peak memory: process peak RSS, plus per-stage tracemalloc peaks with
+    --trace-memory (slower)
+  - detection precision and recall against the drawn ground truth (one-to-one
+    matching at IoU >= --iou), overall and per element type
+
+Results are written as JSON tagged with the git commit, so runs can be
+compared across commits with --compare; comparing exits with status 1 when
+latency or accuracy regressed beyond the tolerances.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json --detector-options '{"detection_scale": 0.5}'
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+from synthetic_screens import generate_screen, parse_size
+from core.screen_analyzer import ScreenAnalyzer
+from utils.box_ops import boxes_to_array, pairwise_iou
+from utils.profiler import TimingAggregator
+from utils.tiling import peak_rss_bytes
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+def git_revision():
+    """(commit sha, whether the working tree has uncommitted changes), or (None, None)"""
+    try:
+        sha = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        return sha, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def match_boxes(truth_boxes, detected_boxes, threshold):
+    """Greedy one-to-one matching by IoU; returns the set of matched truth indices"""
+    if not truth_boxes or not detected_boxes:
+        return set()
+    overlaps = pairwise_iou(boxes_to_array(truth_boxes), boxes_to_array(detected_boxes))
+    pairs = np.argwhere(overlaps >= threshold)
+    order = np.argsort(-overlaps[pairs[:, 0], pairs[:, 1]], kind='stable')
+    used_truth, used_detected = set(), set()
+    for truth_index, detected_index in pairs[order]:
+        if truth_index not in used_truth and detected_index not in used_detected:
+            used_truth.add(int(truth_index))
+            used_detected.add(int(detected_index))
+    return used_truth
+
+
+class AccuracyCounter:
+    """Accumulates matched / truth / detected counts, overall and per truth type"""
+
+    def __init__(self):
+        self.matched = 0
+        self.truth = 0
+        self.detected = 0
+        self.by_type = {}
+
+    def add(self, truth, layout, threshold):
+        truth_boxes = [entry['bbox'] for entry in truth]
+        detected = [comp.bounding_box for comp in layout.components.values()]
+        matched = match_boxes(truth_boxes, [(b.x, b.y, b.width, b.height) for b in detected], threshold)
+        self.matched += len(matched)
+        self.truth += len(truth)
+        self.detected += len(detected)
+        for index, entry in enumerate(truth):
+            counts = self.by_type.setdefault(entry['type'], [0, 0])
+            counts[0] += index in matched
+            counts[1] += 1
+
+    def summary(self):
+        return {
+            'precision': round(self.matched / self.detected, 4) if self.detected else 0.0,
+            'recall': round(self.matched / self.truth, 4) if self.truth else 0.0,
+            'truth_boxes': self.truth,
+            'detected_boxes': self.detected,
+            'recall_by_type': {kind: round(found / total, 4) for kind, (found, total) in sorted(self.by_type.items())}
+        }
+
+
+def run_case(analyzer, size, components, screens, seed, iou, work_dir):
+    """Benchmark one size/density combination"""
+    paths, truths = [], []
+    for index in range(screens):
+        image, truth = generate_screen(size[0], size[1], components, seed=seed + index)
+        path = os.path.join(work_dir, f"{size[0]}x{size[1]}_{components}_{index}.png")
+        cv2.imwrite(path, image)
+        paths.append(path)
+        truths.append(truth)
+
+    # One untimed run so lazy imports and model loading don't skew the first sample
+    analyzer.analyze_screen(paths[0])
+
+    timings, accuracy, latencies = TimingAggregator(), AccuracyCounter(), []
+    start = time.perf_counter()
+    for path, truth in zip(paths, truths):
+        began = time.perf_counter()
+        layout = analyzer.analyze_screen(path)
+        latencies.append(time.perf_counter() - began)
+        timings.add(layout.timings)
+        accuracy.add(truth, layout, iou)
+    total = time.perf_counter() - start
+
+    return {
+        'size': f"{size[0]}x{size[1]}",
+        'components': components,
+        'screens': screens,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2)
+        },
+        'throughput_per_s': round(screens / total, 3) if total else 0.0,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'accuracy': accuracy.summary(),
+        'stages': timings.summary()
+    }
+
+
+def compare(current, baseline, latency_tolerance, accuracy_tolerance):
+    """Print per-case deltas against a baseline run; returns the number of regressions"""
+    print(f"\nCompared with {baseline.get('git_sha') or 'baseline'}"
+          f"{' (dirty)' if baseline.get('git_dirty') else ''}:")
+    print(f"{'case':<18} {'p50 ms':>18} {'screens/s':>16} {'precision':>16} {'recall':>16}")
+    previous = {(case['size'], case['components']): case for case in baseline.get('cases', [])}
+    regressions = 0
+    for case in current['cases']:
+        old = previous.get((case['size'], case['components']))
+        label = f"{case['size']}/{case['components']}"
+        if old is None:
+            print(f"{label:<18} (not in baseline)")
+            continue
+
+        flags = []
+        if case['latency_ms']['p50'] > old['latency_ms']['p50'] * (1 + latency_tolerance):
+            flags.append('latency')
+        for metric in ('precision', 'recall'):
+            if case['accuracy'][metric] < old['accuracy'][metric] - accuracy_tolerance:
+                flags.append(metric)
+        regressions += bool(flags)
+
+        def delta(new, before, digits):
+            return f"{new:.{digits}f} ({new - before:+.{digits}f})"
+
+        print(f"{label:<18} {delta(case['latency_ms']['p50'], old['latency_ms']['p50'], 1):>18} "
+              f"{delta(case['throughput_per_s'], old['throughput_per_s'], 2):>16} "
+              f"{delta(case['accuracy']['precision'], old['accuracy']['precision'], 3):>16} "
+              f"{delta(case['accuracy']['recall'], old['accuracy']['recall'], 3):>16}"
+              f"{'  REGRESSED: ' + ', '.join(flags) if flags else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(1280, 800), (1920, 1080)],
+                        help="Screen sizes as WIDTHxHEIGHT")
+    parser.add_argument('--components', type=int, nargs='+', default=[20, 80],
+                        help="Elements drawn per screen")
+    parser.add_argument('--screens', type=int, default=5, help="Screens per size/density")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU for a detection to match a true box")
+    parser.add_argument('--detector-options', type=json.loads, default={},
+                        help="JSON keyword arguments for ComponentDetector")
+    parser.add_argument('--mapper-options', type=json.loads, default={},
+                        help="JSON keyword arguments for RelationshipMapper")
+    parser.add_argument('--trace-memory', action='store_true', help="Per-stage tracemalloc peaks (slower)")
+    parser.add_argument('--output', help="Write results JSON here")
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help="Report deltas against an earlier run")
+    parser.add_argument('--latency-tolerance', type=float, default=0.10,
+                        help="Allowed relative p50 latency increase before flagging (default: 0.10)")
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.02,
+                        help="Allowed precision/recall drop before flagging (default: 0.02)")
+    args = parser.parse_args()
+
+    analyzer = ScreenAnalyzer(detector_options=args.detector_options, mapper_options=args.mapper_options,
+                              profile=True, profile_memory=args.trace_memory)
+    sha, dirty = git_revision()
+    results = {
+        'git_sha': sha,
+        'git_dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'opencv': cv2.__version__,
+        'options': {
+            'detector_options': args.detector_options,
+            'mapper_options': args.mapper_options,
+            'screens': args.screens,
+            'seed': args.seed,
+            'iou': args.iou,
+            'trace_memory': args.trace_memory
+        },
+        'cases': []
+    }
+
+    print(f"{'case':<18} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'screens/s':>10} "
+          f"{'peak MB':>8} {'precision':>9} {'recall':>7}")
+    with tempfile.TemporaryDirectory(prefix='ui_bench_') as work_dir:
+        for size in args.sizes:
+            for components in args.components:
+                case = run_case(analyzer, size, components, args.screens, args.seed, args.iou, work_dir)
+                results['cases'].append(case)
+                peak = (case['peak_rss_bytes'] or 0) / (1024 * 1024)
+                print(f"{case['size'] + '/' + str(components):<18} {case['latency_ms']['p50']:>9.1f} "
+                      f"{case['latency_ms']['p95']:>9.1f} {case['latency_ms']['p99']:>9.1f} "
+                      f"{case['throughput_per_s']:>10.2f} {peak:>8.0f} "
+                      f"{case['accuracy']['precision']:>9.3f} {case['accuracy']['recall']:>7.3f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.latency_tolerance, args.accuracy_tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Synthetic UI screenshots with ground-truth boxes.
+
+Draws buttons, input fields, circular icons and text labels with OpenCV in
+a flow layout at a given screen size and component count. Every element's
+true box is recorded: button and input labels are listed as separate text
+elements, as the analyzer reports them. Screens are deterministic for a
+given seed.
+
+    python benchmarks/synthetic_screens.py --out-dir /tmp/screens --size 1920x1080 --components 60 --count 5
+"""
+import argparse
+import json
+import os
+import random
+
+import cv2
+import numpy as np
+
+# Element kinds drawn, and the relative frequency of each
+KIND_WEIGHTS = {'button': 3, 'input': 2, 'circle': 2, 'label': 3}
+
+WORDS = ['Submit', 'Cancel', 'Search', 'Login', 'Register', 'Settings', 'Profile', 'Home', 'Next',
+         'Back', 'Save', 'Delete', 'Email', 'Password', 'Username', 'Help', 'Cart', 'Checkout']
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+MARGIN = 24
+GAP = 28
+
+
+def text_box(text, scale, thickness, origin):
+    """(x, y, w, h) of text drawn with its baseline at origin"""
+    (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    return (origin[0], origin[1] - h, w, h + baseline)
+
+
+def _draw_text(image, text, scale, thickness, origin, color):
+    cv2.putText(image, text, origin, FONT, scale, color, thickness, cv2.LINE_AA)
+    return text_box(text, scale, thickness, origin)
+
+
+def _plan_element(kind, rng):
+    """(width, height, label) of the next element; labels are sized to their text"""
+    if kind == 'button':
+        return rng.randint(90, 220), rng.randint(34, 56), None
+    if kind == 'input':
+        return rng.randint(180, 360), rng.randint(34, 48), None
+    if kind == 'circle':
+        diameter = 2 * rng.randint(14, 36)
+        return diameter, diameter, None
+    text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+    scale = rng.uniform(0.5, 0.9)
+    (w, h), baseline = cv2.getTextSize(text, FONT, scale, 1)
+    return w, h + baseline, (text, scale)
+
+
+def _draw_element(image, kind, x, y, w, h, label, rng, truth):
+    if kind == 'button':
+        fill = tuple(rng.randint(30, 200) for _ in range(3))
+        cv2.rectangle(image, (x, y), (x + w - 1, y + h - 1), fill, -1)
+        truth.append({'type': 'button', 'bbox': (x, y, w, h)})
+        text = rng.choice(WORDS)
+        scale = 0.6
+        tw, th = cv2.getTextSize(text, FONT, scale, 2)[0]
+        origin = (x + max(4, (w - tw) // 2), y + (h + th) // 2)
+        truth.append({'type': 'text', 'text': text,
+                      'bbox': _draw_text(image, text, scale, 2, origin, (255, 255, 255))})
+    elif kind == 'input':
+        cv2.rectangle(image, (x, y), (x + w - 1, y + h - 1), (255, 255, 255), -1)
+        cv2.rectangle(image, (x, y), (x + w - 1, y + h - 1), (120, 120, 120), 2)
+        truth.append({'type': 'input', 'bbox': (x, y, w, h)})
+        text = rng.choice(WORDS)
+        th = cv2.getTextSize(text, FONT, 0.55, 1)[0][1]
+        truth.append({'type': 'text', 'text': text,
+                      'bbox': _draw_text(image, text, 0.55, 1, (x + 10, y + (h + th) // 2), (140, 140, 140))})
+    elif kind == 'circle':
+        radius = w // 2
+        color = tuple(rng.randint(30, 220) for _ in range(3))
+        cv2.circle(image, (x + radius, y + radius), radius, color, -1, cv2.LINE_AA)
+        truth.append({'type': 'circle', 'bbox': (x, y, w, h)})
+    else:
+        text, scale = label
+        baseline = cv2.getTextSize(text, FONT, scale, 1)[1]
+        truth.append({'type': 'text', 'text': text,
+                      'bbox': _draw_text(image, text, scale, 1, (x, y + h - baseline), (40, 40, 40))})
+
+
+def generate_screen(width, height, components, seed=0):
+    """Draw one screen; returns (BGR image, ground truth list of {'type', 'bbox'[, 'text']}).
+
+    `components` counts drawn elements (a button or input with its label is
+    one); fewer are drawn if the screen fills up first.
+    """
+    rng = random.Random(seed)
+    image = np.full((height, width, 3), 248, np.uint8)
+    truth = []
+    kinds = list(KIND_WEIGHTS)
+    weights = [KIND_WEIGHTS[kind] for kind in kinds]
+
+    x, y, row_height, drawn = MARGIN, MARGIN, 0, 0
+    while drawn < components:
+        kind = rng.choices(kinds, weights)[0]
+        w, h, label = _plan_element(kind, rng)
+        if x + w > width - MARGIN:
+            x, y, row_height = MARGIN, y + row_height + GAP, 0
+        if y + h > height - MARGIN:
+            break
+        _draw_element(image, kind, x, y, w, h, label, rng, truth)
+        x += w + GAP + rng.randint(0, 40)
+        row_height = max(row_height, h)
+        drawn += 1
+
+    return image, [dict(entry, bbox=[int(v) for v in entry['bbox']]) for entry in truth]
+
+
+def parse_size(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out-dir', required=True)
+    parser.add_argument('--size', type=parse_size, default=(1920, 1080), help="WIDTHxHEIGHT")
+    parser.add_argument('--components', type=int, default=60)
+    parser.add_argument('--count', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for index in range(args.count):
+        image, truth = generate_screen(*args.size, args.components, seed=args.seed + index)
+        stem = os.path.join(args.out_dir, f"synthetic_{index:03d}")
+        cv2.imwrite(stem + '.png', image)
+        with open(stem + '_truth.json', 'w') as f:
+            json.dump(truth, f, indent=1)
+        print(f"{stem}.png: {len(truth)} ground-truth boxes")
+
+
+if __name__ == '__main__':
+    main()
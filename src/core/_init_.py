@@ -1,13 +1,25 @@
 """Core Analysis Components"""
 
-from .screen_analyzer import ScreenAnalyzer
+from .screen_analyzer import ScreenAnalyzer, BatchResult
 from .component_detector import ComponentDetector
 from .relationship_mapper import RelationshipMapper
+from .hierarchy_builder import HierarchyBuilder
+from .analysis_service import AnalysisService
+from .video_analyzer import VideoAnalyzer, layout_changes
+from .layout_diff import diff_layouts, diff_directories, PairDiff
 
 __all__ = [
     'ScreenAnalyzer',
+    'BatchResult',
 
     
     'ComponentDetector', 
-    'RelationshipMapper'
+    'RelationshipMapper',
+    'HierarchyBuilder',
+    'AnalysisService',
+    'VideoAnalyzer',
+    'layout_changes',
+    'diff_layouts',
+    'diff_directories',
+    'PairDiff'
 ]
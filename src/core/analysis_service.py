@@ -0,0 +1,114 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Tuple, List
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.spatial_relationship import UILayout
+from core.screen_analyzer import ScreenAnalyzer
+from utils.micro_batcher import MicroBatcher
+
+
+class ServiceBusyError(RuntimeError):
+    """Raised when the service already has max_in_flight analyses pending"""
+
+
+class AnalysisTimeoutError(RuntimeError):
+    """Raised when an analysis does not finish within the request timeout"""
+
+
+class LayoutNotFoundError(KeyError):
+    """Raised for unknown (or evicted) layout IDs"""
+
+
+class AnalysisService:
+    """Long-lived, thread-safe wrapper around a warm ScreenAnalyzer.
+
+    Concurrent analyze() calls are grouped by a MicroBatcher so OCR text
+    detection runs on several images at once, on a single thread that owns
+    the models. Finished layouts are kept in a bounded LRU store so later
+    queries can refer to them by ID.
+    """
+
+    def __init__(self, analyzer: Optional[ScreenAnalyzer] = None,
+                 max_batch_size: int = 8, max_wait: float = 0.02,
+                 max_in_flight: int = 16, request_timeout: float = 60.0,
+                 max_layouts: int = 256, warm_up: bool = True):
+        self.analyzer = analyzer or ScreenAnalyzer()
+        if warm_up:
+            # Pay the OCR model load at startup, not on the first request
+            self.analyzer.component_detector.image_processor.warm_up()
+        self.request_timeout = request_timeout
+        self.max_layouts = max_layouts
+
+        self._batcher = MicroBatcher(
+            self._analyze_batch, max_batch_size=max_batch_size,
+            max_wait=max_wait, name='analysis-batcher'
+        )
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._layouts: 'OrderedDict[str, UILayout]' = OrderedDict()
+        self._layouts_lock = threading.Lock()
+
+    def _analyze_batch(self, images: List[bytes]) -> List[UILayout]:
+        return self.analyzer.analyze_images(images)
+
+    def analyze(self, image_bytes: bytes, timeout: Optional[float] = None) -> Tuple[str, UILayout]:
+        """Analyze encoded image bytes, store the layout and return (layout_id, layout)"""
+        if not self._in_flight.acquire(blocking=False):
+            raise ServiceBusyError("Too many analyses in flight")
+
+        try:
+            future = self._batcher.submit(image_bytes)
+        except BaseException:
+            self._in_flight.release()
+            raise
+        # The slot is held until the work is really over: a timed-out request
+        # the batcher has already picked up keeps using the CPU and OCR model
+        # until it finishes, so it must keep counting against max_in_flight
+        future.add_done_callback(lambda _: self._in_flight.release())
+
+        try:
+            layout = future.result(timeout=timeout or self.request_timeout)
+        except FutureTimeoutError:
+            # Only drops the request if the batcher has not started it yet
+            future.cancel()
+            raise AnalysisTimeoutError("Analysis timed out")
+
+        layout_id = uuid.uuid4().hex
+        with self._layouts_lock:
+            self._layouts[layout_id] = layout
+            while len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+
+        return layout_id, layout
+
+    def get_layout(self, layout_id: str) -> UILayout:
+        with self._layouts_lock:
+            layout = self._layouts.get(layout_id)
+            if layout is None:
+                raise LayoutNotFoundError(layout_id)
+            self._layouts.move_to_end(layout_id)
+            return layout
+
+    def query(self, layout_id: str, query: str) -> str:
+        return self.analyzer.query_layout(self.get_layout(layout_id), query)
+
+    def export(self, layout: UILayout) -> Dict[str, Any]:
+        return self.analyzer.export_structured_output(layout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._layouts_lock:
+            stored = len(self._layouts)
+        return {
+            'stored_layouts': stored,
+            'queue_depth': self._batcher.queue_depth,
+            'batches_processed': self._batcher.batches_processed,
+            'mean_batch_size': round(self._batcher.mean_batch_size, 2)
+        }
+
+    def close(self) -> None:
+        self._batcher.close()
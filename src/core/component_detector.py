@@ -1,4 +1,3 @@
-import uuid
 from typing import List, Dict, Tuple
 import sys
 import os
@@ -21,59 +20,299 @@ class ComponentDetector:
 
 
 
-import uuid
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterable
 import sys
 import os
+import numpy as np
 
 # Fix the path imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from models.ui_component import UIComponent, ComponentType, BoundingBox
+from models.ui_component import UIComponent, ComponentType, BoundingBox, stable_component_id
 from utils.image_processor import ImageProcessor
+from utils.box_ops import boxes_to_array, suppress_lower_confidence, greedy_nms, suppress_contained
+from utils.tiling import compute_tiles, offset_bbox, peak_rss_bytes
+from utils.profiler import stage, bind_profile
+from utils.ocr_cache import RecognitionCache, DEFAULT_MAX_ENTRIES
+from concurrent.futures import ThreadPoolExecutor
 
 
 class ComponentDetector:
-    def __init__(self):
+    def __init__(self, nms_mode: str = 'pairwise',
+                 type_thresholds: Optional[Dict[str, float]] = None,
+                 tile_size: Optional[int] = None, tile_overlap: int = 200,
+                 tile_workers: int = 4, color_mode: str = 'mean',
+                 palette_size: int = 3, detection_scale: float = 1.0,
+                 ocr_proposer: str = 'detector', ocr_min_area: int = 0,
+                 ocr_batch_size: int = 1, ocr_skip_covered_by: Optional[List[str]] = None,
+                 ocr_cache_size: int = 0, ocr_cache_path: Optional[str] = None):
+        """
+        nms_mode: 'pairwise' drops any component overlapping a more confident
+                  one (the original duplicate filter); 'greedy' is classic
+                  confidence-sorted NMS.
+        type_thresholds: optional IoU thresholds per kind ('text',
+                         'rectangle', 'circle'); others use
+                         duplicate_overlap_threshold.
+        tile_size: when set, images larger than this in either dimension are
+                   processed as overlapping tile_size x tile_size tiles on
+                   tile_workers threads. tile_overlap should exceed the
+                   largest expected element (rectangles are capped at 200px
+                   high by default).
+        color_mode: 'mean' (average color per box) or 'palette' (k-means
+                    palette of palette_size colors; needs scikit-learn).
+        detection_scale: below 1 (e.g. 0.5 or 0.25), rectangles and circles
+                         are proposed on a downscaled image and refined at
+                         full resolution around each proposal; much faster
+                         on Retina/4K captures.
+        ocr_proposer: how text regions are proposed before recognition:
+                      'detector' (easyocr's text detector) or 'morphology'
+                      (an OpenCV pass, much cheaper on CPU).
+        ocr_min_area: proposals smaller than this many pixels are not
+                      recognized.
+        ocr_batch_size: crops per recognition batch (easyocr batches on GPU).
+        ocr_skip_covered_by: shape types ('rectangle', 'circle') whose
+                             detections suppress recognition of text
+                             proposals inside them, e.g. ['circle'] for
+                             icon-heavy screens.
+        ocr_cache_size: when > 0, recognitions are memoized by normalized
+                        text-crop hash in an LRU of this many entries, so
+                        labels recurring across screens are recognized once.
+        ocr_cache_path: JSON Lines file the recognition cache is loaded
+                        from and appended to (enables the cache with the
+                        default size if ocr_cache_size is 0).
+        """
+        if nms_mode not in ('pairwise', 'greedy'):
+            raise ValueError(f"Unknown NMS mode: {nms_mode}")
+        if tile_size is not None and not 0 <= tile_overlap < tile_size:
+            raise ValueError("tile_overlap must be in [0, tile_size)")
+        if color_mode not in ('mean', 'palette'):
+            raise ValueError(f"Unknown color mode: {color_mode}")
+        if not 0.0 < detection_scale <= 1.0:
+            raise ValueError("detection_scale must be in (0, 1]")
+        if ocr_proposer not in ('detector', 'morphology'):
+            raise ValueError(f"Unknown OCR proposer: {ocr_proposer}")
+        
         self.image_processor = ImageProcessor()
+        self.image_processor.color_params['mode'] = color_mode
+        self.image_processor.color_params['palette_size'] = palette_size
+        self.image_processor.multiscale_params['scale'] = detection_scale
+        self.image_processor.ocr_params.update({
+            'proposer': ocr_proposer,
+            'min_area': ocr_min_area,
+            'recognition_batch_size': max(1, ocr_batch_size),
+            'skip_covered_by': sorted(ocr_skip_covered_by or [])
+        })
+        if ocr_cache_size > 0 or ocr_cache_path:
+            self.image_processor.recognition_cache = RecognitionCache(
+                ocr_cache_size or DEFAULT_MAX_ENTRIES, ocr_cache_path
+            )
+        self.duplicate_overlap_threshold = 0.8
+        self.nms_mode = nms_mode
+        self.type_thresholds = dict(type_thresholds or {})
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_workers = max(1, tile_workers)
+        
+        # Share of a seam-cut detection that must be covered by its
+        # counterpart from the neighbouring tile to be merged away
+        self.seam_containment_threshold = 0.7
+    
+    def get_config(self) -> Dict:
+        """Parameters that influence detection output (used for cache keys)"""
+        return {
+            'duplicate_overlap_threshold': self.duplicate_overlap_threshold,
+            'nms_mode': self.nms_mode,
+            'type_thresholds': self.type_thresholds,
+            'tile_size': self.tile_size,
+            'tile_overlap': self.tile_overlap if self.tile_size else None,
+            'image_processor': self.image_processor.get_config()
+        }
     
     def detect_components(self, image_path: str) -> List[UIComponent]:
         """Main method to detect all UI components"""
         image = self.image_processor.preprocess_image(image_path)
+        return self.detect_components_in_image(image)
+    
+    def should_tile(self, image: np.ndarray) -> bool:
+        """Whether this image is large enough to be processed in tiles"""
+        return self.tile_size is not None and max(image.shape[:2]) > self.tile_size
+    
+    def detect_components_in_image(self, image: np.ndarray,
+                                   gray: Optional[np.ndarray] = None,
+                                   text_regions: Optional[List[Dict]] = None,
+                                   metadata: Optional[Dict] = None) -> List[UIComponent]:
+        """Detect all UI components in an already decoded BGR image.
+        
+        text_regions can be passed in when OCR already ran (e.g. batched
+        across several images); otherwise OCR runs here. Run statistics
+        (tiling, peak memory) are written into metadata when given.
+        """
+        # One grayscale conversion shared by OCR and shape detection
+        if gray is None:
+            gray = self.image_processor.to_grayscale(image)
+        
+        # Extract different types of elements; shapes first so OCR can skip
+        # text proposals they cover
+        ocr_stats: Dict[str, int] = {}
+        if self.should_tile(image):
+            text_regions, ui_elements = self._detect_tiled(image, gray, text_regions, metadata, ocr_stats)
+        else:
+            ui_elements = self.image_processor.detect_ui_elements(image, gray)
+            if text_regions is None:
+                text_regions = self.image_processor.extract_text_regions(image, gray, ui_elements, ocr_stats)
+        
+        components = self.create_components(image, text_regions, ui_elements)
+        
+        if metadata is not None:
+            if ocr_stats:
+                metadata['ocr'] = self.image_processor.ocr_report(ocr_stats, image.shape)
+            multiscale = self.image_processor.multiscale_params
+            if multiscale['scale'] < 1.0:
+                metadata['multiscale'] = {
+                    'detection_scale': multiscale['scale'],
+                    'refine_margin': multiscale['refine_margin']
+                }
+            peak = peak_rss_bytes()
+            if peak is not None:
+                metadata['peak_rss_bytes'] = peak
+        
+        return components
+    
+    def _detect_tiled(self, image: np.ndarray, gray: np.ndarray,
+                      text_regions: Optional[List[Dict]],
+                      metadata: Optional[Dict],
+                      ocr_stats: Optional[Dict[str, int]] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Run OCR and shape detection per overlapping tile, in parallel threads"""
+        height, width = image.shape[:2]
+        tiles = compute_tiles(width, height, self.tile_size, self.tile_overlap)
+        run_ocr = text_regions is None
+        tile_stats: List[Dict[str, int]] = [{} for _ in tiles]
+        
+        with ThreadPoolExecutor(max_workers=min(self.tile_workers, len(tiles))) as executor:
+            results = list(executor.map(
+                bind_profile(lambda tile, stats: self.detect_in_window(image, gray, tile, run_ocr, stats)),
+                tiles, tile_stats
+            ))
+        if ocr_stats is not None:
+            for stats in tile_stats:
+                for key, value in stats.items():
+                    ocr_stats[key] = ocr_stats.get(key, 0) + value
+        
+        tile_texts = [(index, region) for index, (texts, _) in enumerate(results) for region in texts]
+        tile_elements = [(index, region) for index, (_, elements) in enumerate(results) for region in elements]
         
-        # Extract different types of elements
-        text_regions = self.image_processor.extract_text_regions(image)
-        ui_elements = self.image_processor.detect_ui_elements(image)
+        with stage('merge_tile_seams', items=len(tile_elements) + len(tile_texts)):
+            merged_elements = self._merge_tile_seams(tile_elements)
+            if run_ocr:
+                text_regions = self._merge_tile_seams(tile_texts)
         
+        if metadata is not None:
+            metadata['tiling'] = {
+                'tiles': len(tiles),
+                'tile_size': self.tile_size,
+                'overlap': self.tile_overlap,
+                'workers': min(self.tile_workers, len(tiles)),
+                'seam_duplicates_removed': (
+                    len(tile_elements) - len(merged_elements) +
+                    (len(tile_texts) - len(text_regions) if run_ocr else 0)
+                )
+            }
+        
+        return text_regions, merged_elements
+    
+    def detect_in_window(self, image: np.ndarray, gray: np.ndarray,
+                         window: Tuple[int, int, int, int],
+                         run_ocr: bool = True,
+                         ocr_stats: Optional[Dict[str, int]] = None) -> Tuple[List[Dict], List[Dict]]:
+        """OCR and shape detection restricted to an (x, y, w, h) window.
+        
+        Returns (text_regions, ui_elements) with boxes in image coordinates.
+        """
+        x, y, w, h = window
+        # Slices are views, no pixel copies per window
+        window_image = image[y:y + h, x:x + w]
+        window_gray = gray[y:y + h, x:x + w]
+        
+        ui_elements = self.image_processor.detect_ui_elements(window_image, window_gray)
+        text_regions = self.image_processor.extract_text_regions(
+            window_image, window_gray, ui_elements, ocr_stats
+        ) if run_ocr else []
+        for region in text_regions + ui_elements:
+            region['bbox'] = offset_bbox(region['bbox'], x, y)
+        
+        return text_regions, ui_elements
+    
+    def create_components(self, image: np.ndarray, text_regions: List[Dict],
+                          ui_elements: List[Dict],
+                          reserved_ids: Iterable[str] = ()) -> List[UIComponent]:
+        """Turn raw OCR / shape detections into deduplicated UIComponents.
+        
+        Component IDs are derived from type, box and text (see
+        stable_component_id); reserved_ids are IDs already taken by other
+        components of the same layout, e.g. the ones kept by an incremental
+        analysis.
+        """
+        # One summed-area pass for every box instead of a ROI per component
+        colors = self.image_processor.extract_color_info_batch(
+            image, [region['bbox'] for region in text_regions] + [element['bbox'] for element in ui_elements]
+        )
         components = []
         
         # Process text regions
-        for text_region in text_regions:
-            component = self._create_text_component(image, text_region)
+        for text_region, color_info in zip(text_regions, colors):
+            component = self._create_text_component(image, text_region, color_info)
             components.append(component)
         
         # Process UI elements
-        for element in ui_elements:
-            component = self._create_ui_component(image, element)
+        for element, color_info in zip(ui_elements, colors[len(text_regions):]):
+            component = self._create_ui_component(image, element, color_info)
             components.append(component)
         
         # Remove duplicates and overlapping components
-        components = self._remove_duplicates(components)
+        with stage('remove_duplicates', items=len(components)):
+            components = self._remove_duplicates(components)
         
+        self._make_ids_unique(components, reserved_ids)
         return components
     
-    def _create_text_component(self, image, text_region: Dict) -> UIComponent:
+    @staticmethod
+    def _make_ids_unique(components: List[UIComponent], reserved_ids: Iterable[str] = ()) -> None:
+        """Suffix colliding IDs (-2, -3, ...) in detection order"""
+        taken = set(reserved_ids)
+        for component in components:
+            base = component.id
+            suffix = 1
+            while component.id in taken:
+                suffix += 1
+                component.id = f"{base}-{suffix}"
+            taken.add(component.id)
+    
+    def _merge_tile_seams(self, tagged_regions: List[Tuple[int, Dict]]) -> List[Dict]:
+        """Drop seam-cut partial copies covered by a detection from another tile"""
+        if len(tagged_regions) < 2:
+            return [region for _, region in tagged_regions]
+        
+        boxes = boxes_to_array([region['bbox'] for _, region in tagged_regions])
+        scores = np.array([float(region['confidence']) for _, region in tagged_regions])
+        groups = np.array([tile for tile, _ in tagged_regions])
+        
+        keep = suppress_contained(boxes, scores, groups, self.seam_containment_threshold)
+        return [region for (_, region), kept in zip(tagged_regions, keep) if kept]
+    
+    def _create_text_component(self, image, text_region: Dict,
+                               color_info: Optional[Dict] = None) -> UIComponent:
         """Create a text component from OCR results"""
         bbox_tuple = text_region['bbox']
         bbox = BoundingBox(bbox_tuple[0], bbox_tuple[1], bbox_tuple[2], bbox_tuple[3])
         
-        color_info = self.image_processor.extract_color_info(image, bbox_tuple)
+        if color_info is None:
+            color_info = self.image_processor.extract_color_info(image, bbox_tuple)
         
         # Classify if it's a label or input based on context
         component_type = self._classify_text_type(text_region['text'], bbox)
         
         return UIComponent(
-            id=str(uuid.uuid4()),
+            id=stable_component_id(component_type, bbox, text_region['text']),
             component_type=component_type,
             bounding_box=bbox,
             text_content=text_region['text'],
@@ -81,18 +320,20 @@ class ComponentDetector:
             confidence=text_region['confidence']
         )
     
-    def _create_ui_component(self, image, element: Dict) -> UIComponent:
+    def _create_ui_component(self, image, element: Dict,
+                             color_info: Optional[Dict] = None) -> UIComponent:
         """Create a UI component from detected elements"""
         bbox_tuple = element['bbox']
         bbox = BoundingBox(bbox_tuple[0], bbox_tuple[1], bbox_tuple[2], bbox_tuple[3])
         
-        color_info = self.image_processor.extract_color_info(image, bbox_tuple)
+        if color_info is None:
+            color_info = self.image_processor.extract_color_info(image, bbox_tuple)
         
         # Classify component type
         component_type = self._classify_component_type(element, bbox)
         
         return UIComponent(
-            id=str(uuid.uuid4()),
+            id=stable_component_id(component_type, bbox),
             component_type=component_type,
             bounding_box=bbox,
             color_info=color_info,
@@ -126,35 +367,29 @@ class ComponentDetector:
     
     def _remove_duplicates(self, components: List[UIComponent]) -> List[UIComponent]:
         """Remove duplicate or heavily overlapping components"""
-        filtered_components = []
-        
-        for i, comp1 in enumerate(components):
-            is_duplicate = False
-            
-            for j, comp2 in enumerate(components):
-                if i != j and self._calculate_overlap(comp1.bounding_box, comp2.bounding_box) > 0.8:
-                    if comp1.confidence < comp2.confidence:
-                        is_duplicate = True
-                        break
-            
-            if not is_duplicate:
-                filtered_components.append(comp1)
-        
-        return filtered_components
-    
-    def _calculate_overlap(self, bbox1: BoundingBox, bbox2: BoundingBox) -> float:
-        """Calculate overlap ratio between two bounding boxes"""
-        x1_min, y1_min = bbox1.x, bbox1.y
-        x1_max, y1_max = bbox1.x + bbox1.width, bbox1.y + bbox1.height
-        
-        x2_min, y2_min = bbox2.x, bbox2.y
-        x2_max, y2_max = bbox2.x + bbox2.width, bbox2.y + bbox2.height
-        
-        # Calculate intersection
-        x_overlap = max(0, min(x1_max, x2_max) - max(x1_min, x2_min))
-        y_overlap = max(0, min(y1_max, y2_max) - max(y1_min, y2_min))
-        
-        intersection = x_overlap * y_overlap
-        union = bbox1.area + bbox2.area - intersection
-        
-        return intersection / union if union > 0 else 0
+        if len(components) < 2:
+            return list(components)
+        
+        boxes = boxes_to_array([
+            (c.bounding_box.x, c.bounding_box.y, c.bounding_box.width, c.bounding_box.height)
+            for c in components
+        ])
+        scores = np.array([c.confidence for c in components], dtype=np.float64)
+        thresholds = np.array([
+            self.type_thresholds.get(self._component_kind(c), self.duplicate_overlap_threshold)
+            for c in components
+        ], dtype=np.float64)
+        
+        if self.nms_mode == 'greedy':
+            keep = greedy_nms(boxes, scores, thresholds)
+        else:
+            keep = suppress_lower_confidence(boxes, scores, thresholds)
+        
+        return [comp for comp, kept in zip(components, keep) if kept]
+    
+    @staticmethod
+    def _component_kind(component: UIComponent) -> str:
+        """Detection source of a component: 'text', 'rectangle', 'circle', ..."""
+        if component.text_content is not None:
+            return 'text'
+        return component.attributes.get('shape', 'unknown')
@@ -0,0 +1,28 @@
+from typing import List
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import UIComponent
+from models.component_tree import ComponentTree
+from utils.spatial_index import containment_parents
+from utils.profiler import stage
+
+
+class HierarchyBuilder:
+    """Builds the parent/child containment tree of detected components.
+
+    Runs between ComponentDetector and RelationshipMapper. A component's
+    parent is the smallest component whose box contains its box (edges may
+    touch, as for RelationType.INSIDE); containment_parents finds all of
+    them in one O(n log n) sweep instead of testing every pair.
+    """
+
+    def build(self, components: List[UIComponent]) -> ComponentTree:
+        with stage('build_hierarchy', items=len(components)):
+            parents = containment_parents([comp.bounding_box for comp in components])
+            return ComponentTree({
+                comp.id: components[parent].id if parent is not None else None
+                for comp, parent in zip(components, parents)
+            })
@@ -0,0 +1,410 @@
+import difflib
+import heapq
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import UIComponent, BoundingBox, describe_component
+from models.spatial_relationship import UILayout
+from models.timeline import ChangeKind
+from models.layout_diff import DiffTolerances, ComponentChange, LayoutDiff
+from utils.spatial_index import GridIndex
+from utils.binary_layout import load_layout
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+ANALYSIS_EXTENSIONS = ('.json', '.ndjson', '.uilb')
+
+
+def text_similarity(a: Optional[str], b: Optional[str], minimum: float = 0.0) -> float:
+    """difflib ratio of two texts (1.0 when equal, 0.0 when only one is empty).
+
+    Below `minimum` the cheap upper bound is returned instead of the exact
+    ratio, which is all a caller comparing against that threshold needs.
+    """
+    a, b = a or '', b or ''
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    bound = matcher.quick_ratio()
+    if bound < minimum:
+        return bound
+    return matcher.ratio()
+
+
+def _iou(a: BoundingBox, b: BoundingBox) -> float:
+    overlap_w = min(a.x + a.width, b.x + b.width) - max(a.x, b.x)
+    overlap_h = min(a.y + a.height, b.y + b.height) - max(a.y, b.y)
+    if overlap_w <= 0 or overlap_h <= 0:
+        return 0.0
+    intersection = overlap_w * overlap_h
+    return intersection / float(a.area + b.area - intersection)
+
+
+def _center_distance(a: BoundingBox, b: BoundingBox) -> float:
+    (ax, ay), (bx, by) = a.center, b.center
+    return math.hypot(ax - bx, ay - by)
+
+
+def _size_similarity(a: BoundingBox, b: BoundingBox) -> float:
+    """1.0 for boxes of equal size, falling toward 0 as width or height ratios grow"""
+    if min(a.width, a.height, b.width, b.height) <= 0:
+        return 0.0
+    return (min(a.width, b.width) / max(a.width, b.width)) * (min(a.height, b.height) / max(a.height, b.height))
+
+
+def _rgb(comp: UIComponent) -> Optional[Tuple[int, int, int]]:
+    value = (comp.color_info or {}).get('dominant_hex')
+    if not isinstance(value, str) or len(value) != 7 or not value.startswith('#'):
+        return None
+    try:
+        return int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16)
+    except ValueError:
+        return None
+
+
+def _nearest_first(index: GridIndex, x: float, y: float) -> Iterator[Tuple[float, int]]:
+    """(distance, box index) of every box center in an index, nearest first, found lazily ring by ring"""
+    pending: List[Tuple[float, int]] = []
+    for reach, candidates in index.iter_rings(x, y):
+        for k in candidates:
+            cx, cy = index.boxes[k].center
+            heapq.heappush(pending, (math.hypot(cx - x, cy - y), k))
+        while pending and pending[0][0] <= reach:
+            yield heapq.heappop(pending)
+    while pending:
+        yield heapq.heappop(pending)
+
+
+def _match_score(a: UIComponent, b: UIComponent, tolerances: DiffTolerances) -> Optional[float]:
+    """How likely b is the same component as a, or None if it cannot be.
+
+    Components of the same type pair up when their texts are similar or
+    their boxes overlap enough (an edited label stays in place). A type
+    change is only accepted between texts that match, since text is
+    classified partly by its box shape.
+    """
+    same_type = a.component_type == b.component_type
+    text = text_similarity(a.text_content, b.text_content, tolerances.min_text_similarity)
+    overlap = _iou(a.bounding_box, b.bounding_box)
+    if same_type:
+        if text < tolerances.min_text_similarity and overlap < tolerances.match_iou:
+            return None
+    elif not (a.text_content and b.text_content and text >= tolerances.min_text_similarity):
+        return None
+    proximity = max(0.0, 1.0 - _center_distance(a.bounding_box, b.bounding_box) / max(tolerances.search_radius, 1))
+    return text + overlap + proximity + _size_similarity(a.bounding_box, b.bounding_box) + (0.5 if same_type else 0.0)
+
+
+def match_components(before: List[UIComponent], after: List[UIComponent],
+                     tolerances: Optional[DiffTolerances] = None) -> List[Tuple[int, int]]:
+    """Pair up components of two layouts; returns (before index, after index) pairs.
+
+    1. Identical IDs pair directly (deterministic IDs are equal when type,
+       box and text are unchanged; incremental analysis keeps IDs too).
+    2. Each remaining before component is scored only against the after
+       components a GridIndex finds within search_radius of its box, and
+       the best-scoring pairs are taken greedily.
+    3. Leftovers with the same type and identical text are paired nearest
+       first wherever they are, so a label that moved across the screen is
+       MOVED rather than removed and added. Each component's copies are
+       visited nearest first through a GridIndex, one at a time and only
+       while it is still unpaired, so dozens of identical "Edit" buttons
+       do not cost a comparison per pair.
+
+    With a handful of candidates per component this is about O((n + m) log(n + m))
+    rather than the O(n * m) of comparing every pair.
+    """
+    tolerances = tolerances or DiffTolerances()
+    pairs: List[Tuple[int, int]] = []
+    used_before, used_after = set(), set()
+
+    def take(i: int, j: int) -> None:
+        pairs.append((i, j))
+        used_before.add(i)
+        used_after.add(j)
+
+    after_by_id = {comp.id: j for j, comp in enumerate(after)}
+    for i, comp in enumerate(before):
+        j = after_by_id.get(comp.id)
+        if j is not None and j not in used_after:
+            take(i, j)
+
+    rest_after = [j for j in range(len(after)) if j not in used_after]
+    if rest_after and len(used_before) < len(before):
+        index = GridIndex([after[j].bounding_box for j in rest_after])
+        scored = []
+        for i, comp in enumerate(before):
+            if i in used_before:
+                continue
+            for k in index.query_bbox(comp.bounding_box, margin=tolerances.search_radius):
+                j = rest_after[k]
+                score = _match_score(comp, after[j], tolerances)
+                if score is not None:
+                    scored.append((-score, i, j))
+        for _, i, j in sorted(scored):
+            if i not in used_before and j not in used_after:
+                take(i, j)
+
+    groups: Dict[Tuple[Any, str], Tuple[List[int], List[int]]] = {}
+    for i, comp in enumerate(before):
+        if i not in used_before and comp.text_content:
+            groups.setdefault((comp.component_type, comp.text_content), ([], []))[0].append(i)
+    for j, comp in enumerate(after):
+        if j not in used_after and comp.text_content:
+            key = (comp.component_type, comp.text_content)
+            if key in groups:
+                groups[key][1].append(j)
+    for group_before, group_after in groups.values():
+        if group_after:
+            _relocate(before, after, group_before, group_after, take, used_before, used_after)
+
+    return sorted(pairs)
+
+
+def _relocate(before: List[UIComponent], after: List[UIComponent], group_before: List[int],
+              group_after: List[int], take, used_before: set, used_after: set) -> None:
+    """Pair identical-content leftovers globally nearest first.
+
+    A heap holds each unpaired before component's nearest candidate not
+    known to be taken; when the popped candidate is gone, that component
+    advances to its next nearest. This takes the same pairs as sorting every
+    (distance, before, after) pair, but only looks at the candidates it needs.
+    """
+    index = GridIndex([after[j].bounding_box for j in group_after])
+    cursors = {i: _nearest_first(index, *before[i].bounding_box.center) for i in group_before}
+    heap = []
+    for i, cursor in cursors.items():
+        entry = next(cursor, None)
+        if entry is not None:
+            heap.append((entry[0], i, entry[1]))
+    heapq.heapify(heap)
+
+    while heap:
+        distance, i, k = heapq.heappop(heap)
+        j = group_after[k]
+        if j not in used_after:
+            take(i, j)
+            continue
+        for distance, k in cursors[i]:
+            if group_after[k] not in used_after:
+                heapq.heappush(heap, (distance, i, k))
+                break
+
+
+def _pair_changes(a: UIComponent, b: UIComponent, tolerances: DiffTolerances) -> List[ComponentChange]:
+    """Changes between two matched components, beyond the tolerances"""
+    name = describe_component(b.component_type, b.text_content)
+    old, new = a.bounding_box, b.bounding_box
+    changes = []
+
+    dx, dy = int(new.x - old.x), int(new.y - old.y)
+    if max(abs(dx), abs(dy)) > tolerances.position:
+        changes.append(ComponentChange(
+            ChangeKind.MOVED, a.id, b.id,
+            f"{name} moved by ({dx:+d}, {dy:+d}) from ({old.x}, {old.y}) to ({new.x}, {new.y})",
+            {'dx': dx, 'dy': dy}
+        ))
+
+    dw, dh = int(new.width - old.width), int(new.height - old.height)
+    if max(abs(dw), abs(dh)) > tolerances.size:
+        changes.append(ComponentChange(
+            ChangeKind.RESIZED, a.id, b.id,
+            f"{name} resized from {old.width}x{old.height} to {new.width}x{new.height}",
+            {'dw': dw, 'dh': dh}
+        ))
+
+    old_rgb, new_rgb = _rgb(a), _rgb(b)
+    if old_rgb is not None and new_rgb is not None:
+        distance = math.dist(old_rgb, new_rgb)
+        if distance > tolerances.color:
+            changes.append(ComponentChange(
+                ChangeKind.RECOLORED, a.id, b.id,
+                f"{name} changed color from {a.color_info['dominant_hex']} to {b.color_info['dominant_hex']}",
+                {'from': a.color_info['dominant_hex'], 'to': b.color_info['dominant_hex'],
+                 'distance': round(distance, 1)}
+            ))
+
+    if (a.text_content or '') != (b.text_content or ''):
+        changes.append(ComponentChange(
+            ChangeKind.TEXT_CHANGED, a.id, b.id,
+            f"{b.component_type.value} text changed from '{a.text_content or ''}' to '{b.text_content or ''}'",
+            {'from': a.text_content or '', 'to': b.text_content or ''}
+        ))
+    return changes
+
+
+def diff_layouts(before: UILayout, after: UILayout,
+                 tolerances: Optional[DiffTolerances] = None) -> LayoutDiff:
+    """Component-level differences between two analyses of the same screen.
+
+    Works on anything with a `components` mapping (UILayout, ColumnarLayout,
+    a memory-mapped .uilb). Matched components are reported as MOVED,
+    RESIZED, RECOLORED and/or TEXT_CHANGED when they differ by more than
+    the tolerances; unmatched ones are ADDED or REMOVED.
+    """
+    tolerances = tolerances or DiffTolerances()
+    old = list(before.components.values())
+    new = list(after.components.values())
+    pairs = match_components(old, new, tolerances)
+
+    diff = LayoutDiff(before_components=len(old), after_components=len(new), matched=len(pairs))
+    for i, j in pairs:
+        changes = _pair_changes(old[i], new[j], tolerances)
+        if changes:
+            diff.changes.extend(changes)
+        else:
+            diff.unchanged += 1
+
+    matched_old = {i for i, _ in pairs}
+    matched_new = {j for _, j in pairs}
+    for j, comp in enumerate(new):
+        if j not in matched_new:
+            diff.changes.append(ComponentChange(
+                ChangeKind.ADDED, None, comp.id,
+                f"{describe_component(comp.component_type, comp.text_content)} added"
+            ))
+    for i, comp in enumerate(old):
+        if i not in matched_old:
+            diff.changes.append(ComponentChange(
+                ChangeKind.REMOVED, comp.id, None,
+                f"{describe_component(comp.component_type, comp.text_content)} removed"
+            ))
+    return diff
+
+
+def change_record(change: ComponentChange) -> Dict[str, Any]:
+    return {
+        "kind": change.kind.value,
+        "before_id": change.before_id,
+        "after_id": change.after_id,
+        "description": change.description,
+        "details": change.details
+    }
+
+
+def diff_record(diff: LayoutDiff) -> Dict[str, Any]:
+    """JSON-ready dict for a LayoutDiff"""
+    return {
+        "before_components": diff.before_components,
+        "after_components": diff.after_components,
+        "matched": diff.matched,
+        "unchanged": diff.unchanged,
+        "counts": diff.counts(),
+        "changes": [change_record(change) for change in diff.changes]
+    }
+
+
+@dataclass
+class PairDiff:
+    """Outcome of diffing one before/after pair of a directory run"""
+    name: str  # path relative to the compared directories, without extension
+    before_path: Optional[str]  # None when the screen only exists after
+    after_path: Optional[str]  # None when the screen only exists before
+    diff: Optional[LayoutDiff] = None
+    error: Optional[str] = None
+
+
+def analysis_files(directory: str, suffix: str = '_analysis') -> Dict[str, str]:
+    """Saved analyses under a directory, keyed by relative path without extension.
+
+    Only files named <stem><suffix>.json/.ndjson/.uilb are picked up (what
+    main.py writes), so timelines and other JSON files are skipped.
+    """
+    found: Dict[str, str] = {}
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(files):
+            stem, extension = os.path.splitext(filename)
+            if extension not in ANALYSIS_EXTENSIONS or not stem.endswith(suffix):
+                continue
+            path = os.path.join(root, filename)
+            name = os.path.splitext(os.path.relpath(path, directory))[0]
+            if name in found:
+                logger.warning("Skipping %s: %s is compared already", path, found[name])
+                continue
+            found[name] = path
+    return found
+
+
+def diff_files(before_path: str, after_path: str,
+               tolerances: Optional[DiffTolerances] = None) -> LayoutDiff:
+    """diff_layouts on two saved analyses (JSON, NDJSON or .uilb)"""
+    before = load_layout(before_path)
+    try:
+        after = load_layout(after_path)
+        try:
+            return diff_layouts(before, after, tolerances)
+        finally:
+            if hasattr(after, 'close'):
+                after.close()
+    finally:
+        if hasattr(before, 'close'):
+            before.close()
+
+
+def _diff_pair(name: str, before_path: Optional[str], after_path: Optional[str],
+               tolerances: Optional[DiffTolerances]) -> PairDiff:
+    result = PairDiff(name, before_path, after_path)
+    if before_path is None or after_path is None:
+        return result
+    try:
+        result.diff = diff_files(before_path, after_path, tolerances)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def diff_directories(before_dir: str, after_dir: str, tolerances: Optional[DiffTolerances] = None,
+                     workers: Optional[int] = None, suffix: str = '_analysis') -> Iterator[PairDiff]:
+    """Diff every saved analysis in before_dir against its namesake in after_dir.
+
+    Pairs are spread over a process pool (workers defaults to the CPU
+    count), and a PairDiff is yielded as each finishes, in completion
+    order. Screens present on one side only are yielded without a diff; a
+    file that fails to load is yielded with its error.
+    """
+    before_files = analysis_files(before_dir, suffix)
+    after_files = analysis_files(after_dir, suffix)
+    names = sorted(set(before_files) | set(after_files))
+    jobs = [(name, before_files.get(name), after_files.get(name)) for name in names]
+    comparable = [job for job in jobs if job[1] is not None and job[2] is not None]
+
+    for name, before_path, after_path in jobs:
+        if before_path is None or after_path is None:
+            yield PairDiff(name, before_path, after_path)
+    if not comparable:
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(comparable)))
+
+    if workers == 1:
+        for name, before_path, after_path in comparable:
+            yield _diff_pair(name, before_path, after_path, tolerances)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            executor.submit(_diff_pair, name, before_path, after_path, tolerances): (name, before_path, after_path)
+            for name, before_path, after_path in comparable
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # A crashed worker should not take the whole run down
+                yield PairDiff(*futures[future], error=f"{type(e).__name__}: {e}")
+    finally:
+        # Stop queued work if the caller abandons the generator early
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,95 +1,223 @@
 import math
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Set
 import sys
 import os
 
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from models.ui_component import UIComponent
-from models.spatial_relationship import SpatialRelationship, RelationType
+from models.ui_component import UIComponent, BoundingBox, describe_component
+from models.spatial_relationship import SpatialRelationship, RelationType, describe_relationship
+from models.component_tree import ComponentTree
+from core.hierarchy_builder import HierarchyBuilder
+from utils.spatial_index import GridIndex, direction_of
+from utils.profiler import stage
 
 
 class RelationshipMapper:
-    def __init__(self):
+    def __init__(self, mode: str = 'hierarchy', max_neighbors: Optional[int] = 3,
+                 max_distance: Optional[float] = None):
+        """
+        mode: 'hierarchy' (the default) relates each component to its
+              parent in the containment tree and, the same way as
+              'neighbors', to its nearest siblings only, so nothing is
+              related across container boundaries; 'neighbors' relates each
+              component to its nearest neighbors per direction anywhere on
+              the screen (plus anything it touches or overlaps) using a
+              spatial grid; 'exhaustive'
+              relates every ordered pair, which is O(n^2) and mainly useful
+              for comparing results.
+        max_neighbors: neighbors kept per direction in 'neighbors' and
+                       'hierarchy' modes (None keeps every neighbor within
+                       max_distance).
+        max_distance: optional center-to-center radius in pixels.
+        """
+        if mode not in ('neighbors', 'hierarchy', 'exhaustive'):
+            raise ValueError(f"Unknown relationship mapping mode: {mode}")
+        if mode != 'exhaustive' and max_neighbors is None and max_distance is None:
+            raise ValueError("Neighbor mode needs max_neighbors or max_distance")
+
         self.threshold_adjacent = 20
         self.threshold_alignment = 10
-    
-    def map_relationships(self, components: List[UIComponent]) -> List[SpatialRelationship]:
-        """Map spatial relationships between all components"""
+        self.mode = mode
+        self.max_neighbors = max_neighbors
+        self.max_distance = max_distance
+
+    def get_config(self) -> Dict:
+        """Parameters that influence mapping output (used for cache keys)"""
+        return {
+            'threshold_adjacent': self.threshold_adjacent,
+            'threshold_alignment': self.threshold_alignment,
+            'mode': self.mode,
+            'max_neighbors': self.max_neighbors,
+            'max_distance': self.max_distance
+        }
+
+    def map_relationships(self, components: List[UIComponent],
+                          previous: Optional[List[SpatialRelationship]] = None,
+                          stable_ids: Optional[Set[str]] = None,
+                          hierarchy: Optional[ComponentTree] = None) -> List[SpatialRelationship]:
+        """Map spatial relationships between components
+
+        When previous relationships are given, pairs whose two components are
+        both in stable_ids (unchanged since those relationships were computed)
+        reuse them instead of being re-analyzed. Pair selection still runs over
+        the full component list, so new neighbors are picked up.
+        'hierarchy' mode uses the given containment tree, or builds one.
+        """
+        if self.mode == 'hierarchy' and hierarchy is None:
+            hierarchy = HierarchyBuilder().build(components)
+
+        with stage('select_pairs', items=len(components)):
+            if self.mode == 'exhaustive':
+                pairs = [
+                    (i, j) for i in range(len(components)) for j in range(len(components)) if i != j
+                ]
+            elif self.mode == 'hierarchy':
+                pairs = self._hierarchy_pairs(components, hierarchy)
+            else:
+                pairs = self._neighbor_pairs(components)
+
+        reusable: Dict[Tuple[str, str], List[SpatialRelationship]] = {}
+        if previous and stable_ids:
+            for rel in previous:
+                if rel.component1_id in stable_ids and rel.component2_id in stable_ids:
+                    reusable.setdefault((rel.component1_id, rel.component2_id), []).append(rel)
+
         relationships = []
-        
-        for i, comp1 in enumerate(components):
-            for j, comp2 in enumerate(components):
-                if i != j:
-                    relationship = self._analyze_relationship(comp1, comp2)
-                    if relationship:
-                        relationships.append(relationship)
-        
+        with stage('analyze_pairs', items=len(pairs)):
+            for i, j in pairs:
+                key = (components[i].id, components[j].id)
+                if key in reusable:
+                    relationships.extend(reusable[key])
+                else:
+                    relationships.extend(self._analyze_relationship(components[i], components[j]))
+
         return relationships
-    
-    def _analyze_relationship(self, comp1: UIComponent, comp2: UIComponent) -> SpatialRelationship:
-        """Analyze relationship between two components"""
+
+    def _neighbor_pairs(self, components: List[UIComponent]) -> List[Tuple[int, int]]:
+        """Ordered pairs (both directions) selected through the spatial index"""
+        return self._both_directions(self._select_neighbors(components))
+
+    def _select_neighbors(self, components: List[UIComponent]) -> Set[Tuple[int, int]]:
+        """Unordered (i < j) pairs of nearby components, found through a GridIndex"""
+        index = GridIndex([comp.bounding_box for comp in components])
+        selected: Set[Tuple[int, int]] = set()
+
+        for i, comp in enumerate(components):
+            # Anything overlapping, containing or within adjacency range
+            for j in index.query_bbox(comp.bounding_box, margin=self.threshold_adjacent):
+                if j != i:
+                    selected.add((min(i, j), max(i, j)))
+
+            for neighbors in index.nearest_by_direction(i, self.max_neighbors, self.max_distance).values():
+                for j in neighbors:
+                    selected.add((min(i, j), max(i, j)))
+        return selected
+
+    def _hierarchy_pairs(self, components: List[UIComponent], hierarchy: ComponentTree) -> List[Tuple[int, int]]:
+        """Ordered pairs of parent/child components plus nearby siblings"""
+        row_by_id = {comp.id: row for row, comp in enumerate(components)}
+        groups: Dict[Optional[str], List[int]] = {}
+        for row, comp in enumerate(components):
+            groups.setdefault(hierarchy.parent(comp.id), []).append(row)
+
+        selected: Set[Tuple[int, int]] = set()
+        for parent_id, rows in groups.items():
+            parent = row_by_id.get(parent_id)
+            if parent is not None:
+                selected.update((min(parent, row), max(parent, row)) for row in rows)
+            if len(rows) > 1:
+                # Neighbor selection within the sibling group, mapped back to rows
+                for i, j in self._select_neighbors([components[row] for row in rows]):
+                    selected.add((min(rows[i], rows[j]), max(rows[i], rows[j])))
+        return self._both_directions(selected)
+
+    @staticmethod
+    def _both_directions(selected: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        pairs = []
+        for i, j in sorted(selected):
+            pairs.append((i, j))
+            pairs.append((j, i))
+        return pairs
+
+    @staticmethod
+    def _direction(dx: float, dy: float) -> RelationType:
+        """Direction of an offset (other minus self) as seen from self"""
+        return direction_of(dx, dy)
+
+    def _analyze_relationship(self, comp1: UIComponent, comp2: UIComponent) -> List[SpatialRelationship]:
+        """Analyze relationships between two components"""
         bbox1, bbox2 = comp1.bounding_box, comp2.bounding_box
-        
+
         # Calculate centers
         center1 = bbox1.center
         center2 = bbox2.center
-        
+
         # Calculate distance
         distance = math.sqrt((center1[0] - center2[0])**2 + (center1[1] - center2[1])**2)
-        
-        # Determine primary relationship
-        relation_type = self._determine_relation_type(bbox1, bbox2)
-        
-        if relation_type:
-            description = self._generate_description(comp1, comp2, relation_type)
-            
-            return SpatialRelationship(
+
+        relationships = []
+        for relation_type, confidence in self._determine_relation_types(bbox1, bbox2):
+            relationships.append(SpatialRelationship(
                 component1_id=comp1.id,
                 component2_id=comp2.id,
                 relation_type=relation_type,
                 distance=distance,
-                confidence=0.8,
-                description=description
-            )
-        
-        return None
-    
+                confidence=confidence,
+                description=self._generate_description(comp1, comp2, relation_type)
+            ))
+
+        return relationships
+
+    def _determine_relation_types(self, bbox1: BoundingBox, bbox2: BoundingBox) -> List[Tuple[RelationType, float]]:
+        """Relations of bbox1 with respect to bbox2, with their confidences"""
+        x_overlap = min(bbox1.x + bbox1.width, bbox2.x + bbox2.width) - max(bbox1.x, bbox2.x)
+        y_overlap = min(bbox1.y + bbox1.height, bbox2.y + bbox2.height) - max(bbox1.y, bbox2.y)
+
+        # Containment and overlap make a direction meaningless
+        if x_overlap > 0 and y_overlap > 0:
+            if self._contains(bbox2, bbox1) and not self._contains(bbox1, bbox2):
+                return [(RelationType.INSIDE, 0.9)]
+            if self._contains(bbox1, bbox2) and not self._contains(bbox2, bbox1):
+                return [(RelationType.CONTAINS, 0.9)]
+            return [(RelationType.OVERLAPS, 0.7)]
+
+        relations = [(self._determine_relation_type(bbox1, bbox2), 0.8)]
+
+        # Gap between the closest edges (at least one overlap is <= 0 here)
+        gap = max(-x_overlap, -y_overlap)
+        if gap <= self.threshold_adjacent:
+            relations.append((RelationType.ADJACENT, 0.8))
+
+        if (abs(bbox1.y - bbox2.y) <= self.threshold_alignment or
+                abs(bbox1.center[1] - bbox2.center[1]) <= self.threshold_alignment):
+            relations.append((RelationType.ALIGNED_HORIZONTAL, 0.7))
+        if (abs(bbox1.x - bbox2.x) <= self.threshold_alignment or
+                abs(bbox1.center[0] - bbox2.center[0]) <= self.threshold_alignment):
+            relations.append((RelationType.ALIGNED_VERTICAL, 0.7))
+
+        return relations
+
+    @staticmethod
+    def _contains(outer: BoundingBox, inner: BoundingBox) -> bool:
+        return (outer.x <= inner.x and outer.y <= inner.y and
+                inner.x + inner.width <= outer.x + outer.width and
+                inner.y + inner.height <= outer.y + outer.height)
+
     def _determine_relation_type(self, bbox1, bbox2) -> RelationType:
-        """Determine the primary spatial relationship"""
-        # Check directional relationships
+        """Determine the primary direction of bbox1 relative to bbox2"""
         center1 = bbox1.center
         center2 = bbox2.center
-        
-        dx = center2[0] - center1[0]
-        dy = center2[1] - center1[1]
-        
-        # Determine primary direction
-        if abs(dx) > abs(dy):
-            return RelationType.RIGHT_OF if dx > 0 else RelationType.LEFT_OF
-        else:
-            return RelationType.BELOW if dy > 0 else RelationType.ABOVE
-    
+
+        return self._direction(center1[0] - center2[0], center1[1] - center2[1])
+
     def _generate_description(self, comp1: UIComponent, comp2: UIComponent, relation_type: RelationType) -> str:
         """Generate human-readable description of the relationship"""
-        comp1_desc = self._get_component_description(comp1)
-        comp2_desc = self._get_component_description(comp2)
-        
-        relation_phrases = {
-            RelationType.ABOVE: f"{comp1_desc} is above {comp2_desc}",
-            RelationType.BELOW: f"{comp1_desc} is below {comp2_desc}",
-            RelationType.LEFT_OF: f"{comp1_desc} is to the left of {comp2_desc}",
-            RelationType.RIGHT_OF: f"{comp1_desc} is to the right of {comp2_desc}",
-        }
-        
-        return relation_phrases.get(relation_type, f"{comp1_desc} relates to {comp2_desc}")
-    
+        return describe_relationship(
+            relation_type, self._get_component_description(comp1), self._get_component_description(comp2)
+        )
+
     def _get_component_description(self, component: UIComponent) -> str:
         """Generate a description for a component"""
-        desc = component.component_type.value
-        
-        if component.text_content:
-            desc += f" with text '{component.text_content}'"
-        
-        return desc
+        return describe_component(component.component_type, component.text_content)
@@ -35,10 +35,29 @@ if src_dir not in sys.path:
 
 from models.ui_component import UIComponent
 from models.spatial_relationship import SpatialRelationship, UILayout
+from models.layout_graph import LayoutGraph
 from core.component_detector import ComponentDetector
 from core.relationship_mapper import RelationshipMapper
+from core.hierarchy_builder import HierarchyBuilder
 from utils.query_handler import QueryHandler
 
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from utils.layout_io import (
+    layout_from_structured_output, component_record, relationship_record, summary_record, hierarchy_record
+)
+from utils.result_cache import ResultCache, DEFAULT_CACHE_MAX_BYTES
+from utils.image_processor import ImageSource
+from utils.profiler import profiling, stage
+from utils.log import get_logger
+from utils.frame_diff import Rect, changed_regions, merge_rects, rects_intersect, union_rect
+
+logger = get_logger(__name__)
+
 class NumpyEncoder(json.JSONEncoder):
     """Custom JSON encoder for numpy types"""
     def default(self, obj: Any) -> Any:
@@ -50,57 +69,527 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NumpyEncoder, self).default(obj)
 
+@dataclass
+class BatchResult:
+    """Outcome of analyzing one image as part of a batch run"""
+    image_path: str
+    layout: UILayout
+    elapsed: float
+    worker_pid: int
+    cache_hit: bool = False
+
+
+# Analyzer owned by the current batch worker process; built once per worker
+# so the OCR model weights are only loaded a single time.
+_worker_analyzer: Optional['ScreenAnalyzer'] = None
+
+
+def _init_batch_worker(options: Dict[str, Any]) -> None:
+    """Process pool initializer: build the worker's analyzer (and OCR reader)"""
+    global _worker_analyzer
+    _worker_analyzer = ScreenAnalyzer(**options)
+
+
+def _analyze_in_worker(image_path: str) -> BatchResult:
+    """Analyze a single image with the worker's long-lived analyzer"""
+    return _worker_analyzer._timed_analysis(image_path)
+
+
+def _analyze_source_in_worker(source: ImageSource) -> UILayout:
+    """Analyze an already read image (bytes or array) in an async worker process"""
+    return _worker_analyzer.analyze_image(source)
+
+
+def _read_file(path) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
 class ScreenAnalyzer:
-    def __init__(self):
-        self.component_detector = ComponentDetector()
-        self.relationship_mapper = RelationshipMapper()
+    def __init__(self, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 detector_options: Optional[Dict[str, Any]] = None,
+                 mapper_options: Optional[Dict[str, Any]] = None,
+                 profile: bool = False, profile_memory: bool = False,
+                 async_executor: str = 'thread', async_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        """
+        profile: record per-stage wall/CPU time and item counts into
+                 UILayout.timings (off by default; near-free when off).
+        profile_memory: also trace per-stage peak memory with tracemalloc,
+                        which slows analysis noticeably.
+        async_executor: where the *_async methods run analyses: 'thread'
+                        (shares this analyzer and its OCR model) or
+                        'process' (one analyzer per worker process, like
+                        analyze_batch).
+        async_workers: executor size (default: min(4, CPU count)).
+        max_pending: analyses the *_async methods let run or queue at once
+                     (default: async_workers); further calls wait.
+        """
+        if async_executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown async executor: {async_executor}")
+
+        self.component_detector = ComponentDetector(**(detector_options or {}))
+        self.hierarchy_builder = HierarchyBuilder()
+        self.relationship_mapper = RelationshipMapper(**(mapper_options or {}))
         self.query_handler = QueryHandler()
         
+        # Optional persistent result cache, disabled unless a directory is given
+        self.result_cache = ResultCache(cache_dir, cache_max_bytes) if cache_dir else None
+        
+        # Constructor arguments, replayed in batch worker processes
+        self._options: Dict[str, Any] = {
+            'cache_dir': cache_dir,
+            'cache_max_bytes': cache_max_bytes,
+            'detector_options': detector_options,
+            'mapper_options': mapper_options,
+            'profile': profile,
+            'profile_memory': profile_memory,
+            'async_executor': async_executor,
+            'async_workers': async_workers,
+            'max_pending': max_pending
+        }
+        self.profile = profile or profile_memory
+        self.profile_memory = profile_memory
+        
+        # Built on first use by the *_async methods
+        self.async_executor = async_executor
+        self.async_workers = max(1, async_workers or min(4, os.cpu_count() or 1))
+        self.max_pending = max(1, max_pending or self.async_workers)
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._semaphores: Dict[asyncio.AbstractEventLoop, asyncio.BoundedSemaphore] = {}
+    
+    def get_config(self) -> Dict[str, Any]:
+        """All parameters that influence the analysis result"""
+        return {
+            'component_detector': self.component_detector.get_config(),
+            'relationship_mapper': self.relationship_mapper.get_config()
+        }
+        
     def analyze_screen(self, image_path: str) -> UILayout:
         """Main method to analyze a screen and return structured output"""
+        return self.analyze_image(image_path)
+    
+    def analyze_image(self, source: ImageSource) -> UILayout:
+        """Analyze a screen given as a BGR ndarray, encoded PNG/JPEG bytes or a path.
+        
+        The image is decoded once and the same buffer (and one grayscale
+        conversion) is shared by OCR, shape detection and color extraction.
+        """
+        return self._profiled(self._analyze_image, source)
+    
+    def _profiled(self, analyze, *args) -> UILayout:
+        """Run an analysis entry point, attaching stage timings when profiling is on"""
+        if not self.profile:
+            return analyze(*args)
+        with profiling(trace_memory=self.profile_memory) as profile:
+            with stage('total'):
+                layout = analyze(*args)
+        layout.timings = profile.to_dict()
+        return layout
+    
+    def _analyze_image(self, source: ImageSource) -> UILayout:
         try:
+            # Step 0: Decode once, serving repeat images from the result cache
+            image, cache_key, cached = self._prepare_image(source)
+            if cached is not None:
+                return cached
+            
             # Step 1: Detect UI components
-            print("Detecting UI components...")
-            components = self.component_detector.detect_components(image_path)
+            logger.info("Detecting UI components...")
+            metadata: Dict[str, Any] = {}
+            with stage('grayscale'):
+                gray = self.component_detector.image_processor.to_grayscale(image)
+            components = self.component_detector.detect_components_in_image(
+                image, gray, metadata=metadata
+            )
             
-            # Step 2: Map relationships
-            print("Mapping relationships...")
-            relationships = self.relationship_mapper.map_relationships(components)
+            return self._build_layout(image, components, cache_key, metadata)
             
-            # Step 3: Detect ambiguities
-            ambiguities = self._detect_ambiguities(components, relationships)
+        except Exception as e:
+            # Return confused state
+            return self._confused_layout(f"Error analyzing screen: {str(e)}")
+    
+    def analyze_images(self, sources: List[ImageSource]) -> List[UILayout]:
+        """Analyze several screens together, batching OCR text detection.
+        
+        Layouts come back in input order; a failure only affects its own image.
+        """
+        layouts: List[Optional[UILayout]] = [None] * len(sources)
+        pending = []
+        image_processor = self.component_detector.image_processor
+        
+        for index, source in enumerate(sources):
+            try:
+                image, cache_key, cached = self._prepare_image(source)
+                if cached is not None:
+                    layouts[index] = cached
+                else:
+                    pending.append((index, image, image_processor.to_grayscale(image), cache_key))
+            except Exception as e:
+                layouts[index] = self._confused_layout(f"Error analyzing screen: {str(e)}")
+        
+        if pending:
+            logger.info("Detecting UI components in %d screens...", len(pending))
+            # Images large enough to be tiled run OCR per tile instead, and
+            # skipping covered text needs each image's shapes before OCR
+            batchable = [] if image_processor.ocr_params['skip_covered_by'] else [
+                entry for entry in pending if not self.component_detector.should_tile(entry[1])
+            ]
+            batch_stats: List[Dict[str, int]] = [{} for _ in batchable]
+            text_batches = image_processor.extract_text_regions_batch(
+                [image for _, image, _, _ in batchable], [gray for _, _, gray, _ in batchable], batch_stats
+            )
+            batched_text = {entry[0]: regions for entry, regions in zip(batchable, text_batches)}
+            batched_stats = {entry[0]: stats for entry, stats in zip(batchable, batch_stats)}
             
-            # Step 4: Calculate overall confidence
-            confidence_score = self._calculate_confidence(components, relationships)
+            for index, image, gray, cache_key in pending:
+                try:
+                    metadata: Dict[str, Any] = {}
+                    if batched_stats.get(index):
+                        metadata['ocr'] = image_processor.ocr_report(batched_stats[index], image.shape)
+                    components = self.component_detector.detect_components_in_image(
+                        image, gray, text_regions=batched_text.get(index), metadata=metadata
+                    )
+                    layouts[index] = self._build_layout(image, components, cache_key, metadata)
+                except Exception as e:
+                    layouts[index] = self._confused_layout(f"Error analyzing screen: {str(e)}")
+        
+        return layouts
+    
+    def analyze_incremental(self, prev_layout: UILayout, prev_image: ImageSource,
+                            new_image: ImageSource, max_dirty_fraction: float = 0.6) -> UILayout:
+        """Re-analyze a frame by only reprocessing the pixels that changed.
+        
+        prev_layout must be the analysis of prev_image. Regions that differ
+        between the two frames are grown to cover any previous component
+        they touch, OCR and shape detection run only inside them, and
+        components outside keep their IDs. Relationships between two kept
+        components are reused. Falls back to a full analysis when the frames
+        differ in size, the previous layout is empty, or more than
+        max_dirty_fraction of the frame changed.
+        
+        metadata['reprocessed_fraction'] reports the share of the frame
+        that was re-detected (1.0 for a full analysis). A frame found in the
+        result cache is not re-detected at all: it is reported as
+        incremental False, reprocessed_fraction 0.0 and cache_hit True.
+        """
+        return self._profiled(self._analyze_incremental, prev_layout, prev_image, new_image, max_dirty_fraction)
+    
+    def _analyze_incremental(self, prev_layout: UILayout, prev_image: ImageSource,
+                             new_image: ImageSource, max_dirty_fraction: float) -> UILayout:
+        try:
+            image_processor = self.component_detector.image_processor
+            prev = image_processor.load_image(prev_image)
+            image, cache_key, cached = self._prepare_image(new_image)
+            if cached is not None:
+                # Whatever run stored the entry, nothing was reprocessed for this frame
+                cached.metadata = dict(cached.metadata, incremental=False, reprocessed_fraction=0.0,
+                                       cache_hit=True)
+                return cached
             
-            # Step 5: Get screen dimensions
-            import cv2
-            image = cv2.imread(image_path)
-            if image is not None:
-                screen_dimensions = (image.shape[1], image.shape[0])  # width, height
-            else:
-                screen_dimensions = (0, 0)
+            frame_area = image.shape[0] * image.shape[1]
+            if prev.shape != image.shape or not prev_layout.components:
+                return self._full_incremental_fallback(image)
+            
+            gray = image_processor.to_grayscale(image)
+            with stage('frame_diff'):
+                dirty = changed_regions(image_processor.to_grayscale(prev), gray)
+                dirty, touched = self._expand_dirty_regions(dirty, prev_layout, image.shape)
             
-            # Create component dictionary
-            component_dict = {comp.id: comp for comp in components}
+            dirty_area = sum(w * h for _, _, w, h in dirty)
+            if dirty_area > max_dirty_fraction * frame_area:
+                return self._full_incremental_fallback(image)
             
-            return UILayout(
-                components=component_dict,
-                relationships=relationships,
-                screen_dimensions=screen_dimensions,
-                ambiguities=ambiguities,
-                confidence_score=confidence_score
+            kept = [comp for comp_id, comp in prev_layout.components.items() if comp_id not in touched]
+            ocr_stats: Dict[str, int] = {}
+            if not dirty:
+                logger.info("No changes detected, reusing previous layout")
+                new_components = []
+            else:
+                logger.info("Re-detecting %d changed region(s)...", len(dirty))
+                text_regions, ui_elements = [], []
+                for window in dirty:
+                    window_text, window_elements = self.component_detector.detect_in_window(
+                        image, gray, window, ocr_stats=ocr_stats
+                    )
+                    text_regions.extend(window_text)
+                    ui_elements.extend(window_elements)
+                new_components = self.component_detector.create_components(
+                    image, text_regions, ui_elements, reserved_ids=[comp.id for comp in kept]
+                )
+            
+            metadata: Dict[str, Any] = {
+                'incremental': True,
+                'reprocessed_fraction': dirty_area / frame_area if frame_area else 0.0,
+                'dirty_regions': [list(rect) for rect in dirty],
+                'reused_components': len(kept)
+            }
+            if ocr_stats:
+                metadata['ocr'] = image_processor.ocr_report(ocr_stats, image.shape)
+            return self._build_layout(
+                image, kept + new_components, cache_key, metadata,
+                previous_relationships=prev_layout.relationships,
+                stable_ids={comp.id for comp in kept}
             )
             
         except Exception as e:
-            # Return confused state
-            return UILayout(
-                components={},
-                relationships=[],
-                screen_dimensions=(0, 0),
-                ambiguities=[f"Error analyzing screen: {str(e)}"],
-                confidence_score=0.0
-            )
+            return self._confused_layout(f"Error analyzing screen: {str(e)}")
+    
+    def _full_incremental_fallback(self, image) -> UILayout:
+        """Full analysis of an already decoded frame, tagged for analyze_incremental callers"""
+        layout = self._analyze_image(image)
+        layout.metadata.update({'incremental': False, 'reprocessed_fraction': 1.0})
+        return layout
+    
+    @staticmethod
+    def _expand_dirty_regions(dirty: List[Rect], prev_layout: UILayout, shape):
+        """Grow dirty rectangles until no previous component straddles their edge.
+        
+        Returns the disjoint, image-clipped rectangles and the IDs of the
+        previous components they cover (which must be re-detected).
+        """
+        height, width = shape[:2]
+        boxes = {
+            comp_id: (comp.bounding_box.x, comp.bounding_box.y,
+                      comp.bounding_box.width, comp.bounding_box.height)
+            for comp_id, comp in prev_layout.components.items()
+        }
+        touched = set()
+        
+        while True:
+            grown = []
+            for rect in dirty:
+                for comp_id, box in boxes.items():
+                    if rects_intersect(rect, box):
+                        touched.add(comp_id)
+                        rect = union_rect(rect, box)
+                grown.append(rect)
+            grown = merge_rects(grown)
+            if grown == dirty:
+                break
+            dirty = grown
+        
+        clipped = []
+        for x, y, w, h in dirty:
+            x1, y1 = max(0, x), max(0, y)
+            x2, y2 = min(width, x + w), min(height, y + h)
+            if x2 > x1 and y2 > y1:
+                clipped.append((x1, y1, x2 - x1, y2 - y1))
+        return clipped, touched
+    
+    def _prepare_image(self, source: ImageSource):
+        """Decode a source and look it up in the result cache.
+        
+        Returns (image, cache_key, cached_layout); cached_layout is None on a miss.
+        """
+        with stage('decode'):
+            image = self.component_detector.image_processor.load_image(source)
+        
+        cache_key = None
+        if self.result_cache is not None:
+            with stage('cache_lookup'):
+                cache_key = self.result_cache.make_key(image, self.get_config())
+                cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return image, cache_key, layout_from_structured_output(cached)
+        
+        return image, cache_key, None
+    
+    def _build_layout(self, image, components: List[UIComponent],
+                      cache_key: Optional[str],
+                      metadata: Optional[Dict[str, Any]] = None,
+                      previous_relationships: Optional[List[SpatialRelationship]] = None,
+                      stable_ids: Optional[set] = None) -> UILayout:
+        """Hierarchy, relationship mapping and scoring shared by every analysis entry point"""
+        # Step 2: Containment tree, then relationships
+        hierarchy = self.hierarchy_builder.build(components)
+        logger.info("Mapping relationships...")
+        relationships = self.relationship_mapper.map_relationships(
+            components, previous_relationships, stable_ids, hierarchy
+        )
+        
+        with stage('score', items=len(components)):
+            # Step 3: Detect ambiguities
+            ambiguities = self._detect_ambiguities(components, relationships)
+            
+            # Step 4: Calculate overall confidence
+            confidence_score = self._calculate_confidence(components, relationships)
+        
+        # Step 5: Get screen dimensions from the decoded buffer
+        screen_dimensions = (image.shape[1], image.shape[0])  # width, height
+        
+        # Create component dictionary
+        component_dict = {comp.id: comp for comp in components}
+        
+        layout = UILayout(
+            components=component_dict,
+            relationships=relationships,
+            screen_dimensions=screen_dimensions,
+            ambiguities=ambiguities,
+            confidence_score=confidence_score,
+            metadata=metadata or {},
+            hierarchy=hierarchy
+        )
+        with stage('build_graph', items=len(relationships)):
+            layout.graph = LayoutGraph(component_dict, relationships, hierarchy)
+        
+        if cache_key is not None:
+            with stage('cache_store'):
+                self.result_cache.put(cache_key, self.export_structured_output(layout))
+        
+        return layout
+    
+    @staticmethod
+    def _confused_layout(reason: str) -> UILayout:
+        """Build the empty, zero-confidence layout used to signal a failed analysis"""
+        return UILayout(
+            components={},
+            relationships=[],
+            screen_dimensions=(0, 0),
+            ambiguities=[reason],
+            confidence_score=0.0
+        )
+    
+    def analyze_batch(self, image_paths: Iterable[str],
+                      workers: Optional[int] = None) -> Iterator[BatchResult]:
+        """Analyze many screens, yielding a BatchResult as each image finishes.
+        
+        With more than one worker the images are fanned out to a process pool
+        where every worker builds its own analyzer once and reuses it, so the
+        OCR model is loaded once per worker instead of once per image.
+        Results arrive in completion order, not input order.
+        """
+        image_paths = [str(path) for path in image_paths]
+        if not image_paths:
+            return
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(image_paths)))
+        
+        if workers == 1:
+            # Reuse this analyzer in-process, no point paying for a pool
+            for image_path in image_paths:
+                yield self._timed_analysis(image_path)
+            return
+        
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(self._options,)
+        )
+        try:
+            futures = {executor.submit(_analyze_in_worker, path): path for path in image_paths}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # A crashed worker should not take the whole batch down
+                    yield BatchResult(
+                        image_path=futures[future],
+                        layout=self._confused_layout(f"Error analyzing screen: {str(e)}"),
+                        elapsed=0.0,
+                        worker_pid=-1
+                    )
+        finally:
+            # Stop queued work if the caller abandons the generator early
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _timed_analysis(self, image_path: str) -> BatchResult:
+        """Analyze one image and wrap the layout with timing and cache info"""
+        hits_before = self.result_cache.hits if self.result_cache is not None else 0
+        start = time.perf_counter()
+        layout = self.analyze_screen(image_path)
+        return BatchResult(
+            image_path=image_path,
+            layout=layout,
+            elapsed=time.perf_counter() - start,
+            worker_pid=os.getpid(),
+            cache_hit=self.result_cache is not None and self.result_cache.hits > hits_before
+        )
+    
+    async def analyze_screen_async(self, image_path: str, timeout: Optional[float] = None) -> UILayout:
+        """Async analyze_screen: the file is read and analyzed off the event loop.
+        
+        Raises asyncio.TimeoutError after `timeout` seconds. Cancelling the
+        call (or a timeout) drops the analysis if it has not started yet;
+        one already running finishes in the background and is discarded.
+        """
+        return await self.analyze_image_async(image_path, timeout)
+    
+    async def analyze_image_async(self, source: ImageSource, timeout: Optional[float] = None) -> UILayout:
+        """Async analyze_image for any ImageSource; see analyze_screen_async"""
+        return await asyncio.wait_for(self._submit_async(source), timeout)
+    
+    async def analyze_many_async(self, sources: Iterable[ImageSource],
+                                 timeout: Optional[float] = None) -> List[UILayout]:
+        """Analyze many screens concurrently, at most max_pending at a time.
+        
+        Layouts come back in input order. As with analyze_images, a failure
+        (including a per-image `timeout`) only turns its own image into a
+        confused layout; cancelling the call cancels every pending analysis.
+        """
+        async def analyze_one(source: ImageSource) -> UILayout:
+            try:
+                return await self.analyze_image_async(source, timeout)
+            except asyncio.TimeoutError:
+                return self._confused_layout(f"Analysis timed out after {timeout}s")
+            except Exception as e:
+                return self._confused_layout(f"Error analyzing screen: {str(e)}")
+        
+        return list(await asyncio.gather(*(analyze_one(source) for source in sources)))
+    
+    async def _submit_async(self, source: ImageSource) -> UILayout:
+        """Hold a pending slot from submission until the executor has finished the work"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # asyncio primitives belong to one loop; forget those of finished loops
+            self._semaphores = {other: kept for other, kept in self._semaphores.items() if not other.is_closed()}
+            semaphore = self._semaphores[loop] = asyncio.BoundedSemaphore(self.max_pending)
+        
+        await semaphore.acquire()
+        try:
+            if isinstance(source, (str, os.PathLike)):
+                source = await asyncio.to_thread(_read_file, source)
+            function = _analyze_source_in_worker if self.async_executor == 'process' else self.analyze_image
+            future = self._get_executor().submit(function, source)
+        except BaseException:
+            semaphore.release()
+            raise
+        
+        def release(_) -> None:
+            # A cancelled analysis that was already running keeps its slot until it ends
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(semaphore.release)
+        
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+    
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.async_executor == 'process':
+                    options = dict(self._options, async_executor='thread')
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.async_workers,
+                        initializer=_init_batch_worker,
+                        initargs=(options,)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.async_workers, thread_name_prefix='screen-analyzer'
+                    )
+            return self._executor
+    
+    def close(self) -> None:
+        """Shut down the executor used by the *_async methods, if one was started"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
     
     def query_layout(self, layout: UILayout, query: str) -> str:
         """Handle natural language queries about the layout"""
@@ -131,63 +620,20 @@ class ScreenAnalyzer:
         
         return round(component_confidence, 2)
     
-    @staticmethod
-    def _convert_numpy_types(obj: Any) -> Any:
-        """Convert numpy types to native Python types for JSON serialization"""
-        if isinstance(obj, (np.integer, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, (list, tuple)):
-            return [ScreenAnalyzer._convert_numpy_types(item) for item in obj]
-        elif isinstance(obj, dict):
-            return {key: ScreenAnalyzer._convert_numpy_types(value) for key, value in obj.items()}
-        else:
-            return obj
-    
     def export_structured_output(self, layout: UILayout) -> Dict[str, Any]:
-        """Export the layout analysis as structured JSON with proper type conversion"""
+        """Export the layout analysis as structured JSON with proper type conversion
         
+        NumPy values are converted per record; see utils.layout_io for the
+        streaming JSON/NDJSON writers that avoid building this dict at all.
+        """
         output = {
             "screen_analysis": {
-                "dimensions": {
-                    "width": int(layout.screen_dimensions[0]),
-                    "height": int(layout.screen_dimensions[1])
-                },
-                "confidence_score": float(layout.confidence_score),
-                "components": [
-                    {
-                        "id": comp.id,
-                        "type": comp.component_type.value,
-                        "position": {
-                            "x": int(comp.bounding_box.x),
-                            "y": int(comp.bounding_box.y),
-                            "width": int(comp.bounding_box.width),
-                            "height": int(comp.bounding_box.height),
-                            "center": [int(comp.bounding_box.center[0]), int(comp.bounding_box.center[1])]
-                        },
-                        "text_content": comp.text_content,
-                        "color_info": comp.color_info,
-                        "confidence": float(comp.confidence),
-                        "attributes": self._convert_numpy_types(comp.attributes) if comp.attributes else {}
-                    }
-                    for comp in layout.components.values()
-                ],
-                "relationships": [
-                    {
-                        "from_component": rel.component1_id,
-                        "to_component": rel.component2_id,
-                        "relationship": rel.relation_type.value,
-                        "distance": float(rel.distance),
-                        "confidence": float(rel.confidence),
-                        "description": rel.description
-                    }
-                    for rel in layout.relationships
-                ],
-                "ambiguities": layout.ambiguities
+                **summary_record(layout),
+                "components": [component_record(comp) for comp in layout.components.values()],
+                "relationships": [relationship_record(rel) for rel in layout.relationships]
             }
         }
+        if layout.hierarchy is not None:
+            output["screen_analysis"]["hierarchy"] = hierarchy_record(layout)
         
-        return self._convert_numpy_types(output)
+        return output
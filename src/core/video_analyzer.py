@@ -0,0 +1,281 @@
+import queue
+import threading
+import time
+from typing import List, Dict, Optional, Any, Iterable, Iterator
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import UIComponent, describe_component
+from models.spatial_relationship import UILayout
+from models.timeline import ChangeKind, ChangeEvent, LayoutSnapshot, LayoutTimeline
+from core.screen_analyzer import ScreenAnalyzer
+from utils.video_frames import VideoFrame, FrameDeduplicator, iter_video_frames, video_info
+from utils.layout_io import component_record, relationship_record, summary_record, hierarchy_record
+from utils.box_ops import boxes_to_array, pairwise_iou
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+
+class _StageError:
+    """Carries an exception from a pipeline thread to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(out: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(source: queue.Queue, stop: threading.Event) -> Iterator[Any]:
+    """Items of a stage queue until its end marker, re-raising stage errors"""
+    while not stop.is_set():
+        try:
+            item = source.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, _StageError):
+            raise item.error
+        yield item
+
+
+def _run_stage(items: Iterable[Any], out: queue.Queue, stop: threading.Event) -> None:
+    """Thread body: push every item downstream, then the end marker (or the error)"""
+    try:
+        for item in items:
+            if not _put(out, item, stop):
+                return
+        _put(out, _DONE, stop)
+    except BaseException as e:
+        _put(out, _StageError(e), stop)
+    finally:
+        # Release the capture (or the upstream queue) even when stopped early
+        close = getattr(items, 'close', None)
+        if close is not None:
+            close()
+
+
+def layout_changes(previous: UILayout, layout: UILayout, frame_index: int = 0,
+                   timestamp: float = 0.0, match_iou: float = 0.5,
+                   move_tolerance: int = 2) -> List[ChangeEvent]:
+    """Component-level changes from one layout to the next.
+
+    Components are paired by ID first (incremental analysis keeps the IDs
+    of untouched components), then greedily by IoU >= match_iou among
+    components of the same type. Paired components whose box moved by
+    more than move_tolerance pixels are MOVED, those whose text differs
+    are TEXT_CHANGED; unpaired ones are ADDED or REMOVED.
+    """
+    old = dict(previous.components)
+    new = dict(layout.components)
+    pairs = [(comp_id, comp_id) for comp_id in new if comp_id in old]
+    old_left = [comp for comp_id, comp in old.items() if comp_id not in new]
+    new_left = [comp for comp_id, comp in new.items() if comp_id not in old]
+
+    if old_left and new_left:
+        overlaps = pairwise_iou(
+            boxes_to_array([_box(comp) for comp in old_left]), boxes_to_array([_box(comp) for comp in new_left])
+        )
+        used_old, used_new = set(), set()
+        for flat in overlaps.ravel().argsort(kind='stable')[::-1]:
+            i, j = divmod(int(flat), len(new_left))
+            if overlaps[i, j] < match_iou:
+                break
+            if i in used_old or j in used_new or old_left[i].component_type != new_left[j].component_type:
+                continue
+            used_old.add(i)
+            used_new.add(j)
+            pairs.append((old_left[i].id, new_left[j].id))
+        old_left = [comp for i, comp in enumerate(old_left) if i not in used_old]
+        new_left = [comp for j, comp in enumerate(new_left) if j not in used_new]
+
+    def event(kind: ChangeKind, comp: UIComponent, previous_id: Optional[str], description: str) -> ChangeEvent:
+        return ChangeEvent(frame_index, timestamp, kind, comp.id, previous_id, description)
+
+    events = []
+    for old_id, new_id in pairs:
+        before, after = old[old_id], new[new_id]
+        name = describe_component(after.component_type, after.text_content)
+        a, b = before.bounding_box, after.bounding_box
+        if max(abs(a.x - b.x), abs(a.y - b.y), abs(a.width - b.width), abs(a.height - b.height)) > move_tolerance:
+            events.append(event(ChangeKind.MOVED, after, old_id,
+                                f"{name} moved from ({a.x}, {a.y}, {a.width}x{a.height}) "
+                                f"to ({b.x}, {b.y}, {b.width}x{b.height})"))
+        if (before.text_content or '') != (after.text_content or ''):
+            events.append(event(ChangeKind.TEXT_CHANGED, after, old_id,
+                                f"{after.component_type.value} text changed from "
+                                f"'{before.text_content or ''}' to '{after.text_content or ''}'"))
+    for comp in new_left:
+        events.append(event(ChangeKind.ADDED, comp, None,
+                            f"{describe_component(comp.component_type, comp.text_content)} appeared"))
+    for comp in old_left:
+        events.append(event(ChangeKind.REMOVED, comp, comp.id,
+                            f"{describe_component(comp.component_type, comp.text_content)} disappeared"))
+    return events
+
+
+def _box(comp: UIComponent):
+    bbox = comp.bounding_box
+    return (bbox.x, bbox.y, bbox.width, bbox.height)
+
+
+class VideoAnalyzer:
+    """Analyzes screen recordings into a timeline of layouts.
+
+    Three pipelined stages: a decode thread reads frames with
+    cv2.VideoCapture, a dedup thread drops near-duplicates of the last
+    distinct frame, and the calling thread analyzes the distinct frames.
+    Stages are joined by bounded queues, so decoding runs ahead of OCR by
+    at most queue_size frames and memory stays flat however long the video.
+    With incremental=True each distinct frame is analyzed with
+    analyze_incremental against the previous one, so only the changed
+    regions are re-detected and untouched components keep their IDs.
+    """
+
+    def __init__(self, analyzer: Optional[ScreenAnalyzer] = None, sample_every: int = 1,
+                 min_changed_fraction: float = 0.0005, incremental: bool = True,
+                 queue_size: int = 4, match_iou: float = 0.5):
+        self.analyzer = analyzer or ScreenAnalyzer()
+        self.sample_every = max(1, sample_every)
+        self.min_changed_fraction = min_changed_fraction
+        self.incremental = incremental
+        self.queue_size = max(1, queue_size)
+        self.match_iou = match_iou
+
+    def iter_snapshots(self, path: str, start: float = 0.0, end: Optional[float] = None,
+                       stats: Optional[Dict[str, Any]] = None) -> Iterator[LayoutSnapshot]:
+        """Yield a LayoutSnapshot per distinct screen as soon as it is analyzed.
+
+        stats, if given, is filled with frame counts and timings when the
+        generator finishes.
+        """
+        stats = stats if stats is not None else {}
+        stop = threading.Event()
+        decoded: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        distinct: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        deduplicator = FrameDeduplicator(min_changed_fraction=self.min_changed_fraction)
+        counts = {'decoded': 0}
+
+        def decode() -> Iterator[VideoFrame]:
+            for frame in iter_video_frames(path, self.sample_every, start, end):
+                counts['decoded'] += 1
+                yield frame
+
+        def dedup() -> Iterator[tuple]:
+            for frame in _drain(decoded, stop):
+                is_new, fraction = deduplicator.is_new(frame.image)
+                if is_new:
+                    yield frame, fraction
+
+        threads = [
+            threading.Thread(target=_run_stage, args=(decode(), decoded, stop), name='video-decode', daemon=True),
+            threading.Thread(target=_run_stage, args=(dedup(), distinct, stop), name='video-dedup', daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        previous: Optional[LayoutSnapshot] = None
+        previous_image = None
+        analyzed = 0
+        waited = analyzing = 0.0
+        started = time.perf_counter()
+        try:
+            frames = _drain(distinct, stop)
+            while True:
+                wait_start = time.perf_counter()
+                item = next(frames, None)
+                waited += time.perf_counter() - wait_start
+                if item is None:
+                    break
+                frame, fraction = item
+
+                analysis_start = time.perf_counter()
+                if self.incremental and previous is not None and previous.layout.confidence_score > 0:
+                    layout = self.analyzer.analyze_incremental(previous.layout, previous_image, frame.image)
+                else:
+                    layout = self.analyzer.analyze_image(frame.image)
+                analyzing += time.perf_counter() - analysis_start
+                analyzed += 1
+
+                snapshot = LayoutSnapshot(frame.index, frame.timestamp, layout, fraction)
+                if previous is not None:
+                    snapshot.events = layout_changes(previous.layout, layout, frame.index, frame.timestamp,
+                                                     self.match_iou)
+                logger.info("Frame %d (%.2fs): %d components, %d changes",
+                            frame.index, frame.timestamp, len(layout.components), len(snapshot.events))
+                previous, previous_image = snapshot, frame.image
+                yield snapshot
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            stats.update({
+                'frames_decoded': counts['decoded'],
+                'frames_skipped': deduplicator.skipped,
+                'frames_analyzed': analyzed,
+                'wall_seconds': time.perf_counter() - started,
+                'analysis_seconds': analyzing,
+                # Time the analysis stage sat idle waiting for decode/dedup
+                'wait_seconds': waited
+            })
+
+    def analyze_video(self, path: str, start: float = 0.0, end: Optional[float] = None) -> LayoutTimeline:
+        """Analyze a whole recording into a LayoutTimeline"""
+        timeline = LayoutTimeline(source=path, fps=video_info(path)['fps'])
+        timeline.snapshots = list(self.iter_snapshots(path, start, end, timeline.stats))
+        return timeline
+
+
+def event_record(event: ChangeEvent) -> Dict[str, Any]:
+    return {
+        "frame_index": event.frame_index,
+        "timestamp": round(event.timestamp, 3),
+        "kind": event.kind.value,
+        "component_id": event.component_id,
+        "previous_id": event.previous_id,
+        "description": event.description
+    }
+
+
+def timeline_record(timeline: LayoutTimeline, include_layouts: bool = False) -> Dict[str, Any]:
+    """JSON-ready dict for a timeline; layouts use the export_structured_output schema"""
+    snapshots = []
+    for snapshot in timeline.snapshots:
+        record = {
+            "frame_index": snapshot.frame_index,
+            "timestamp": round(snapshot.timestamp, 3),
+            "changed_fraction": round(snapshot.changed_fraction, 5),
+            "components": len(snapshot.layout.components),
+            "events": [event_record(event) for event in snapshot.events]
+        }
+        if include_layouts:
+            record["screen_analysis"] = {
+                **summary_record(snapshot.layout),
+                "components": [component_record(comp) for comp in snapshot.layout.components.values()],
+                "relationships": [relationship_record(rel) for rel in snapshot.layout.relationships]
+            }
+            if snapshot.layout.hierarchy is not None:
+                record["screen_analysis"]["hierarchy"] = hierarchy_record(snapshot.layout)
+        snapshots.append(record)
+    return {
+        "video": {
+            "source": timeline.source,
+            "fps": timeline.fps,
+            "stats": timeline.stats,
+            "snapshots": snapshots
+        }
+    }
@@ -1,82 +1,483 @@
 import sys
 import json
 import os
+import glob
+import time
+import argparse
+import contextlib
 from pathlib import Path
+from typing import Callable, List, Optional
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from core.screen_analyzer import ScreenAnalyzer, NumpyEncoder
+# Only the lightweight modules are imported here; ScreenAnalyzer (OpenCV,
+# NumPy, OCR) is imported when an image actually has to be analyzed
+from utils.layout_io import write_layout_json, write_layout_ndjson
+from utils.binary_layout import write_binary_layout, load_layout
+from utils.profiler import TimingAggregator, format_timings, format_summary
+from utils.log import configure_logging
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tif', '.tiff'}
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        usage="python main.py <image_path> [query] | python main.py --batch <dir|glob> | "
+              "python main.py --load <analysis.json|.ndjson|.uilb> [query] | python main.py --video <recording> | "
+              "python main.py --diff <before> <after>"
+    )
+    parser.add_argument('image_path', nargs='?', help="Screenshot to analyze")
+    parser.add_argument('query', nargs='?', help="Question to ask about the screen")
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help="Analyze every image in a directory or matching a glob pattern")
+    parser.add_argument('--load', metavar='ANALYSIS',
+                        help="Answer queries from a saved _analysis.json/.ndjson/.uilb without loading any CV "
+                             "models; with --output, convert it to --format instead")
+    parser.add_argument('--video', metavar='RECORDING',
+                        help="Analyze each distinct screen of a video/screen recording into a timeline")
+    parser.add_argument('--sample-every', type=int, default=1,
+                        help="--video: decode only every Nth frame (default: 1)")
+    parser.add_argument('--min-change', type=float, default=0.0005,
+                        help="--video: share of a frame thumbnail that must change for it to count as a "
+                             "new screen (default: 0.0005)")
+    parser.add_argument('--no-incremental', action='store_true',
+                        help="--video: fully re-analyze every distinct frame instead of only changed regions")
+    parser.add_argument('--diff', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help="Compare two saved analyses, or two directories of them (matched by file name), "
+                             "and list added/removed/moved/resized/recolored components; exits with 1 on changes")
+    parser.add_argument('--move-tolerance', type=int, default=2,
+                        help="--diff: pixels a component may shift before it counts as moved (default: 2)")
+    parser.add_argument('--size-tolerance', type=int, default=2,
+                        help="--diff: pixels a component may grow or shrink before it counts as resized "
+                             "(default: 2)")
+    parser.add_argument('--color-tolerance', type=float, default=24.0,
+                        help="--diff: RGB distance between dominant colors before a component counts as "
+                             "recolored (default: 24)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --batch and directory --diff (default: CPU count)")
+    parser.add_argument('--output-dir', default='.',
+                        help="Where to write <stem>_analysis.json files (default: current directory)")
+    parser.add_argument('--output', metavar='PATH',
+                        help="Write the analysis of a single image to PATH, or '-' for stdout")
+    parser.add_argument('--format', choices=['json', 'ndjson', 'uilb'], default='json',
+                        help="json: one document; ndjson: one line per component/relationship; "
+                             "uilb: compact memory-mappable binary (default: json)")
+    parser.add_argument('--indent', type=int, default=None,
+                        help="Indent JSON output (default: 2 for a single image, compact for --batch)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Report per-stage wall/CPU time (aggregated with histograms for --batch)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="With --profile, also trace per-stage peak memory (slower)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Cache analysis results in this directory and reuse them for unchanged "
+                             "screenshots (default: no cache)")
+    parser.add_argument('--cache-max-mb', type=int, default=512,
+                        help="Size budget for the result cache in MB (default: 512)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-run the full analysis, ignoring --cache-dir")
+    parser.add_argument('--relationships', choices=['hierarchy', 'neighbors', 'exhaustive'], default='hierarchy',
+                        help="Relate only parent/child and nearby sibling components in the containment "
+                             "tree (default), nearest neighbors anywhere on the screen, or every pair")
+    parser.add_argument('--max-neighbors', type=int, default=3,
+                        help="Neighbors related per direction in hierarchy and neighbors modes (default: 3)")
+    parser.add_argument('--tile-size', type=int, default=None,
+                        help="Process images larger than this as overlapping tiles (e.g. 2048)")
+    parser.add_argument('--tile-overlap', type=int, default=200,
+                        help="Pixels shared by neighbouring tiles (default: 200)")
+    parser.add_argument('--color-mode', choices=['mean', 'palette'], default='mean',
+                        help="Mean color per component, or a k-means palette (default: mean)")
+    parser.add_argument('--tile-workers', type=int, default=4,
+                        help="Threads processing tiles in parallel (default: 4)")
+    parser.add_argument('--detection-scale', type=float, default=1.0,
+                        help="Propose shapes at this scale (e.g. 0.5) and refine at full resolution "
+                             "(default: 1.0, single-scale)")
+    parser.add_argument('--ocr-proposer', choices=['detector', 'morphology'], default='detector',
+                        help="Text region proposals: easyocr's detector or a cheap OpenCV pass (default: detector)")
+    parser.add_argument('--ocr-min-area', type=int, default=0,
+                        help="Skip recognizing text proposals smaller than this many pixels (default: 0)")
+    parser.add_argument('--ocr-batch-size', type=int, default=1,
+                        help="Text crops per recognition batch (default: 1)")
+    parser.add_argument('--ocr-skip-covered-by', nargs='+', choices=['rectangle', 'circle'], default=None,
+                        metavar='SHAPE', help="Don't recognize text inside these detected shapes")
+    parser.add_argument('--ocr-cache-size', type=int, default=0,
+                        help="Memoize recognitions of up to N distinct text crops, so labels that recur "
+                             "across screens are recognized once (default: 0, off)")
+    parser.add_argument('--ocr-cache', metavar='PATH', default=None,
+                        help="Persist the recognition cache to this JSON Lines file between runs "
+                             "(enables it with a default size of 50000 crops)")
+    parser.add_argument('--log-level', choices=['debug', 'info', 'warning', 'error'], default='warning',
+                        help="Diagnostics written to stderr; info shows progress (default: warning)")
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                        help="Plain text or one JSON object per line (default: text)")
+    parser.add_argument('--log-sample-rate', type=float, default=1.0,
+                        help="Share of per-component debug messages to keep, e.g. 0.01 (default: 1.0)")
+    return parser.parse_args(argv)
+
+
+def collect_image_paths(pattern: str) -> List[str]:
+    """Expand a directory or glob pattern into a sorted list of image files"""
+    if os.path.isdir(pattern):
+        candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        candidates = glob.glob(pattern, recursive=True)
+
+    return sorted(
+        path for path in candidates
+        if os.path.isfile(path) and Path(path).suffix.lower() in IMAGE_EXTENSIONS
+    )
+
+
+def create_analyzer(args: argparse.Namespace):
+    """Build an analyzer configured from the command line"""
+    from core.screen_analyzer import ScreenAnalyzer
+
+    mapper_options = {'mode': args.relationships, 'max_neighbors': args.max_neighbors}
+    detector_options = {
+        'tile_size': args.tile_size,
+        'tile_overlap': args.tile_overlap,
+        'tile_workers': args.tile_workers,
+        'color_mode': args.color_mode,
+        'detection_scale': args.detection_scale,
+        'ocr_proposer': args.ocr_proposer,
+        'ocr_min_area': args.ocr_min_area,
+        'ocr_batch_size': args.ocr_batch_size,
+        'ocr_skip_covered_by': args.ocr_skip_covered_by,
+        'ocr_cache_size': args.ocr_cache_size,
+        'ocr_cache_path': args.ocr_cache
+    }
+    profile_options = {'profile': args.profile, 'profile_memory': args.profile and args.profile_memory}
+    if args.no_cache or not args.cache_dir:
+        return ScreenAnalyzer(detector_options=detector_options, mapper_options=mapper_options,
+                              **profile_options)
+    return ScreenAnalyzer(cache_dir=args.cache_dir, cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                          detector_options=detector_options, mapper_options=mapper_options,
+                          **profile_options)
+
+
+def write_analysis(layout, stream, output_format: str, indent: Optional[int]) -> None:
+    """Stream a layout to an open stream in the requested format (binary for uilb)"""
+    if output_format == 'uilb':
+        # sys.stdout is a text stream; write the bytes to its buffer
+        write_binary_layout(layout, getattr(stream, 'buffer', stream))
+    elif output_format == 'ndjson':
+        write_layout_ndjson(layout, stream)
+    else:
+        write_layout_json(layout, stream, indent=indent)
+
+
+def open_output(path: str, output_format: str):
+    return open(path, 'wb' if output_format == 'uilb' else 'w')
+
+
+def save_analysis(layout, image_path: str, output_dir: str,
+                  output_format: str = 'json', indent: Optional[int] = None) -> str:
+    """Export a layout next to the other results and return the written path"""
+    output_path = os.path.join(output_dir, Path(image_path).stem + "_analysis." + output_format)
+    with open_output(output_path, output_format) as f:
+        write_analysis(layout, f, output_format, indent)
+
+    return output_path
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    image_paths = collect_image_paths(args.batch)
+    if not image_paths:
+        print(f"Error: No images found for '{args.batch}'")
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    analyzer = create_analyzer(args)
+
+    print(f"Analyzing {len(image_paths)} screens...")
+    batch_start = time.perf_counter()
+    failures = 0
+    cache_hits = 0
+    ocr_crops = ocr_cache_hits = 0
+    aggregator = TimingAggregator()
+
+    for done, result in enumerate(analyzer.analyze_batch(image_paths, workers=args.workers), start=1):
+        layout = result.layout
+        cache_hits += result.cache_hit
+        aggregator.add(layout.timings)
+        ocr = layout.metadata.get('ocr', {})
+        if not result.cache_hit and 'cache_hits' in ocr:
+            ocr_crops += ocr['recognized'] + ocr['cache_hits']
+            ocr_cache_hits += ocr['cache_hits']
+        if layout.confidence_score == 0.0:
+            failures += 1
+            print(f"[{done}/{len(image_paths)}] {result.image_path}: confused - "
+                  f"{'; '.join(layout.ambiguities)}")
+            continue
+
+        output_path = save_analysis(layout, result.image_path, args.output_dir, args.format, args.indent)
+        print(f"[{done}/{len(image_paths)}] {result.image_path}: "
+              f"{len(layout.components)} components in {result.elapsed:.2f}s "
+              f"({1.0 / result.elapsed if result.elapsed > 0 else 0.0:.2f} images/s)"
+              f"{' [cached]' if result.cache_hit else ''} -> {output_path}")
+
+    total = time.perf_counter() - batch_start
+    print(f"\nAnalyzed {len(image_paths)} screens in {total:.2f}s "
+          f"({len(image_paths) / total if total > 0 else 0.0:.2f} images/s overall, {failures} failed)")
+    if analyzer.result_cache is not None:
+        print(f"Cache: {cache_hits} hits, {len(image_paths) - cache_hits} misses")
+    if ocr_crops:
+        print(f"OCR recognition cache: {ocr_cache_hits} of {ocr_crops} text crops served from cache "
+              f"({ocr_cache_hits / ocr_crops:.1%} hit rate)")
+    if args.profile and aggregator.images:
+        print(f"\nStage timings across {aggregator.images} screens (wall-time histogram per stage):")
+        print(format_summary(aggregator.summary()))
+
+
+def load_analysis(path: str):
+    """Read a layout saved by a previous run (JSON, NDJSON or memory-mapped .uilb)"""
+    return load_layout(path)
+
+
+def answer_queries(ask: Callable[[str], str], query: Optional[str]) -> None:
+    """Answer one query, or run the interactive loop when none is given"""
+    # Handle query if provided
+    if query:
+        print(f"\nQuery: {query}")
+        response = ask(query)
+        print(f"Response: {response}")
+    else:
+        # Interactive mode
+        print("\nEntering interactive query mode. Type 'exit' to quit.")
+        while True:
+            try:
+                user_query = input("\nQuery: ")
+                if user_query.lower() in ['exit', 'quit']:
+                    break
+
+                response = ask(user_query)
+                print(f"Response: {response}")
+            except (KeyboardInterrupt, EOFError):
+                print("\nExiting...")
+                break
+
+
+def run_video(args: argparse.Namespace) -> None:
+    from core.video_analyzer import VideoAnalyzer, timeline_record
+    from models.timeline import LayoutTimeline
+    from utils.video_frames import video_info
+
+    if not os.path.exists(args.video):
+        print(f"Error: Video file '{args.video}' not found")
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    video_analyzer = VideoAnalyzer(create_analyzer(args), sample_every=args.sample_every,
+                                   min_changed_fraction=args.min_change, incremental=not args.no_incremental)
+    stem = Path(args.video).stem
+    timeline = LayoutTimeline(source=args.video, fps=video_info(args.video)['fps'])
+
+    print(f"Analyzing {args.video}...")
+    for snapshot in video_analyzer.iter_snapshots(args.video, stats=timeline.stats):
+        timeline.snapshots.append(snapshot)
+        # Each distinct screen is saved like a single-image analysis
+        output_path = save_analysis(snapshot.layout, f"{stem}_f{snapshot.frame_index:06d}", args.output_dir,
+                                    args.format, args.indent)
+        print(f"[{snapshot.timestamp:8.2f}s] frame {snapshot.frame_index}: "
+              f"{len(snapshot.layout.components)} components, {len(snapshot.events)} changes -> {output_path}")
+        for event in snapshot.events:
+            print(f"    {event.description}")
+
+    timeline_path = os.path.join(args.output_dir, stem + "_timeline.json")
+    with open(timeline_path, 'w') as f:
+        json.dump(timeline_record(timeline), f, indent=2 if args.indent is None else args.indent)
+
+    stats = timeline.stats
+    print(f"\nDecoded {stats['frames_decoded']} frames, analyzed {stats['frames_analyzed']} distinct screens "
+          f"({stats['frames_skipped']} near-duplicates skipped) in {stats['wall_seconds']:.2f}s; "
+          f"analysis waited {stats['wait_seconds']:.2f}s for frames")
+    print(f"Timeline saved to: {timeline_path}")
+
+
+def print_changes(diff) -> None:
+    for change in diff.changes:
+        print(f"  {change.kind.value:<12} {change.description}")
+
+
+def run_diff(args: argparse.Namespace) -> None:
+    from core.layout_diff import diff_files, diff_directories, diff_record
+    from models.layout_diff import DiffTolerances
+
+    before, after = args.diff
+    tolerances = DiffTolerances(position=args.move_tolerance, size=args.size_tolerance,
+                                color=args.color_tolerance)
+    # With --output - stdout carries the JSON report; the listing goes to stderr
+    listing = contextlib.redirect_stdout(sys.stderr) if args.output == '-' else contextlib.nullcontext()
+
+    with listing:
+        if os.path.isfile(before) and os.path.isfile(after):
+            diff = diff_files(before, after, tolerances)
+            print_changes(diff)
+            print(f"{before} -> {after}: {diff.matched} matched ({diff.unchanged} unchanged), "
+                  f"{len(diff.changes)} changes")
+            report = diff_record(diff)
+            changed = diff.has_changes
+        elif os.path.isdir(before) and os.path.isdir(after):
+            report = {"screens": []}
+            changed = 0
+            results = sorted(diff_directories(before, after, tolerances, workers=args.workers),
+                             key=lambda result: result.name)
+            for result in results:
+                entry = {"name": result.name, "before": result.before_path, "after": result.after_path}
+                if result.error:
+                    entry["error"] = result.error
+                    print(f"{result.name}: error - {result.error}")
+                elif result.diff is None:
+                    print(f"{result.name}: only in {'after' if result.before_path is None else 'before'}")
+                else:
+                    entry.update(diff_record(result.diff))
+                    counts = result.diff.counts()
+                    print(f"{result.name}: " +
+                          (', '.join(f"{counts[kind]} {kind}" for kind in sorted(counts)) or "no changes"))
+                    print_changes(result.diff)
+                # A screen that appeared, vanished or could not be compared counts as changed
+                changed += result.diff is None or result.diff.has_changes
+                report["screens"].append(entry)
+            print(f"\nCompared {len(results)} screens, {changed} changed")
+        else:
+            print(f"Error: --diff needs two existing files or two directories: {before}, {after}")
+            sys.exit(2)
+
+    if args.output:
+        indent = 2 if args.indent is None else args.indent
+        if args.output == '-':
+            json.dump(report, sys.stdout, indent=indent)
+        else:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=indent)
+            print(f"Diff saved to: {args.output}")
+    sys.exit(1 if changed else 0)
+
+
+def run_load(args: argparse.Namespace) -> None:
+    from utils.query_handler import QueryHandler
+
+    if not os.path.exists(args.load):
+        print(f"Error: Analysis file '{args.load}' not found")
+        return
+
+    layout = load_analysis(args.load)
+    if args.output:
+        # Conversion between saved formats, e.g. .json -> .uilb
+        indent = 2 if args.indent is None else args.indent
+        if args.output == '-':
+            write_analysis(layout, sys.stdout, args.format, indent)
+            return
+        with open_output(args.output, args.format) as f:
+            write_analysis(layout, f, args.format, indent)
+        print(f"Converted {args.load} to {args.output} ({args.format})")
+        return
+
+    print(f"Loaded {args.load}: {len(layout.components)} components, "
+          f"{len(layout.relationships)} relationships")
+
+    # With --load the first positional argument is the query
+    query = args.query or args.image_path
+    handler = QueryHandler()
+    answer_queries(lambda text: handler.process_query(layout, text), query)
+
 
 def main() -> None:
-    if len(sys.argv) < 2:
+    args = parse_args(sys.argv[1:])
+    configure_logging(args.log_level, args.log_format, args.log_sample_rate)
+
+    if args.load:
+        run_load(args)
+        return
+
+    if args.diff:
+        run_diff(args)
+        return
+
+    if args.batch:
+        run_batch(args)
+        return
+
+    if args.video:
+        run_video(args)
+        return
+
+    if not args.image_path:
         print("Usage: python main.py <image_path> [query]")
+        print("       python main.py --batch <dir|glob> [--workers N]")
+        print("       python main.py --load <analysis.json> [query]")
+        print("       python main.py --video <recording> [--sample-every N]")
+        print("       python main.py --diff <before> <after>")
         return
-    
-    image_path = sys.argv[1]
-    query = sys.argv[2] if len(sys.argv) > 2 else None
-    
+
+    image_path = args.image_path
+    query = args.query
+
     # Check if image exists
     if not os.path.exists(image_path):
         print(f"Error: Image file '{image_path}' not found")
         return
-    
+
+    indent = 2 if args.indent is None else args.indent
+
+    if args.output == '-':
+        # stdout carries the analysis; progress messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            layout = create_analyzer(args).analyze_screen(image_path)
+        if layout.confidence_score == 0.0:
+            print(f"confused - {'; '.join(layout.ambiguities)}", file=sys.stderr)
+            sys.exit(1)
+        write_analysis(layout, sys.stdout, args.format, indent)
+        return
+
     # Initialize analyzer
-    analyzer = ScreenAnalyzer()
-    
+    analyzer = create_analyzer(args)
+
     print("Analyzing screen...")
-    
+
     # Analyze the screen
     layout = analyzer.analyze_screen(image_path)
-    
+
     # Check for confused state
     if layout.confidence_score == 0.0:
         print("confused - Unable to analyze the screen properly")
         if layout.ambiguities:
             print("Issues:", "; ".join(layout.ambiguities))
         return
-    
-    # Export structured output
-    structured_output = analyzer.export_structured_output(layout)
-    
+
     # Save to JSON file
-    output_path = Path(image_path).stem + "_analysis.json"
-    try:
-        with open(output_path, 'w') as f:
-            json.dump(structured_output, f, indent=2, cls=NumpyEncoder)
-    except Exception as e:
-        print(f"Error saving JSON: {e}")
-        # Try alternative method
-        with open(output_path, 'w') as f:
-            json.dump(structured_output, f, indent=2)
-    
+    export_start = time.perf_counter()
+    if args.output:
+        output_path = args.output
+        with open_output(output_path, args.format) as f:
+            write_analysis(layout, f, args.format, indent)
+    else:
+        output_path = save_analysis(layout, image_path, args.output_dir, args.format, indent)
+    export_end = time.perf_counter()
+
     print(f"Analysis saved to: {output_path}")
     print(f"Overall confidence: {layout.confidence_score}")
     print(f"Components found: {len(layout.components)}")
     print(f"Relationships mapped: {len(layout.relationships)}")
-    
+    if analyzer.result_cache is not None:
+        stats = analyzer.result_cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses")
+    if 'cache_hits' in layout.metadata.get('ocr', {}):
+        ocr = layout.metadata['ocr']
+        print(f"OCR recognition cache: {ocr['cache_hits']} of {ocr['recognized'] + ocr['cache_hits']} text crops")
+    if 'tiling' in layout.metadata:
+        print(f"Tiles processed: {layout.metadata['tiling']['tiles']}")
+    if 'peak_rss_bytes' in layout.metadata:
+        print(f"Peak RSS: {layout.metadata['peak_rss_bytes'] / (1024 * 1024):.0f} MB")
+
     if layout.ambiguities:
         print(f"Ambiguities: {'; '.join(layout.ambiguities)}")
-    
-    # Handle query if provided
-    if query:
-        print(f"\nQuery: {query}")
-        response = analyzer.query_layout(layout, query)
-        print(f"Response: {response}")
-    else:
-        # Interactive mode
-        print("\nEntering interactive query mode. Type 'exit' to quit.")
-        while True:
-            try:
-                user_query = input("\nQuery: ")
-                if user_query.lower() in ['exit', 'quit']:
-                    break
-                
-                response = analyzer.query_layout(layout, user_query)
-                print(f"Response: {response}")
-            except KeyboardInterrupt:
-                print("\nExiting...")
-                break
+    if args.profile:
+        print("\nStage timings:")
+        print(format_timings(layout.timings))
+        print(f"{'export':<22} {1:>5} {(export_end - export_start) * 1000:>10.1f}")
+
+    answer_queries(lambda text: analyzer.query_layout(layout, text), query)
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,11 @@
 
 from .ui_component import UIComponent, ComponentType, BoundingBox
 from .spatial_relationship import SpatialRelationship, RelationType, UILayout
+from .columnar_layout import ColumnarLayout
+from .timeline import ChangeKind, ChangeEvent, LayoutSnapshot, LayoutTimeline
+from .layout_diff import DiffTolerances, ComponentChange, LayoutDiff
+from .component_tree import ComponentTree
+from .layout_graph import LayoutGraph, layout_graph
 
 __all__ = [
     'UIComponent', 
@@ -9,5 +14,16 @@ __all__ = [
     'BoundingBox',
     'SpatialRelationship', 
     'RelationType', 
-    'UILayout'
+    'UILayout',
+    'ColumnarLayout',
+    'ChangeKind',
+    'ChangeEvent',
+    'LayoutSnapshot',
+    'LayoutTimeline',
+    'DiffTolerances',
+    'ComponentChange',
+    'LayoutDiff',
+    'ComponentTree',
+    'LayoutGraph',
+    'layout_graph'
 ]
@@ -0,0 +1,207 @@
+from typing import List, Dict, Optional, Tuple, Any, Iterator
+
+import numpy as np
+
+from .ui_component import UIComponent, ComponentType, BoundingBox, describe_component
+from .spatial_relationship import SpatialRelationship, UILayout, describe_relationship
+from .component_tree import ComponentTree
+from .layout_views import (
+    COMPONENT_TYPES, RELATION_TYPES, COMPONENT_CODES, RELATION_CODES,
+    parse_hex, extra_color_info, color_info_from_rgb, ComponentView, RelationshipView
+)
+
+
+def _to_float(value: np.float32) -> float:
+    """Shortest decimal that round-trips through float32 (0.8, not 0.800000011920929)"""
+    return float(str(value))
+
+
+class ColumnarLayout:
+    """UILayout stored as NumPy columns instead of per-item dataclasses.
+
+    Components are rows of parallel arrays (int32 boxes, int8 type codes,
+    float32 confidences, uint8 RGB colors) and relationships are index
+    pairs into them with int8 relation codes. `components` and
+    `relationships` are read-only views that build UIComponent /
+    SpatialRelationship objects on access, with descriptions generated
+    from the component types and text at that point, so code written
+    against UILayout (QueryHandler, export_structured_output) works as is.
+    """
+
+    def __init__(self, ids: np.ndarray, bboxes: np.ndarray, type_codes: np.ndarray,
+                 confidences: np.ndarray, colors: np.ndarray, has_color: np.ndarray,
+                 texts: List[Optional[str]], rel_pairs: np.ndarray, rel_codes: np.ndarray,
+                 rel_distances: np.ndarray, rel_confidences: np.ndarray,
+                 screen_dimensions: Tuple[int, int], ambiguities: List[str],
+                 confidence_score: float, metadata: Optional[Dict[str, Any]] = None,
+                 attributes: Optional[Dict[int, Dict[str, Any]]] = None,
+                 extra_color_info: Optional[Dict[int, Dict[str, Any]]] = None,
+                 timings: Optional[Dict[str, Dict[str, float]]] = None,
+                 hierarchy: Optional[ComponentTree] = None):
+        self.ids = ids
+        self.bboxes = bboxes
+        self.type_codes = type_codes
+        self.confidences = confidences
+        self.colors = colors
+        self.has_color = has_color
+        self.texts = texts
+        self.rel_pairs = rel_pairs
+        self.rel_codes = rel_codes
+        self.rel_distances = rel_distances
+        self.rel_confidences = rel_confidences
+        self.screen_dimensions = screen_dimensions
+        self.ambiguities = ambiguities
+        self.confidence_score = confidence_score
+        self.metadata = metadata or {}
+        self.timings = timings or {}
+        self.hierarchy = hierarchy
+        # Sparse per-row extras, only for the rows that have them
+        self.attributes = attributes or {}
+        self.extra_color_info = extra_color_info or {}
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+        self.components = ComponentView(self)
+        self.relationships = RelationshipView(self)
+
+    @classmethod
+    def from_layout(cls, layout: UILayout) -> 'ColumnarLayout':
+        """Pack a UILayout into columns.
+
+        Relationships whose components are missing from the layout are
+        dropped. Relationship descriptions are not stored; they are rebuilt
+        from the relation type and both components when accessed.
+        """
+        components = list(layout.components.values())
+        count = len(components)
+
+        id_width = max((len(comp.id.encode('utf-8')) for comp in components), default=1)
+        ids = np.array([comp.id.encode('utf-8') for comp in components], dtype=f'S{id_width}')
+        bboxes = np.array(
+            [(comp.bounding_box.x, comp.bounding_box.y, comp.bounding_box.width, comp.bounding_box.height)
+             for comp in components], dtype=np.int32
+        ).reshape(count, 4)
+        type_codes = np.array([COMPONENT_CODES[comp.component_type] for comp in components], dtype=np.int8)
+        confidences = np.array([comp.confidence for comp in components], dtype=np.float32)
+
+        colors = np.zeros((count, 3), dtype=np.uint8)
+        has_color = np.zeros(count, dtype=bool)
+        attributes: Dict[int, Dict[str, Any]] = {}
+        extra_colors: Dict[int, Dict[str, Any]] = {}
+        for row, comp in enumerate(components):
+            rgb = parse_hex(comp.color_info)
+            if rgb is not None:
+                colors[row] = rgb
+                has_color[row] = True
+            extra = extra_color_info(comp.color_info, rgb)
+            if extra is not None:
+                extra_colors[row] = extra
+            if comp.attributes:
+                attributes[row] = comp.attributes
+
+        row_by_id = {comp.id: row for row, comp in enumerate(components)}
+        kept = [
+            rel for rel in layout.relationships
+            if rel.component1_id in row_by_id and rel.component2_id in row_by_id
+        ]
+        rel_pairs = np.array(
+            [(row_by_id[rel.component1_id], row_by_id[rel.component2_id]) for rel in kept], dtype=np.int32
+        ).reshape(len(kept), 2)
+        rel_codes = np.array([RELATION_CODES[rel.relation_type] for rel in kept], dtype=np.int8)
+        rel_distances = np.array([rel.distance for rel in kept], dtype=np.float32)
+        rel_confidences = np.array([rel.confidence for rel in kept], dtype=np.float32)
+
+        return cls(
+            ids=ids, bboxes=bboxes, type_codes=type_codes, confidences=confidences,
+            colors=colors, has_color=has_color,
+            texts=[comp.text_content for comp in components],
+            rel_pairs=rel_pairs, rel_codes=rel_codes,
+            rel_distances=rel_distances, rel_confidences=rel_confidences,
+            screen_dimensions=tuple(layout.screen_dimensions),
+            ambiguities=list(layout.ambiguities),
+            confidence_score=layout.confidence_score,
+            metadata=dict(layout.metadata),
+            attributes=attributes,
+            extra_color_info=extra_colors,
+            timings=dict(layout.timings),
+            hierarchy=getattr(layout, 'hierarchy', None)
+        )
+
+    def to_layout(self) -> UILayout:
+        """Expand back into a regular UILayout of dataclasses"""
+        return UILayout(
+            components=dict(self.components.items()),
+            relationships=list(self.relationships),
+            screen_dimensions=self.screen_dimensions,
+            ambiguities=list(self.ambiguities),
+            confidence_score=self.confidence_score,
+            metadata=dict(self.metadata),
+            timings=dict(self.timings),
+            hierarchy=self.hierarchy
+        )
+
+    def nbytes(self) -> int:
+        """Bytes held by the NumPy columns (excludes text and sparse extras)"""
+        return sum(array.nbytes for array in (
+            self.ids, self.bboxes, self.type_codes, self.confidences, self.colors, self.has_color,
+            self.rel_pairs, self.rel_codes, self.rel_distances, self.rel_confidences
+        ))
+
+    @property
+    def component_count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def relationship_count(self) -> int:
+        return len(self.rel_codes)
+
+    def row_of(self, component_id: str) -> int:
+        """Row index of a component ID (the lookup table is built on first use)"""
+        if self._row_by_id is None:
+            self._row_by_id = {raw.decode('utf-8'): row for row, raw in enumerate(self.ids)}
+        return self._row_by_id[component_id]
+
+    def component_id(self, row: int) -> str:
+        return self.ids[row].decode('utf-8')
+
+    def component_type(self, row: int) -> ComponentType:
+        return COMPONENT_TYPES[self.type_codes[row]]
+
+    def color_info(self, row: int) -> Optional[Dict[str, Any]]:
+        rgb = self.colors[row] if self.has_color[row] else None
+        return color_info_from_rgb(rgb, self.extra_color_info.get(row))
+
+    def component(self, row: int) -> UIComponent:
+        x, y, width, height = (int(value) for value in self.bboxes[row])
+        return UIComponent(
+            id=self.component_id(row),
+            component_type=self.component_type(row),
+            bounding_box=BoundingBox(x, y, width, height),
+            text_content=self.texts[row],
+            color_info=self.color_info(row),
+            confidence=_to_float(self.confidences[row]),
+            attributes=dict(self.attributes.get(row, {}))
+        )
+
+    def describe(self, index: int) -> str:
+        """Description of relationship `index`, generated on demand"""
+        row1, row2 = self.rel_pairs[index]
+        return describe_relationship(
+            RELATION_TYPES[self.rel_codes[index]],
+            describe_component(self.component_type(row1), self.texts[row1]),
+            describe_component(self.component_type(row2), self.texts[row2])
+        )
+
+    def relationship(self, index: int) -> SpatialRelationship:
+        row1, row2 = self.rel_pairs[index]
+        return SpatialRelationship(
+            component1_id=self.component_id(row1),
+            component2_id=self.component_id(row2),
+            relation_type=RELATION_TYPES[self.rel_codes[index]],
+            distance=_to_float(self.rel_distances[index]),
+            confidence=_to_float(self.rel_confidences[index]),
+            description=self.describe(index)
+        )
+
+    def iter_relationships(self) -> Iterator[SpatialRelationship]:
+        return (self.relationship(index) for index in range(self.relationship_count))
+
@@ -0,0 +1,86 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Callable, Iterator
+
+
+@dataclass
+class ComponentTree:
+    """Containment hierarchy of a layout: each component's innermost container.
+
+    parents maps every component ID, in layout order, to the ID of the
+    smallest component that contains it, or None for top-level components.
+    """
+    parents: Dict[str, Optional[str]]
+    _children: Dict[Optional[str], List[str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        for comp_id, parent in self.parents.items():
+            self._children.setdefault(parent, []).append(comp_id)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def __contains__(self, component_id: str) -> bool:
+        return component_id in self.parents
+
+    @property
+    def roots(self) -> List[str]:
+        """Top-level components, in layout order"""
+        return self._children.get(None, [])
+
+    def parent(self, component_id: str) -> Optional[str]:
+        return self.parents.get(component_id)
+
+    def children(self, component_id: Optional[str]) -> List[str]:
+        """Components directly inside a component (the roots for None), in layout order"""
+        return self._children.get(component_id, [])
+
+    def siblings(self, component_id: str) -> List[str]:
+        """Other components with the same parent"""
+        return [other for other in self.children(self.parent(component_id)) if other != component_id]
+
+    def groups(self) -> Iterator[tuple]:
+        """(parent ID or None, child IDs) for every component that has children"""
+        return iter(self._children.items())
+
+    def ancestors(self, component_id: str) -> List[str]:
+        """Containers of a component, innermost first"""
+        chain = []
+        parent = self.parents.get(component_id)
+        while parent is not None:
+            chain.append(parent)
+            parent = self.parents.get(parent)
+        return chain
+
+    def depth(self, component_id: str) -> int:
+        """0 for top-level components"""
+        return len(self.ancestors(component_id))
+
+    def descendants(self, component_id: Optional[str]) -> Iterator[str]:
+        """Everything nested inside a component (the whole tree for None), depth first"""
+        stack = list(reversed(self.children(component_id)))
+        while stack:
+            comp_id = stack.pop()
+            yield comp_id
+            stack.extend(reversed(self.children(comp_id)))
+
+    def to_nested(self, node: Callable[[str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Nested dicts for the roots: node(id) plus a "children" list where there are any"""
+        def build(comp_id: str) -> Dict[str, Any]:
+            record = node(comp_id)
+            children = self.children(comp_id)
+            if children:
+                record["children"] = [build(child) for child in children]
+            return record
+
+        return [build(root) for root in self.roots]
+
+    @classmethod
+    def from_nested(cls, records: List[Dict[str, Any]]) -> 'ComponentTree':
+        """Inverse of to_nested; only the "id" and "children" keys are read"""
+        parents: Dict[str, Optional[str]] = {}
+        stack = [(record, None) for record in reversed(records)]
+        while stack:
+            record, parent = stack.pop()
+            parents[record["id"]] = parent
+            stack.extend((child, record["id"]) for child in reversed(record.get("children", ())))
+        return cls(parents)
@@ -0,0 +1,52 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any
+
+from .timeline import ChangeKind
+
+
+@dataclass
+class DiffTolerances:
+    """How much a matched component may change before it is reported"""
+    position: int = 2  # pixels the top-left corner may shift
+    size: int = 2  # pixels the width or height may grow or shrink
+    color: float = 24.0  # RGB distance between dominant colors
+    # How far (pixels) a component may move and still be matched by position;
+    # further moves are only caught for components with identical text
+    search_radius: int = 64
+    min_text_similarity: float = 0.6  # difflib ratio for two texts to be the same label
+    match_iou: float = 0.3  # overlap that pairs same-type components whatever their text
+
+
+@dataclass
+class ComponentChange:
+    """One difference between two layouts of the same screen"""
+    kind: ChangeKind
+    before_id: Optional[str]  # None for ADDED
+    after_id: Optional[str]  # None for REMOVED
+    description: str = ""
+    # Numbers behind the change, e.g. dx/dy for MOVED or the two colors for RECOLORED
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class LayoutDiff:
+    """Result of diff_layouts: every change plus match counts"""
+    before_components: int
+    after_components: int
+    matched: int = 0  # component pairs found in both layouts
+    unchanged: int = 0  # matched pairs within every tolerance
+    changes: List[ComponentChange] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.changes)
+
+    def of_kind(self, kind: ChangeKind) -> List[ComponentChange]:
+        return [change for change in self.changes if change.kind == kind]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of changes per kind (kinds with none are left out)"""
+        counts: Dict[str, int] = {}
+        for change in self.changes:
+            counts[change.kind.value] = counts.get(change.kind.value, 0) + 1
+        return counts
@@ -0,0 +1,157 @@
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Mapping
+
+from .ui_component import UIComponent
+from .spatial_relationship import SpatialRelationship, RelationType
+from .component_tree import ComponentTree
+
+DIRECTIONS = (RelationType.ABOVE, RelationType.BELOW, RelationType.LEFT_OF, RelationType.RIGHT_OF)
+
+
+class LayoutGraph:
+    """Adjacency lists over a layout's relationships, built once per layout.
+
+    rel(c1, c2, R) reads "c1 is R of c2". For every component the graph
+    keeps, per RelationType and nearest first, the components that are R
+    of it (related_to) and the components it is R of (relations_of), so a
+    traversal step costs O(degree) instead of a scan of every relationship.
+    The containment tree is taken from the layout's ComponentTree when
+    there is one; otherwise it is derived from INSIDE / CONTAINS
+    relationships, each component's parent being the smallest component it
+    lies inside.
+    """
+
+    def __init__(self, components: Mapping[str, UIComponent], relationships: Iterable[SpatialRelationship],
+                 hierarchy: Optional[ComponentTree] = None):
+        # Layout order, used to order children and roots
+        self._order: Dict[str, int] = {comp_id: position for position, comp_id in enumerate(components)}
+        # (component, relation type) -> [(distance, other component)], nearest first;
+        # flat keys keep the build to one dict operation per endpoint
+        self._incoming: Dict[Tuple[str, RelationType], List[Tuple[float, str]]] = {}
+        self._outgoing: Dict[Tuple[str, RelationType], List[Tuple[float, str]]] = {}
+
+        order = self._order
+        add_incoming, add_outgoing = self._incoming.setdefault, self._outgoing.setdefault
+        count = 0
+        for rel in relationships:
+            count += 1
+            subject, reference = rel.component1_id, rel.component2_id
+            if subject not in order or reference not in order:
+                continue
+            relation_type = rel.relation_type
+            add_incoming((reference, relation_type), []).append((rel.distance, subject))
+            add_outgoing((subject, relation_type), []).append((rel.distance, reference))
+        incoming, outgoing = self._incoming, self._outgoing
+        for entries in incoming.values():
+            entries.sort()
+        for entries in outgoing.values():
+            entries.sort()
+
+        # (components, relationships) the graph was built from, to spot a stale graph
+        self.signature = (len(order), count)
+
+        self._parent: Dict[str, str] = {}
+        self._children: Dict[str, List[str]] = {}
+        if hierarchy is not None:
+            for comp_id in order:
+                parent = hierarchy.parent(comp_id)
+                if parent is not None and parent in order:
+                    self._parent[comp_id] = parent
+                    self._children.setdefault(parent, []).append(comp_id)
+            return
+
+        containers: Dict[str, set] = {}
+        for (comp_id, relation_type), entries in outgoing.items():
+            if relation_type == RelationType.INSIDE:
+                containers.setdefault(comp_id, set()).update(other for _, other in entries)
+        for (comp_id, relation_type), entries in incoming.items():
+            if relation_type == RelationType.CONTAINS:
+                containers.setdefault(comp_id, set()).update(other for _, other in entries)
+        for comp_id in sorted(containers, key=order.__getitem__):
+            # Nested containers all contain the component; its parent is the innermost
+            parent = min(containers[comp_id], key=lambda other: (components[other].bounding_box.area, order[other]))
+            self._parent[comp_id] = parent
+            self._children.setdefault(parent, []).append(comp_id)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, component_id: str) -> bool:
+        return component_id in self._order
+
+    def related_to(self, component_id: str, relation_type: RelationType) -> List[str]:
+        """IDs of the components that are `relation_type` of a component, nearest first.
+
+        related_to(search_bar, BELOW) answers "what is below the search bar".
+        """
+        return [other for _, other in self._incoming.get((component_id, relation_type), ())]
+
+    def relations_of(self, component_id: str, relation_type: RelationType) -> List[str]:
+        """IDs of the components a component is `relation_type` of, nearest first"""
+        return [other for _, other in self._outgoing.get((component_id, relation_type), ())]
+
+    def neighbors(self, component_id: str) -> Dict[RelationType, List[str]]:
+        """Every relation type with the components that are in that relation to a component"""
+        return {
+            relation_type: [other for _, other in self._incoming[(component_id, relation_type)]]
+            for relation_type in RelationType if (component_id, relation_type) in self._incoming
+        }
+
+    def degree(self, component_id: str) -> int:
+        """Number of relationships a component takes part in"""
+        return sum(len(edges.get((component_id, relation_type), ()))
+                   for edges in (self._incoming, self._outgoing) for relation_type in RelationType)
+
+    def nearest(self, component_id: str, direction: RelationType) -> Optional[str]:
+        """Closest component in a direction ("directly below"), or None"""
+        entries = self._incoming.get((component_id, direction))
+        return entries[0][1] if entries else None
+
+    def nearest_by_direction(self, component_id: str) -> Dict[RelationType, Optional[str]]:
+        return {direction: self.nearest(component_id, direction) for direction in DIRECTIONS}
+
+    def parent(self, component_id: str) -> Optional[str]:
+        """Innermost component containing this one, or None at the top level"""
+        return self._parent.get(component_id)
+
+    def children(self, component_id: str) -> List[str]:
+        """Components directly inside this one, in layout order"""
+        return self._children.get(component_id, [])
+
+    def roots(self) -> List[str]:
+        """Top-level components (inside nothing), in layout order"""
+        return [comp_id for comp_id in self._order if comp_id not in self._parent]
+
+    def ancestors(self, component_id: str) -> List[str]:
+        """Containers of a component, innermost first"""
+        chain = []
+        parent = self._parent.get(component_id)
+        while parent is not None:
+            chain.append(parent)
+            parent = self._parent.get(parent)
+        return chain
+
+    def descendants(self, component_id: str) -> Iterator[str]:
+        """Everything nested inside a component, depth first"""
+        stack = list(reversed(self.children(component_id)))
+        while stack:
+            comp_id = stack.pop()
+            yield comp_id
+            stack.extend(reversed(self.children(comp_id)))
+
+
+def layout_graph(layout) -> LayoutGraph:
+    """The graph of a layout, built on first use and kept on the layout.
+
+    ScreenAnalyzer attaches it when a layout is built; layouts loaded from
+    disk, ColumnarLayout or a memory-mapped .uilb get one here. A graph
+    whose signature no longer matches the layout (edited in place) is rebuilt.
+    """
+    graph = getattr(layout, 'graph', None)
+    if graph is not None and graph.signature == (len(layout.components), len(layout.relationships)):
+        return graph
+    graph = LayoutGraph(layout.components, layout.relationships, getattr(layout, 'hierarchy', None))
+    try:
+        layout.graph = graph
+    except AttributeError:
+        pass
+    return graph
@@ -0,0 +1,113 @@
+"""Codecs and read-only views shared by the packed layout formats.
+
+ColumnarLayout (NumPy columns) and MappedLayout (.uilb files) both store
+components as rows with integer type codes and packed RGB colors, and
+expose them through the same UILayout-like `components` /
+`relationships` views. A packed layout provides component_count,
+relationship_count, component_id(row), row_of(id), component(row),
+relationship(index) and iter_relationships().
+"""
+from collections.abc import Mapping, Sequence, ValuesView, ItemsView
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from .ui_component import UIComponent, ComponentType
+from .spatial_relationship import SpatialRelationship, RelationType
+
+# Integer codes are positions in the enum definitions; both formats use
+# these tables, so adding a member cannot put them out of step
+COMPONENT_TYPES: Tuple[ComponentType, ...] = tuple(ComponentType)
+RELATION_TYPES: Tuple[RelationType, ...] = tuple(RelationType)
+COMPONENT_CODES = {component_type: code for code, component_type in enumerate(COMPONENT_TYPES)}
+RELATION_CODES = {relation_type: code for code, relation_type in enumerate(RELATION_TYPES)}
+
+# color_info keys rebuilt from the packed RGB value
+COLOR_KEYS = {'dominant_rgb', 'dominant_hex'}
+
+
+def parse_hex(color_info: Optional[Dict[str, Any]]) -> Optional[Tuple[int, int, int]]:
+    """RGB triple from a color_info dict's dominant_hex, or None"""
+    if not color_info:
+        return None
+    hex_value = str(color_info.get('dominant_hex', '')).lstrip('#')
+    if len(hex_value) != 6:
+        return None
+    try:
+        return (int(hex_value[0:2], 16), int(hex_value[2:4], 16), int(hex_value[4:6], 16))
+    except ValueError:
+        return None
+
+
+def extra_color_info(color_info: Optional[Dict[str, Any]],
+                     rgb: Optional[Tuple[int, int, int]]) -> Optional[Dict[str, Any]]:
+    """The color_info keys the packed RGB cannot reproduce, or None if there are none"""
+    if not color_info or (rgb is not None and not set(color_info) - COLOR_KEYS):
+        return None
+    return {key: value for key, value in color_info.items() if key not in COLOR_KEYS or rgb is None}
+
+
+def color_info_from_rgb(rgb: Optional[Tuple[int, int, int]],
+                        extra: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Inverse of parse_hex / extra_color_info"""
+    if rgb is None:
+        return dict(extra) if extra is not None else None
+    r, g, b = (int(channel) for channel in rgb)
+    color_info = {'dominant_rgb': f"rgb({r}, {g}, {b})", 'dominant_hex': f"#{r:02x}{g:02x}{b:02x}"}
+    if extra:
+        color_info.update(extra)
+    return color_info
+
+
+class ComponentView(Mapping):
+    """Read-only id -> UIComponent mapping over a packed layout"""
+
+    def __init__(self, layout):
+        self._layout = layout
+
+    def __getitem__(self, component_id: str) -> UIComponent:
+        return self._layout.component(self._layout.row_of(component_id))
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._layout.component_id(row) for row in range(len(self)))
+
+    def __len__(self) -> int:
+        return self._layout.component_count
+
+    def values(self) -> 'ComponentValues':
+        return ComponentValues(self)
+
+    def items(self) -> 'ComponentItems':
+        return ComponentItems(self)
+
+
+class ComponentValues(ValuesView):
+    def __iter__(self) -> Iterator[UIComponent]:
+        # Row order, without going through the ID lookup
+        layout = self._mapping._layout
+        return (layout.component(row) for row in range(layout.component_count))
+
+
+class ComponentItems(ItemsView):
+    def __iter__(self) -> Iterator[Tuple[str, UIComponent]]:
+        return ((comp.id, comp) for comp in ComponentValues(self._mapping))
+
+
+class RelationshipView(Sequence):
+    """Read-only sequence of SpatialRelationships over a packed layout"""
+
+    def __init__(self, layout):
+        self._layout = layout
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._layout.relationship(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("relationship index out of range")
+        return self._layout.relationship(index)
+
+    def __iter__(self) -> Iterator[SpatialRelationship]:
+        return self._layout.iter_relationships()
+
+    def __len__(self) -> int:
+        return self._layout.relationship_count
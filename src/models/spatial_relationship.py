@@ -1,8 +1,8 @@
 from dataclasses import dataclass
 from typing import List, Dict
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Dict, Tuple  # Add Tuple here
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Any, Optional  # Add Tuple here
 from enum import Enum
 
 class RelationType(Enum):
@@ -17,6 +17,25 @@ class RelationType(Enum):
     ALIGNED_HORIZONTAL = "aligned_horizontal"
     ALIGNED_VERTICAL = "aligned_vertical"
 
+RELATION_PHRASES = {
+    RelationType.ABOVE: "{0} is above {1}",
+    RelationType.BELOW: "{0} is below {1}",
+    RelationType.LEFT_OF: "{0} is to the left of {1}",
+    RelationType.RIGHT_OF: "{0} is to the right of {1}",
+    RelationType.INSIDE: "{0} is inside {1}",
+    RelationType.CONTAINS: "{0} contains {1}",
+    RelationType.OVERLAPS: "{0} overlaps {1}",
+    RelationType.ADJACENT: "{0} is adjacent to {1}",
+    RelationType.ALIGNED_HORIZONTAL: "{0} is horizontally aligned with {1}",
+    RelationType.ALIGNED_VERTICAL: "{0} is vertically aligned with {1}",
+}
+
+
+def describe_relationship(relation_type: RelationType, subject: str, reference: str) -> str:
+    """Human-readable sentence saying that subject is <relation> reference"""
+    phrase = RELATION_PHRASES.get(relation_type, "{0} relates to {1}")
+    return phrase.format(subject, reference)
+
 @dataclass
 class SpatialRelationship:
     component1_id: str
@@ -33,3 +52,17 @@ class UILayout:
     screen_dimensions: Tuple[int, int]
     ambiguities: List[str]
     confidence_score: float
+    # Per-run statistics (tiling, memory, ...); exported when non-empty
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    # Per-stage profile (wall/CPU ms, items, peak memory) when profiling is on
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    # Containment tree (models.component_tree) from HierarchyBuilder
+    hierarchy: Optional['ComponentTree'] = None
+    # Adjacency view of relationships (models.layout_graph), built once per layout
+    graph: Optional['LayoutGraph'] = field(default=None, repr=False, compare=False)
+    
+    def __getstate__(self):
+        # The graph is derived data; rebuild it after unpickling instead of shipping it
+        state = dict(self.__dict__)
+        state['graph'] = None
+        return state
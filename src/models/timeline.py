@@ -0,0 +1,57 @@
+import bisect
+from enum import Enum
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any
+
+from .spatial_relationship import UILayout
+
+
+class ChangeKind(Enum):
+    ADDED = "added"
+    REMOVED = "removed"
+    MOVED = "moved"
+    TEXT_CHANGED = "text_changed"
+    # Only reported by layout diffs; video timelines fold size into MOVED
+    RESIZED = "resized"
+    RECOLORED = "recolored"
+
+
+@dataclass
+class ChangeEvent:
+    """One component-level difference between consecutive snapshots"""
+    frame_index: int
+    timestamp: float
+    kind: ChangeKind
+    component_id: str  # in the new snapshot; in the old one for REMOVED
+    previous_id: Optional[str] = None  # the matched component in the old snapshot
+    description: str = ""
+
+
+@dataclass
+class LayoutSnapshot:
+    """Analysis of one distinct screen in a recording"""
+    frame_index: int
+    timestamp: float
+    layout: UILayout
+    # Share of the (thumbnail) frame that differs from the previous snapshot
+    changed_fraction: float = 1.0
+    events: List[ChangeEvent] = field(default_factory=list)
+
+
+@dataclass
+class LayoutTimeline:
+    """Snapshots of a video, in frame order, with the changes between them"""
+    source: str
+    fps: float
+    snapshots: List[LayoutSnapshot] = field(default_factory=list)
+    # Decoded / skipped / analyzed frame counts and stage timings
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def events(self) -> List[ChangeEvent]:
+        return [event for snapshot in self.snapshots for event in snapshot.events]
+
+    def snapshot_at(self, timestamp: float) -> Optional[LayoutSnapshot]:
+        """The snapshot on screen at a time (seconds): the last one at or before it"""
+        position = bisect.bisect_right([snapshot.timestamp for snapshot in self.snapshots], timestamp)
+        return self.snapshots[position - 1] if position else None
@@ -1,3 +1,4 @@
+import uuid
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple  # Make sure Tuple is imported
 from enum import Enum
@@ -30,6 +31,25 @@ class BoundingBox:
     def area(self) -> int:
         return self.width * self.height
 
+def describe_component(component_type: ComponentType, text_content: Optional[str]) -> str:
+    """Short phrase naming a component, e.g. button with text 'OK'"""
+    desc = component_type.value
+    if text_content:
+        desc += f" with text '{text_content}'"
+    return desc
+
+# Namespace for component IDs derived from their content (uuid5)
+COMPONENT_ID_NAMESPACE = uuid.UUID('6f1c2d0e-4b7a-5c1e-9d3f-2a8b7e5c4d10')
+
+def stable_component_id(component_type: ComponentType, bbox: BoundingBox, text_content: Optional[str] = None) -> str:
+    """Deterministic ID from a component's type, box and text.
+    
+    The same detection on the same screen gets the same ID on every run,
+    so saved analyses of two builds can be compared by ID.
+    """
+    key = f"{component_type.value}|{bbox.x},{bbox.y},{bbox.width},{bbox.height}|{text_content or ''}"
+    return str(uuid.uuid5(COMPONENT_ID_NAMESPACE, key))
+
 @dataclass
 class UIComponent:
     id: str
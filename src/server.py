@@ -0,0 +1,187 @@
+import sys
+import json
+import os
+import re
+import base64
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.screen_analyzer import ScreenAnalyzer, NumpyEncoder
+from utils.log import configure_logging, get_logger
+from core.analysis_service import (
+    AnalysisService, ServiceBusyError, AnalysisTimeoutError, LayoutNotFoundError
+)
+
+logger = get_logger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+LAYOUT_PATH = re.compile(r'^/layouts/([0-9a-f]+)$')
+QUERY_PATH = re.compile(r'^/layouts/([0-9a-f]+)/query$')
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over an AnalysisService.
+
+    POST /analyze                 body: raw PNG/JPEG bytes, or JSON {"image_base64": "..."}
+    POST /layouts/<id>/query      body: JSON {"query": "..."}
+    GET  /layouts/<id>            stored structured output
+    GET  /health                  service stats
+    """
+
+    # Drop slow or stalled clients instead of pinning a thread forever
+    timeout = 30
+    verbose = False
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', **self.service.stats()})
+            return
+
+        match = LAYOUT_PATH.match(self.path)
+        if match:
+            try:
+                layout = self.service.get_layout(match.group(1))
+            except LayoutNotFoundError:
+                self._send_json(404, {'error': 'Unknown layout id'})
+                return
+            self._send_json(200, {'layout_id': match.group(1), 'analysis': self.service.export(layout)})
+            return
+
+        self._send_json(404, {'error': f'No route for GET {self.path}'})
+
+    def do_POST(self) -> None:
+        body = self._read_body()
+        if body is None:
+            return
+
+        if self.path == '/analyze':
+            self._handle_analyze(body)
+            return
+
+        match = QUERY_PATH.match(self.path)
+        if match:
+            self._handle_query(match.group(1), body)
+            return
+
+        self._send_json(404, {'error': f'No route for POST {self.path}'})
+
+    def _handle_analyze(self, body: bytes) -> None:
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            try:
+                body = base64.b64decode(json.loads(body)['image_base64'])
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {'error': 'Expected JSON {"image_base64": "..."}'})
+                return
+
+        try:
+            layout_id, layout = self.service.analyze(body)
+        except ServiceBusyError as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except AnalysisTimeoutError as e:
+            self._send_json(504, {'error': str(e)})
+            return
+
+        status = 422 if layout.confidence_score == 0.0 else 200
+        self._send_json(status, {'layout_id': layout_id, 'analysis': self.service.export(layout)})
+
+    def _handle_query(self, layout_id: str, body: bytes) -> None:
+        try:
+            query = json.loads(body)['query']
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {'error': 'Expected JSON {"query": "..."}'})
+            return
+
+        try:
+            response = self.service.query(layout_id, query)
+        except LayoutNotFoundError:
+            self._send_json(404, {'error': 'Unknown layout id'})
+            return
+
+        self._send_json(200, {'layout_id': layout_id, 'query': query, 'response': response})
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length <= 0:
+            self._send_json(411, {'error': 'Content-Length required'})
+            return None
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {'error': 'Request body too large'})
+            return None
+        return self.rfile.read(length)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, cls=NumpyEncoder).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve screen analysis over HTTP with warm models")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help="Maximum images grouped into one OCR batch")
+    parser.add_argument('--batch-wait-ms', type=float, default=20,
+                        help="How long to wait for more requests to fill a batch")
+    parser.add_argument('--max-in-flight', type=int, default=16,
+                        help="Analyses allowed to wait or run at once; more get 503")
+    parser.add_argument('--timeout', type=float, default=60,
+                        help="Seconds before an analysis request gets 504")
+    parser.add_argument('--max-layouts', type=int, default=256,
+                        help="Layouts kept in memory for queries (LRU)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    parser.add_argument('--log-level', choices=['debug', 'info', 'warning', 'error'], default='warning',
+                        help="Analysis diagnostics written to stderr (default: warning)")
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text')
+    parser.add_argument('--log-sample-rate', type=float, default=1.0,
+                        help="Share of per-component debug messages to keep (default: 1.0)")
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_format, args.log_sample_rate)
+
+    logger.info("Loading models...")
+    service = AnalysisService(
+        ScreenAnalyzer(),
+        max_batch_size=args.batch_size,
+        max_wait=args.batch_wait_ms / 1000.0,
+        max_in_flight=args.max_in_flight,
+        request_timeout=args.timeout,
+        max_layouts=args.max_layouts
+    )
+
+    AnalysisRequestHandler.verbose = args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+
+    logger.info("Serving on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
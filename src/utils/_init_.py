@@ -2,8 +2,57 @@
 
 from .image_processor import ImageProcessor
 from .query_handler import QueryHandler
+from .result_cache import ResultCache
+from .ocr_cache import RecognitionCache, crop_key
+from .layout_io import (
+    layout_from_structured_output, write_layout_json, write_layout_ndjson, read_layout_ndjson
+)
+from .binary_layout import (
+    MappedLayout, open_binary_layout, load_layout, write_binary_layout, structured_output_to_binary, binary_to_structured_output
+)
+from .spatial_index import GridIndex, StabbingTree, containment_parents
+from .layout_index import LayoutIndex
+from .micro_batcher import MicroBatcher
+from .tiling import compute_tiles, peak_rss_bytes
+from .frame_diff import changed_regions
+from .video_frames import iter_video_frames, FrameDeduplicator
+from .profiler import profiling, stage, TimingAggregator
+from .log import get_logger, configure_logging
+from .box_ops import boxes_to_array, pairwise_iou, suppress_lower_confidence, greedy_nms
 
 __all__ = [
     'ImageProcessor',
-    'QueryHandler'
+    'QueryHandler',
+    'ResultCache',
+    'RecognitionCache',
+    'crop_key',
+    'layout_from_structured_output',
+    'write_layout_json',
+    'write_layout_ndjson',
+    'read_layout_ndjson',
+    'MappedLayout',
+    'open_binary_layout',
+    'load_layout',
+    'write_binary_layout',
+    'structured_output_to_binary',
+    'binary_to_structured_output',
+    'GridIndex',
+    'StabbingTree',
+    'containment_parents',
+    'LayoutIndex',
+    'boxes_to_array',
+    'pairwise_iou',
+    'suppress_lower_confidence',
+    'greedy_nms',
+    'MicroBatcher',
+    'compute_tiles',
+    'peak_rss_bytes',
+    'changed_regions',
+    'iter_video_frames',
+    'FrameDeduplicator',
+    'profiling',
+    'stage',
+    'TimingAggregator',
+    'get_logger',
+    'configure_logging'
 ]
@@ -0,0 +1,378 @@
+from functools import lru_cache
+from typing import Dict, Any, IO, Iterator, List, Optional, Tuple
+import json
+import mmap
+import struct
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import UIComponent, BoundingBox, describe_component
+from models.spatial_relationship import SpatialRelationship, UILayout, describe_relationship
+from models.component_tree import ComponentTree
+from models.layout_views import (
+    COMPONENT_TYPES, RELATION_TYPES, COMPONENT_CODES, RELATION_CODES,
+    parse_hex, extra_color_info, color_info_from_rgb, ComponentView, RelationshipView
+)
+from utils.layout_io import (
+    plain_value, component_record, relationship_record, summary_record, hierarchy_record,
+    layout_from_structured_output, read_layout_ndjson
+)
+
+# .uilb: a memory-mappable layout file, little-endian throughout.
+#
+#   header         _HEADER
+#   components     one _COMPONENT record per component, in layout order
+#   relationships  one _RELATIONSHIP record per relationship
+#   id index       uint32 component rows sorted by ID, for binary search
+#   info           JSON: ambiguities, metadata, timings and, when the
+#                  layout has a containment tree, each row's parent row
+#   strings        UTF-8 string table (IDs, text, descriptions, extras),
+#                  each distinct string stored once
+#
+# Strings are referenced as (offset into the string table, byte length);
+# a length of _NONE stands for None. Relationship descriptions that match
+# the generated sentence (the usual case) are stored as None and rebuilt
+# from the two components when read, as ColumnarLayout does.
+MAGIC = b'UILB'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHIIdII6Q')
+_COMPONENT = struct.Struct('<IIBB3sxiiiifIIII')
+_RELATIONSHIP = struct.Struct('<IIB3xffII')
+_ROW = struct.Struct('<I')
+_F32 = struct.Struct('<f')
+
+_NONE = 0xFFFFFFFF
+_HAS_COLOR = 0x01
+
+@lru_cache(maxsize=65536)
+def _f32(value: float) -> float:
+    """Shortest decimal that round-trips through float32 (0.8, not 0.800000011920929).
+
+    Cached: confidences take few distinct values, and each distance is
+    usually shared by the relationships in both directions.
+    """
+    packed = _F32.pack(value)
+    for digits in range(6, 10):
+        shortest = float(f"{value:.{digits}g}")
+        if _F32.pack(shortest) == packed:
+            return shortest
+    return value
+
+
+class _StringTable:
+    """Deduplicating UTF-8 string table under construction"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._refs: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, text: Optional[str]) -> Tuple[int, int]:
+        if text is None:
+            return 0, _NONE
+        ref = self._refs.get(text)
+        if ref is None:
+            encoded = text.encode('utf-8')
+            ref = (len(self.data), len(encoded))
+            self.data += encoded
+            self._refs[text] = ref
+        return ref
+
+
+def _component_extras(comp: UIComponent, rgb: Optional[Tuple[int, int, int]]) -> Optional[str]:
+    """JSON for what the fixed-width record cannot hold: attributes and unusual color_info"""
+    extras = {}
+    if comp.attributes:
+        extras['attributes'] = plain_value(comp.attributes)
+    extra_colors = extra_color_info(comp.color_info, rgb)
+    if extra_colors is not None:
+        extras['color_info'] = plain_value(extra_colors)
+    return json.dumps(extras, separators=(',', ':')) if extras else None
+
+
+def pack_layout(layout: UILayout) -> bytes:
+    """Serialize a layout (UILayout, ColumnarLayout or MappedLayout) to .uilb bytes.
+
+    Relationships whose components are missing from the layout are
+    dropped, since records point at component rows rather than IDs.
+    """
+    strings = _StringTable()
+    components = list(layout.components.values())
+    row_by_id = {comp.id: row for row, comp in enumerate(components)}
+
+    component_data = bytearray()
+    for comp in components:
+        bbox = comp.bounding_box
+        rgb = parse_hex(comp.color_info)
+        component_data += _COMPONENT.pack(
+            *strings.add(comp.id),
+            COMPONENT_CODES[comp.component_type],
+            _HAS_COLOR if rgb is not None else 0,
+            bytes(rgb) if rgb is not None else b'\0\0\0',
+            int(bbox.x), int(bbox.y), int(bbox.width), int(bbox.height),
+            float(comp.confidence),
+            *strings.add(comp.text_content),
+            *strings.add(_component_extras(comp, rgb))
+        )
+
+    relationship_count = 0
+    relationship_data = bytearray()
+    for rel in layout.relationships:
+        if rel.component1_id not in row_by_id or rel.component2_id not in row_by_id:
+            continue
+        relationship_count += 1
+        row1, row2 = row_by_id[rel.component1_id], row_by_id[rel.component2_id]
+        generated = describe_relationship(
+            rel.relation_type,
+            describe_component(components[row1].component_type, components[row1].text_content),
+            describe_component(components[row2].component_type, components[row2].text_content)
+        )
+        relationship_data += _RELATIONSHIP.pack(
+            row1, row2, RELATION_CODES[rel.relation_type],
+            float(rel.distance), float(rel.confidence),
+            *strings.add(None if rel.description == generated else rel.description)
+        )
+
+    id_order = sorted(range(len(components)), key=lambda row: components[row].id.encode('utf-8'))
+    id_index = struct.pack(f'<{len(id_order)}I', *id_order)
+
+    info = {
+        'ambiguities': list(layout.ambiguities),
+        'metadata': plain_value(layout.metadata),
+        'timings': plain_value(layout.timings)
+    }
+    hierarchy = getattr(layout, 'hierarchy', None)
+    if hierarchy is not None:
+        # Parent row per component row, -1 at the top level
+        info['parents'] = [row_by_id.get(hierarchy.parent(comp.id), -1) for comp in components]
+    info = json.dumps(info, separators=(',', ':')).encode('utf-8')
+
+    components_offset = _HEADER.size
+    relationships_offset = components_offset + len(component_data)
+    index_offset = relationships_offset + len(relationship_data)
+    info_offset = index_offset + len(id_index)
+    strings_offset = info_offset + len(info)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0,
+        int(layout.screen_dimensions[0]), int(layout.screen_dimensions[1]),
+        float(layout.confidence_score),
+        len(components), relationship_count,
+        components_offset, relationships_offset, index_offset,
+        info_offset, len(info), strings_offset
+    )
+    return b''.join((header, component_data, relationship_data, id_index, info, strings.data))
+
+
+def write_binary_layout(layout: UILayout, stream: IO[bytes]) -> None:
+    """Write a layout as .uilb to a binary stream"""
+    stream.write(pack_layout(layout))
+
+
+def structured_output_to_binary(data: Dict[str, Any]) -> bytes:
+    """.uilb bytes for the dict produced by export_structured_output"""
+    return pack_layout(layout_from_structured_output(data))
+
+
+def binary_to_structured_output(layout: 'MappedLayout') -> Dict[str, Any]:
+    """The export_structured_output dict for a mapped (or any) layout"""
+    return {
+        "screen_analysis": {
+            **summary_record(layout),
+            "components": [component_record(comp) for comp in layout.components.values()],
+            "relationships": [relationship_record(rel) for rel in layout.relationships],
+            **({"hierarchy": hierarchy_record(layout)} if getattr(layout, 'hierarchy', None) is not None else {})
+        }
+    }
+
+
+def open_binary_layout(path: str) -> 'MappedLayout':
+    return MappedLayout(path)
+
+
+def load_layout(path: str):
+    """Read a saved analysis: JSON, NDJSON or memory-mapped .uilb (by extension)"""
+    if path.endswith('.uilb'):
+        return open_binary_layout(path)
+    with open(path) as f:
+        if path.endswith('.ndjson'):
+            return read_layout_ndjson(f)
+        return layout_from_structured_output(json.load(f))
+
+
+class MappedLayout:
+    """Read-only layout backed by a memory-mapped .uilb file.
+
+    Opening reads only the header and the small info block; components and
+    relationships are decoded from the mapping when accessed, so looking up
+    one component by ID (a binary search over the ID index) touches a
+    handful of pages rather than the whole file. `components` and
+    `relationships` are read-only views like ColumnarLayout's, so code
+    written against UILayout works as is. Close the layout (or use it as a
+    context manager) to release the mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except Exception:
+            self._map.close()
+            raise
+
+        self.components = ComponentView(self)
+        self.relationships = RelationshipView(self)
+
+    def _read_header(self) -> None:
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{self.path}: too short for a .uilb layout")
+        (magic, version, _flags, width, height, confidence_score,
+         self.component_count, self.relationship_count,
+         self._components_offset, self._relationships_offset, self._index_offset,
+         info_offset, info_size, self._strings_offset) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a .uilb layout")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported .uilb version {version}")
+
+        self.screen_dimensions = (width, height)
+        self.confidence_score = confidence_score
+        info = json.loads(self._map[info_offset:info_offset + info_size])
+        self.ambiguities: List[str] = info.get('ambiguities', [])
+        self.metadata: Dict[str, Any] = info.get('metadata', {})
+        self.timings: Dict[str, Dict[str, float]] = info.get('timings', {})
+        self._parents: Optional[List[int]] = info.get('parents')
+        self._hierarchy: Optional[ComponentTree] = None
+
+    @property
+    def hierarchy(self) -> Optional[ComponentTree]:
+        """Containment tree, decoded from the stored parent rows on first access"""
+        if self._hierarchy is None and self._parents is not None:
+            ids = [self.component_id(row) for row in range(self.component_count)]
+            self._hierarchy = ComponentTree({
+                comp_id: ids[parent] if parent >= 0 else None for comp_id, parent in zip(ids, self._parents)
+            })
+        return self._hierarchy
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> 'MappedLayout':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if length == _NONE:
+            return None
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _record(self, row: int) -> tuple:
+        if not 0 <= row < self.component_count:
+            raise IndexError("component row out of range")
+        return _COMPONENT.unpack_from(self._map, self._components_offset + row * _COMPONENT.size)
+
+    def component_id(self, row: int) -> str:
+        id_offset, id_length = self._record(row)[:2]
+        return self._string(id_offset, id_length)
+
+    def row_of(self, component_id: str) -> int:
+        """Row of a component ID, by binary search over the sorted ID index"""
+        target = component_id.encode('utf-8')
+        low, high = 0, self.component_count
+        while low < high:
+            middle = (low + high) // 2
+            row = _ROW.unpack_from(self._map, self._index_offset + middle * _ROW.size)[0]
+            id_offset, id_length = _COMPONENT.unpack_from(
+                self._map, self._components_offset + row * _COMPONENT.size)[:2]
+            start = self._strings_offset + id_offset
+            candidate = self._map[start:start + id_length]
+            if candidate == target:
+                return row
+            if candidate < target:
+                low = middle + 1
+            else:
+                high = middle
+        raise KeyError(component_id)
+
+    def bounding_box(self, row: int) -> BoundingBox:
+        return BoundingBox(*self._record(row)[5:9])
+
+    def component(self, row: int) -> UIComponent:
+        (id_offset, id_length, type_code, flags, rgb, x, y, width, height, confidence,
+         text_offset, text_length, extras_offset, extras_length) = self._record(row)
+        extras = json.loads(self._string(extras_offset, extras_length) or '{}')
+
+        color_info = color_info_from_rgb(rgb if flags & _HAS_COLOR else None, extras.get('color_info'))
+
+        return UIComponent(
+            id=self._string(id_offset, id_length),
+            component_type=COMPONENT_TYPES[type_code],
+            bounding_box=BoundingBox(x, y, width, height),
+            text_content=self._string(text_offset, text_length),
+            color_info=color_info,
+            confidence=_f32(confidence),
+            attributes=extras.get('attributes', {})
+        )
+
+    def _endpoint(self, row: int) -> Tuple[str, str]:
+        """(ID, short description) of a component, for building relationships"""
+        record = self._record(row)
+        return self._string(*record[:2]), describe_component(COMPONENT_TYPES[record[2]], self._string(*record[10:12]))
+
+    def _relationship(self, fields: tuple, endpoint) -> SpatialRelationship:
+        row1, row2, type_code, distance, confidence, description_offset, description_length = fields
+        (id1, phrase1), (id2, phrase2) = endpoint(row1), endpoint(row2)
+        relation_type = RELATION_TYPES[type_code]
+        description = self._string(description_offset, description_length)
+        return SpatialRelationship(
+            component1_id=id1,
+            component2_id=id2,
+            relation_type=relation_type,
+            distance=_f32(distance),
+            confidence=_f32(confidence),
+            description=description if description is not None else describe_relationship(
+                relation_type, phrase1, phrase2
+            )
+        )
+
+    def relationship(self, index: int) -> SpatialRelationship:
+        fields = _RELATIONSHIP.unpack_from(self._map, self._relationships_offset + index * _RELATIONSHIP.size)
+        return self._relationship(fields, self._endpoint)
+
+    def iter_relationships(self) -> Iterator[SpatialRelationship]:
+        """All relationships in order; faster than indexing one by one.
+
+        Unpacks the relationship section in one pass and decodes each
+        component endpoint once rather than once per relationship.
+        """
+        endpoints: Dict[int, Tuple[str, str]] = {}
+
+        def endpoint(row: int) -> Tuple[str, str]:
+            found = endpoints.get(row)
+            if found is None:
+                found = endpoints[row] = self._endpoint(row)
+            return found
+
+        end = self._relationships_offset + self.relationship_count * _RELATIONSHIP.size
+        for fields in _RELATIONSHIP.iter_unpack(self._map[self._relationships_offset:end]):
+            yield self._relationship(fields, endpoint)
+
+    def to_layout(self) -> UILayout:
+        """Decode everything into a regular UILayout of dataclasses"""
+        return UILayout(
+            components=dict(self.components.items()),
+            relationships=list(self.relationships),
+            screen_dimensions=self.screen_dimensions,
+            ambiguities=list(self.ambiguities),
+            confidence_score=self.confidence_score,
+            metadata=dict(self.metadata),
+            timings=dict(self.timings),
+            hierarchy=self.hierarchy
+        )
+
@@ -0,0 +1,139 @@
+import numpy as np
+from typing import Sequence, Tuple, List
+
+# Upper bound on IoU matrix cells computed at once (keeps memory flat for large N)
+MAX_CHUNK_CELLS = 4_000_000
+
+
+def boxes_to_array(bboxes: Sequence[Tuple[int, int, int, int]]) -> np.ndarray:
+    """Convert (x, y, width, height) boxes to an (N, 4) float64 array of x1, y1, x2, y2"""
+    if len(bboxes) == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    xywh = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    return np.column_stack((
+        xywh[:, 0], xywh[:, 1], xywh[:, 0] + xywh[:, 2], xywh[:, 1] + xywh[:, 3]
+    ))
+
+
+def pairwise_intersection(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Intersection area between every box in boxes_a and every box in boxes_b"""
+    x_overlap = np.maximum(
+        0.0,
+        np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2]) - np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    )
+    y_overlap = np.maximum(
+        0.0,
+        np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3]) - np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    )
+    return x_overlap * y_overlap
+
+
+def pairwise_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """IoU between every box in boxes_a and every box in boxes_b (x1, y1, x2, y2 rows)"""
+    intersection = pairwise_intersection(boxes_a, boxes_b)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    iou = np.zeros_like(intersection)
+    np.divide(intersection, union, out=iou, where=union > 0)
+    return iou
+
+
+def _candidate_windows(boxes: np.ndarray) -> Tuple[np.ndarray, List[Tuple[int, int, int, int]]]:
+    """Sort boxes by x1 and yield chunks with the slice of boxes they can overlap.
+
+    Returns the sort order plus (start, end, lo, hi) windows: rows order[start:end]
+    can only intersect boxes order[lo:hi], because any box overlapping them
+    must start before the chunk's right-most x2 and after x1 - widest box.
+    """
+    order = np.argsort(boxes[:, 0], kind='stable')
+    x1_sorted = boxes[order, 0]
+    x2_sorted = boxes[order, 2]
+    max_width = float(np.max(boxes[:, 2] - boxes[:, 0])) if len(boxes) else 0.0
+
+    chunk = max(1, MAX_CHUNK_CELLS // max(1, len(boxes)))
+    windows = []
+    for start in range(0, len(boxes), chunk):
+        end = min(start + chunk, len(boxes))
+        lo = int(np.searchsorted(x1_sorted, x1_sorted[start] - max_width, side='left'))
+        hi = int(np.searchsorted(x1_sorted, np.max(x2_sorted[start:end]), side='left'))
+        windows.append((start, end, lo, max(hi, end)))
+    return order, windows
+
+
+def suppress_lower_confidence(boxes: np.ndarray, scores: np.ndarray,
+                              thresholds: np.ndarray) -> np.ndarray:
+    """Keep-mask dropping every box that overlaps a strictly more confident box.
+
+    A box i is dropped when some other box j has IoU(i, j) > thresholds[i]
+    and scores[j] > scores[i], regardless of whether j is itself dropped.
+    This is the original all-pairs duplicate filter, evaluated in blocks.
+    """
+    keep = np.ones(len(boxes), dtype=bool)
+    if len(boxes) < 2:
+        return keep
+
+    order, windows = _candidate_windows(boxes)
+    for start, end, lo, hi in windows:
+        rows = order[start:end]
+        cols = order[lo:hi]
+        iou = pairwise_iou(boxes[rows], boxes[cols])
+        dominated = (iou > thresholds[rows, None]) & (scores[None, cols] > scores[rows, None])
+        keep[rows] = ~dominated.any(axis=1)
+    return keep
+
+
+def greedy_nms(boxes: np.ndarray, scores: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Classic confidence-sorted greedy NMS; returns a keep-mask in input order.
+
+    Boxes are visited from most to least confident (ties keep input order);
+    each surviving box suppresses the remaining boxes whose IoU with it
+    exceeds the suppressed box's own threshold.
+    """
+    keep = np.zeros(len(boxes), dtype=bool)
+    if len(boxes) == 0:
+        return keep
+
+    remaining = np.argsort(-scores, kind='stable')
+    while remaining.size:
+        best = remaining[0]
+        keep[best] = True
+        rest = remaining[1:]
+        if rest.size == 0:
+            break
+        iou = pairwise_iou(boxes[best:best + 1], boxes[rest])[0]
+        remaining = rest[iou <= thresholds[rest]]
+    return keep
+
+
+def suppress_contained(boxes: np.ndarray, scores: np.ndarray, groups: np.ndarray,
+                       threshold: float = 0.7) -> np.ndarray:
+    """Keep-mask dropping boxes mostly covered by a bigger box from another group.
+
+    Box i is dropped when a box j with groups[j] != groups[i] covers more than
+    threshold of i's area and j is larger (ties broken by score, then index).
+    Used to merge partial detections cut by tile seams with the complete
+    detection from the neighbouring tile.
+    """
+    keep = np.ones(len(boxes), dtype=bool)
+    if len(boxes) < 2:
+        return keep
+
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order, windows = _candidate_windows(boxes)
+    for start, end, lo, hi in windows:
+        rows = order[start:end]
+        cols = order[lo:hi]
+        covered = pairwise_intersection(boxes[rows], boxes[cols]) > threshold * areas[rows, None]
+        bigger = (
+            (areas[None, cols] > areas[rows, None]) |
+            ((areas[None, cols] == areas[rows, None]) & (
+                (scores[None, cols] > scores[rows, None]) |
+                ((scores[None, cols] == scores[rows, None]) & (cols[None, :] < rows[:, None]))
+            ))
+        )
+        other_group = groups[None, cols] != groups[rows, None]
+        keep[rows] = ~(covered & bigger & other_group).any(axis=1)
+    return keep
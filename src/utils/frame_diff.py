@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+from typing import List, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+
+def rects_intersect(a: Rect, b: Rect) -> bool:
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+def union_rect(a: Rect, b: Rect) -> Rect:
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x1, y1, x2 - x1, y2 - y1)
+
+
+def merge_rects(rects: List[Rect]) -> List[Rect]:
+    """Union overlapping rectangles until the remaining ones are disjoint"""
+    merged = list(rects)
+    changed = True
+    while changed:
+        changed = False
+        result: List[Rect] = []
+        for rect in merged:
+            for index, existing in enumerate(result):
+                if rects_intersect(rect, existing):
+                    result[index] = union_rect(rect, existing)
+                    changed = True
+                    break
+            else:
+                result.append(rect)
+        merged = result
+    return merged
+
+
+def changed_regions(prev_gray: np.ndarray, new_gray: np.ndarray,
+                    pixel_threshold: int = 25, padding: int = 8,
+                    min_area: int = 16) -> List[Rect]:
+    """Bounding rectangles of the areas that differ between two grayscale frames.
+
+    Differences above pixel_threshold are dilated by padding pixels (so
+    nearby changes merge and anti-aliased edges are included), then the
+    outer contours' bounding boxes are merged into disjoint rectangles.
+    """
+    if prev_gray.shape != new_gray.shape:
+        raise ValueError("Frames must have the same dimensions")
+
+    diff = cv2.absdiff(prev_gray, new_gray)
+    _, mask = cv2.threshold(diff, pixel_threshold, 255, cv2.THRESH_BINARY)
+    if not mask.any():
+        return []
+
+    if padding > 0:
+        kernel = np.ones((2 * padding + 1, 2 * padding + 1), dtype=np.uint8)
+        mask = cv2.dilate(mask, kernel)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    rects = [cv2.boundingRect(contour) for contour in contours]
+    rects = [rect for rect in rects if rect[2] * rect[3] >= min_area]
+    return merge_rects(rects)
@@ -1,26 +1,145 @@
 import cv2
 import numpy as np
-from PIL import Image
-import easyocr
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Any, Optional, Union
+import io
+import logging
+import os
+import threading
+
+from utils.profiler import stage
+from utils.box_ops import boxes_to_array, pairwise_iou, pairwise_intersection
+from utils.log import get_logger, SAMPLED
+from utils.ocr_cache import crop_key
+
+logger = get_logger(__name__)
+
+# Pixel budget for one summed-area table: keeps int32 sums of 255-valued
+# pixels from overflowing and caps the table at ~50 MB for huge pages
+INTEGRAL_MAX_PIXELS = 4_000_000
+
+DEFAULT_COLOR_INFO = {'dominant_rgb': 'rgb(128, 128, 128)', 'dominant_hex': '#808080'}
+
+# Anything analyze_image accepts: a decoded BGR array, encoded PNG/JPEG bytes or a path
+ImageSource = Union[np.ndarray, bytes, bytearray, memoryview, str, os.PathLike]
 
 class ImageProcessor:
     def __init__(self):
-        self.ocr_reader = easyocr.Reader(['en'])
+        # Built on first OCR call: importing easyocr pulls in torch and the
+        # reader loads model weights, which only analysis needs
+        self._ocr_reader = None
+        # Why the reader could not be created; re-raised instead of retrying
+        # the model download for every image
+        self._ocr_reader_error: Optional[Exception] = None
+        self._reader_lock = threading.Lock()
+        
+        # The reader is shared by tile/async worker threads; easyocr is not
+        # documented as thread-safe, so recognition calls are serialized
+        self._ocr_lock = threading.Lock()
+        
+        # Size window (exclusive) for rectangles kept by _detect_rectangles
+        self.rectangle_size_limits = {
+            'min_width': 20, 'max_width': 500,
+            'min_height': 20, 'max_height': 200
+        }
+        
+        # cv2.HoughCircles parameters used by _detect_circles
+        self.hough_params = {
+            'dp': 1, 'min_dist': 20,
+            'param1': 50, 'param2': 30,
+            'min_radius': 10, 'max_radius': 100
+        }
+        
+        # Color extraction: 'mean' is the average color of each box;
+        # 'palette' clusters up to max_sample_pixels per box with k-means
+        # and reports the largest cluster as the dominant color
+        self.color_params = {
+            'mode': 'mean',
+            'palette_size': 3,
+            'max_sample_pixels': 2000
+        }
+        
+        # Multi-scale shape detection: with scale < 1, rectangles and circles
+        # are proposed on a downscaled copy and each proposal is re-detected
+        # at full resolution within refine_margin pixels of it
+        self.multiscale_params = {
+            'scale': 1.0,
+            'refine_margin': 8,
+            'min_refine_iou': 0.5
+        }
+        
+        # Two-stage OCR: text regions are proposed first ('detector' is
+        # easyocr's own text detector, 'morphology' a much cheaper OpenCV
+        # gradient/closing pass), then only proposals of at least min_area
+        # pixels are cropped and recognized, recognition_batch_size at a time.
+        # Proposals covered (by covered_threshold of their area) by a
+        # detect_ui_elements result whose type is in skip_covered_by are not
+        # recognized at all
+        self.ocr_params = {
+            'proposer': 'detector',
+            'min_area': 0,
+            'recognition_batch_size': 1,
+            'skip_covered_by': [],
+            'covered_threshold': 0.9
+        }
+        
+        # Optional utils.ocr_cache.RecognitionCache consulted between text
+        # proposal and recognition; a hit skips recognizing that crop. Not
+        # part of get_config: a cache hit returns what recognition would
+        self.recognition_cache = None
+    
+    @property
+    def ocr_reader(self):
+        """The easyocr reader, created on first access.
+        
+        If creating it fails (e.g. the model cannot be downloaded), the error
+        is logged once and re-raised on every later access without retrying.
+        """
+        if self._ocr_reader is None:
+            with self._reader_lock:
+                if self._ocr_reader_error is not None:
+                    raise self._ocr_reader_error
+                if self._ocr_reader is None:
+                    try:
+                        import easyocr
+                        self._ocr_reader = easyocr.Reader(['en'])
+                    except Exception as e:
+                        logger.error("Could not load the OCR model, text recognition is disabled: %s", e)
+                        self._ocr_reader_error = e
+                        raise
+        return self._ocr_reader
+    
+    @ocr_reader.setter
+    def ocr_reader(self, reader) -> None:
+        self._ocr_reader = reader
+        self._ocr_reader_error = None
+    
+    def warm_up(self) -> None:
+        """Load the OCR model now rather than on the first analysis"""
+        self.ocr_reader
+    
+    def get_config(self) -> Dict[str, Any]:
+        """Parameters that influence detection output (used for cache keys)"""
+        return {
+            'ocr_languages': ['en'],
+            'rectangle_size_limits': dict(self.rectangle_size_limits),
+            'hough_params': dict(self.hough_params),
+            'color_params': dict(self.color_params),
+            'multiscale_params': dict(self.multiscale_params),
+            'ocr_params': dict(self.ocr_params)
+        }
         
     def preprocess_image(self, image_path: str) -> np.ndarray:
         """Load and preprocess the image with better error handling"""
-        print(f"DEBUG: Attempting to load image from: {image_path}")
+        logger.debug("Loading image from %s", image_path)
         
         # Check if file exists
-        import os
         if not os.path.exists(image_path):
             raise ValueError(f"Image file does not exist: {image_path}")
         
         # Try loading with OpenCV
         image = cv2.imread(image_path)
         if image is None:
-            print(f"DEBUG: OpenCV failed to load {image_path}")
+            logger.debug("OpenCV failed to load %s, trying PIL", image_path)
             
             # Try loading with PIL as backup
             try:
@@ -28,70 +147,375 @@ class ImageProcessor:
                 pil_image = PILImage.open(image_path)
                 # Convert PIL to OpenCV format
                 image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-                print("DEBUG: Successfully loaded with PIL")
+                logger.debug("Loaded %s with PIL", image_path)
             except Exception as e:
                 raise ValueError(f"Could not load image from {image_path}. Error: {e}")
         else:
-            print(f"DEBUG: Successfully loaded with OpenCV. Shape: {image.shape}")
+            logger.debug("Loaded %s with OpenCV, shape %s", image_path, image.shape)
+        
+        return image
+    
+    def load_image(self, source: ImageSource) -> np.ndarray:
+        """Decode any supported image source into a BGR uint8 array exactly once"""
+        if isinstance(source, np.ndarray):
+            if source.ndim == 2:
+                return cv2.cvtColor(source, cv2.COLOR_GRAY2BGR)
+            if source.ndim == 3 and source.shape[2] == 4:
+                return cv2.cvtColor(source, cv2.COLOR_BGRA2BGR)
+            if source.ndim == 3 and source.shape[2] == 3:
+                return source
+            raise ValueError(f"Unsupported image array shape: {source.shape}")
+        
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return self.decode_image_bytes(source)
+        
+        return self.preprocess_image(os.fspath(source))
+    
+    def decode_image_bytes(self, data: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+        """Decode in-memory PNG/JPEG (or any PIL-readable) bytes without temp files"""
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if buffer.size == 0:
+            raise ValueError("Empty image buffer")
+        
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if image is None:
+            try:
+                from PIL import Image as PILImage
+                pil_image = PILImage.open(io.BytesIO(bytes(data))).convert('RGB')
+                image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            except Exception as e:
+                raise ValueError(f"Could not decode image bytes. Error: {e}")
         
         return image
     
-    def extract_text_regions(self, image: np.ndarray) -> List[Dict]:
-        """Extract text regions using OCR with error handling"""
+    @staticmethod
+    def to_grayscale(image: np.ndarray) -> np.ndarray:
+        """Grayscale conversion shared by OCR and shape detection"""
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    
+    def extract_text_regions(self, image: np.ndarray, gray: Optional[np.ndarray] = None,
+                             ui_elements: Optional[List[Dict]] = None,
+                             stats: Optional[Dict[str, int]] = None) -> List[Dict]:
+        """Extract text regions using OCR with error handling.
+        
+        ui_elements (detect_ui_elements results) enable the skip_covered_by
+        filter. Proposal / recognition counts and the recognized area are
+        added into stats when given (see ocr_report).
+        """
         if image is None or image.size == 0:
-            print("DEBUG: Empty image passed to extract_text_regions")
+            logger.warning("Empty image passed to extract_text_regions")
             return []
         
         try:
-            results = self.ocr_reader.readtext(image)
-            text_regions = []
+            if gray is None:
+                gray = self.to_grayscale(image)
             
-            for (bbox, text, confidence) in results:
-                # Convert bbox to our format
-                x_coords = [point[0] for point in bbox]
-                y_coords = [point[1] for point in bbox]
-                
-                x = int(min(x_coords))
-                y = int(min(y_coords))
-                width = int(max(x_coords) - min(x_coords))
-                height = int(max(y_coords) - min(y_coords))
-                
-                text_regions.append({
-                    'bbox': (x, y, width, height),
-                    'text': text,
-                    'confidence': confidence
-                })
-            
-            return text_regions
+            with self._ocr_lock:
+                with stage('ocr_detect') as timer:
+                    horizontal_list, free_list = self._propose_text(image, gray)
+                    timer.add_items(len(horizontal_list) + len(free_list))
+                results = self._recognize_proposals(gray, horizontal_list, free_list, ui_elements, stats)
+            return self._to_text_regions(results)
         except Exception as e:
-            print(f"DEBUG: OCR failed: {e}")
+            logger.warning("OCR failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return []
     
-    def detect_ui_elements(self, image: np.ndarray) -> List[Dict]:
+    def extract_text_regions_batch(self, images: List[np.ndarray],
+                                   grays: Optional[List[np.ndarray]] = None,
+                                   stats: Optional[List[Dict[str, int]]] = None) -> List[List[Dict]]:
+        """OCR several images, running text detection on same-sized images as one batch.
+        
+        The skip_covered_by filter needs shape detections and is not applied
+        here; stats, when given, holds one dict per image.
+        """
+        if grays is None:
+            grays = [self.to_grayscale(image) for image in images]
+        if stats is None:
+            stats = [None] * len(images)
+        
+        # easyocr's detector batches only equally sized images (a 4-D array)
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for index, image in enumerate(images):
+            groups.setdefault(image.shape, []).append(index)
+        
+        results: List[List[Dict]] = [[] for _ in images]
+        for indices in groups.values():
+            if len(indices) == 1 or self.ocr_params['proposer'] != 'detector':
+                for index in indices:
+                    results[index] = self.extract_text_regions(images[index], grays[index], stats=stats[index])
+                continue
+            
+            try:
+                with self._ocr_lock:
+                    with stage('ocr_detect', items=len(indices)):
+                        horizontal_lists, free_lists = self.ocr_reader.detect(
+                            np.stack([images[index] for index in indices]), reformat=False
+                        )
+                    recognized = [
+                        self._recognize_proposals(grays[index], horizontal_list, free_list, None, stats[index])
+                        for index, horizontal_list, free_list in zip(indices, horizontal_lists, free_lists)
+                    ]
+                for index, result in zip(indices, recognized):
+                    results[index] = self._to_text_regions(result)
+            except Exception as e:
+                if self._ocr_reader_error is not None:
+                    # No reader, so the per-image path would fail the same way
+                    continue
+                logger.warning("Batched OCR failed, retrying images one by one: %s", e)
+                for index in indices:
+                    if stats[index] is not None:
+                        stats[index].clear()
+                    results[index] = self.extract_text_regions(images[index], grays[index], stats=stats[index])
+        
+        return results
+    
+    def _propose_text(self, image: np.ndarray, gray: np.ndarray) -> Tuple[List, List]:
+        """Stage one: candidate text boxes as easyocr (horizontal_list, free_list)"""
+        if self.ocr_params['proposer'] == 'morphology':
+            return self._morphology_text_proposals(gray), []
+        horizontal_list, free_list = self.ocr_reader.detect(image, reformat=False)
+        return horizontal_list[0], free_list[0]
+    
+    @staticmethod
+    def _morphology_text_proposals(gray: np.ndarray) -> List[List[int]]:
+        """Text-line boxes [x_min, x_max, y_min, y_max] from a morphological pass.
+        
+        Strong local contrast (morphological gradient, Otsu threshold) is
+        joined along the line with a wide closing; blobs that are densely
+        filled and no taller than a large heading are kept.
+        """
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        joined = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+        # A full tree: text inside a bordered button is nested in the border's contour
+        contours, hierarchy = cv2.findContours(joined, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        
+        height, width = gray.shape[:2]
+        boxes = [cv2.boundingRect(contour) for contour in contours]
+        accepted = [
+            8 <= h <= 120 and w >= 8 and
+            # Borders and outlines are sparse; glyph runs fill their box
+            cv2.countNonZero(binary[y:y + h, x:x + w]) >= 0.3 * w * h
+            for x, y, w, h in boxes
+        ]
+        
+        proposals = []
+        for index, (x, y, w, h) in enumerate(boxes):
+            if not accepted[index]:
+                continue
+            # Holes inside an accepted text blob come back as its descendants
+            parent = hierarchy[0][index][3]
+            while parent >= 0 and not accepted[parent]:
+                parent = hierarchy[0][parent][3]
+            if parent >= 0:
+                continue
+            # Same margin easyocr's detector leaves around glyphs
+            pad = max(2, h // 10)
+            proposals.append([max(0, x - pad), min(width, x + w + pad), max(0, y - pad), min(height, y + h + pad)])
+        return proposals
+    
+    def _recognize_proposals(self, gray: np.ndarray, horizontal_list: List, free_list: List,
+                             ui_elements: Optional[List[Dict]],
+                             stats: Optional[Dict[str, int]]) -> List:
+        """Stage two: filter proposals, then recognize the rest in one call"""
+        params = self.ocr_params
+        proposals = [('horizontal', box, (box[0], box[2], box[1] - box[0], box[3] - box[2]))
+                     for box in horizontal_list]
+        for polygon in free_list:
+            xs, ys = [point[0] for point in polygon], [point[1] for point in polygon]
+            proposals.append(('free', polygon, (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))))
+        total = len(proposals)
+        
+        proposals = [entry for entry in proposals if entry[2][2] * entry[2][3] >= params['min_area']]
+        small = total - len(proposals)
+        
+        covered = 0
+        covering = [element['bbox'] for element in ui_elements or ()
+                    if element['type'] in params['skip_covered_by']]
+        if proposals and covering:
+            boxes = boxes_to_array([entry[2] for entry in proposals])
+            inside = pairwise_intersection(boxes, boxes_to_array(covering)).max(axis=1)
+            areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-9)
+            keep = inside / areas < params['covered_threshold']
+            covered = int((~keep).sum())
+            proposals = [entry for entry, kept in zip(proposals, keep) if kept]
+        
+        if self.recognition_cache is not None and proposals:
+            return self._recognize_with_cache(gray, proposals, stats, (total, small, covered))
+        
+        results = self._recognize(gray, proposals)
+        self._add_ocr_stats(stats, proposals, total, small, covered)
+        return results
+    
+    def _recognize(self, gray: np.ndarray, proposals: List) -> List:
+        with stage('ocr_recognize') as timer:
+            results = []
+            if proposals:
+                results = self.ocr_reader.recognize(
+                    gray,
+                    [box for kind, box, _ in proposals if kind == 'horizontal'],
+                    [box for kind, box, _ in proposals if kind == 'free'],
+                    batch_size=self.ocr_params['recognition_batch_size'], reformat=False
+                )
+            timer.add_items(len(proposals))
+        return results
+    
+    @staticmethod
+    def _add_ocr_stats(stats: Optional[Dict[str, int]], recognized: List, total: int, small: int,
+                       covered: int, cache_hits: Optional[int] = None) -> None:
+        if stats is None:
+            return
+        counts = [('proposals', total), ('skipped_small', small), ('skipped_covered', covered),
+                  ('recognized', len(recognized)),
+                  ('recognized_area', int(sum(w * h for _, _, (_, _, w, h) in recognized)))]
+        if cache_hits is not None:
+            counts.append(('cache_hits', cache_hits))
+        for key, value in counts:
+            stats[key] = stats.get(key, 0) + value
+    
+    @staticmethod
+    def _proposal_geometry(gray: np.ndarray, kind: str, box, rect) -> Tuple[tuple, Tuple[int, int, int, int]]:
+        """(key matching easyocr's result box for this proposal, clipped x1, y1, x2, y2 of its crop)"""
+        height, width = gray.shape[:2]
+        if kind == 'horizontal':
+            x1, x2, y1, y2 = max(0, box[0]), min(box[1], width), max(0, box[2]), min(box[3], height)
+            return ('horizontal', int(x1), int(y1), int(x2), int(y2)), (int(x1), int(y1), int(x2), int(y2))
+        x, y, w, h = rect
+        clipped = (max(0, int(x)), max(0, int(y)), min(width, int(x + w)), min(height, int(y + h)))
+        return ('free',) + tuple(tuple(float(v) for v in point) for point in box), clipped
+    
+    @staticmethod
+    def _result_geometry(kind: str, polygon) -> tuple:
+        if kind == 'horizontal':
+            (x1, y1), _, (x2, y2), _ = polygon
+            return ('horizontal', int(x1), int(y1), int(x2), int(y2))
+        return ('free',) + tuple(tuple(float(v) for v in point) for point in polygon)
+    
+    def _recognize_with_cache(self, gray: np.ndarray, proposals: List,
+                              stats: Optional[Dict[str, int]], counts: Tuple[int, int, int]) -> List:
+        """Recognize only the proposals whose normalized crop is not cached.
+        
+        Results come back in proposal order. easyocr returns each crop's box
+        (clipped for horizontal proposals, the polygon itself for free
+        ones), which is how recognized results are matched back to their
+        crop keys.
+        """
+        cache = self.recognition_cache
+        results: List[Optional[tuple]] = [None] * len(proposals)
+        pending: Dict[tuple, Tuple[int, Optional[str], int]] = {}
+        to_recognize = []
+        with stage('ocr_cache_lookup', items=len(proposals)):
+            for index, (kind, box, rect) in enumerate(proposals):
+                geometry, (x1, y1, x2, y2) = self._proposal_geometry(gray, kind, box, rect)
+                key = crop_key(gray[y1:y2, x1:x2])
+                cached = cache.get(key, x2 - x1) if key is not None else None
+                if cached is None:
+                    pending[geometry] = (index, key, x2 - x1)
+                    to_recognize.append(proposals[index])
+                    continue
+                polygon = ([[x1, y1], [x2, y1], [x2, y2], [x1, y2]] if kind == 'horizontal' else box)
+                results[index] = (polygon, cached[0], cached[1])
+        
+        unmatched = []
+        for polygon, text, confidence in self._recognize(gray, to_recognize):
+            geometry = self._result_geometry('free', polygon)
+            if geometry not in pending:
+                geometry = self._result_geometry('horizontal', polygon)
+            index, key, width = pending.pop(geometry, (None, None, None))
+            if index is None:
+                unmatched.append((polygon, text, confidence))
+                continue
+            if key is not None:
+                cache.put(key, text, confidence, width)
+            results[index] = (polygon, text, confidence)
+        
+        self._add_ocr_stats(stats, to_recognize, *counts, cache_hits=len(proposals) - len(to_recognize))
+        return [result for result in results if result is not None] + unmatched
+    
+    def ocr_report(self, stats: Dict[str, int], frame_shape: Tuple[int, ...]) -> Dict[str, Any]:
+        """Metadata entry for OCR stats: counts and recognized_fraction of the frame area"""
+        frame_area = max(1, frame_shape[0] * frame_shape[1])
+        report = {
+            'proposer': self.ocr_params['proposer'],
+            'proposals': stats.get('proposals', 0),
+            'recognized': stats.get('recognized', 0),
+            'skipped_small': stats.get('skipped_small', 0),
+            'skipped_covered': stats.get('skipped_covered', 0),
+            'recognized_fraction': round(stats.get('recognized_area', 0) / frame_area, 4)
+        }
+        if 'cache_hits' in stats:
+            # Proposals answered by the recognition cache instead of recognized
+            report['cache_hits'] = stats['cache_hits']
+        return report
+    
+    @staticmethod
+    def _to_text_regions(results) -> List[Dict]:
+        """Convert easyocr (polygon, text, confidence) results to our region dicts"""
+        text_regions = []
+        
+        for (bbox, text, confidence) in results:
+            # Convert bbox to our format
+            x_coords = [point[0] for point in bbox]
+            y_coords = [point[1] for point in bbox]
+            
+            x = int(min(x_coords))
+            y = int(min(y_coords))
+            width = int(max(x_coords) - min(x_coords))
+            height = int(max(y_coords) - min(y_coords))
+            
+            text_regions.append({
+                'bbox': (x, y, width, height),
+                'text': text,
+                'confidence': confidence
+            })
+        
+        return text_regions
+    
+    def detect_ui_elements(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> List[Dict]:
         """Detect UI elements using computer vision techniques"""
         if image is None or image.size == 0:
-            print("DEBUG: Empty image passed to detect_ui_elements")
+            logger.warning("Empty image passed to detect_ui_elements")
             return []
         
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = self.to_grayscale(image)
+            
+            scale = self.multiscale_params['scale']
+            small = None
+            if scale < 1.0:
+                with stage('downscale'):
+                    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
             # Detect rectangles (potential buttons, input fields)
-            rectangles = self._detect_rectangles(gray)
+            with stage('detect_rectangles') as timer:
+                if small is None:
+                    rectangles = self._detect_rectangles(gray)
+                else:
+                    rectangles = self._detect_rectangles_multiscale(gray, small, scale)
+                timer.add_items(len(rectangles))
             
             # Detect circular elements (potential buttons, icons)
-            circles = self._detect_circles(gray)
+            with stage('detect_circles') as timer:
+                if small is None:
+                    circles = self._detect_circles(gray)
+                else:
+                    circles = self._detect_circles_multiscale(gray, small, scale)
+                timer.add_items(len(circles))
             
             # Combine all detected elements
             elements = rectangles + circles
             
             return elements
         except Exception as e:
-            print(f"DEBUG: UI element detection failed: {e}")
+            logger.warning("UI element detection failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return []
     
-    def _detect_rectangles(self, gray_image: np.ndarray) -> List[Dict]:
+    def _detect_rectangles(self, gray_image: np.ndarray,
+                           limits: Optional[Dict[str, float]] = None) -> List[Dict]:
         """Detect rectangular UI elements with overflow protection"""
+        limits = limits or self.rectangle_size_limits
         try:
             # Edge detection
             edges = cv2.Canny(gray_image, 50, 150, apertureSize=3)
@@ -110,7 +534,8 @@ class ImageProcessor:
                     x, y, w, h = cv2.boundingRect(contour)
                     
                     # Filter by size (avoid too small or too large elements)
-                    if 20 < w < 500 and 20 < h < 200:
+                    if (limits['min_width'] < w < limits['max_width'] and
+                            limits['min_height'] < h < limits['max_height']):
                         rectangles.append({
                             'bbox': (x, y, w, h),
                             'type': 'rectangle',
@@ -119,15 +544,18 @@ class ImageProcessor:
             
             return rectangles
         except Exception as e:
-            print(f"DEBUG: Rectangle detection failed: {e}")
+            logger.warning("Rectangle detection failed: %s", e)
             return []
     
-    def _detect_circles(self, gray_image: np.ndarray) -> List[Dict]:
+    def _detect_circles(self, gray_image: np.ndarray,
+                        params: Optional[Dict[str, float]] = None) -> List[Dict]:
         """Detect circular UI elements with overflow protection"""
+        params = params or self.hough_params
         try:
             circles = cv2.HoughCircles(
-                gray_image, cv2.HOUGH_GRADIENT, 1, 20,
-                param1=50, param2=30, minRadius=10, maxRadius=100
+                gray_image, cv2.HOUGH_GRADIENT, params['dp'], params['min_dist'],
+                param1=params['param1'], param2=params['param2'],
+                minRadius=params['min_radius'], maxRadius=params['max_radius']
             )
             
             circle_elements = []
@@ -144,38 +572,261 @@ class ImageProcessor:
             
             return circle_elements
         except Exception as e:
-            print(f"DEBUG: Circle detection failed: {e}")
+            logger.warning("Circle detection failed: %s", e)
             return []
     
+    @staticmethod
+    def _clip_window(x: int, y: int, w: int, h: int, shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """(x, y, w, h) window clipped to an image of the given shape"""
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(shape[1], x + w), min(shape[0], y + h)
+        return x1, y1, max(0, x2 - x1), max(0, y2 - y1)
+    
+    def _detect_rectangles_multiscale(self, gray: np.ndarray, small: np.ndarray, scale: float) -> List[Dict]:
+        """Propose rectangles on the downscaled image, then refine each at full resolution.
+        
+        A proposal keeps its scaled-up box when refinement finds no
+        rectangle overlapping it by min_refine_iou: four-sided contours are
+        already strong evidence, and the box is off by at most ~1/scale px.
+        """
+        limits = self.rectangle_size_limits
+        # Sizes are only known to within a pixel at low resolution
+        coarse_limits = {
+            'min_width': limits['min_width'] * scale - 1, 'max_width': limits['max_width'] * scale + 1,
+            'min_height': limits['min_height'] * scale - 1, 'max_height': limits['max_height'] * scale + 1
+        }
+        margin = self.multiscale_params['refine_margin']
+        
+        rectangles, seen = [], set()
+        for proposal in self._detect_rectangles(small, coarse_limits):
+            px, py, pw, ph = (int(round(v / scale)) for v in proposal['bbox'])
+            wx, wy, ww, wh = self._clip_window(px - margin, py - margin, pw + 2 * margin, ph + 2 * margin, gray.shape)
+            
+            candidates = self._detect_rectangles(gray[wy:wy + wh, wx:wx + ww])
+            bbox = None
+            if candidates:
+                boxes = [(x + wx, y + wy, w, h) for x, y, w, h in (c['bbox'] for c in candidates)]
+                overlaps = pairwise_iou(boxes_to_array([(px, py, pw, ph)]), boxes_to_array(boxes))[0]
+                best = int(np.argmax(overlaps))
+                if overlaps[best] >= self.multiscale_params['min_refine_iou']:
+                    bbox = boxes[best]
+            if bbox is None and (limits['min_width'] < pw < limits['max_width'] and
+                                 limits['min_height'] < ph < limits['max_height']):
+                bbox = (px, py, pw, ph)
+            
+            if bbox is not None and bbox not in seen:
+                seen.add(bbox)
+                rectangles.append({'bbox': bbox, 'type': 'rectangle', 'confidence': proposal['confidence']})
+        return rectangles
+    
+    def _detect_circles_multiscale(self, gray: np.ndarray, small: np.ndarray, scale: float) -> List[Dict]:
+        """Propose circles on the downscaled image, then fit each at full resolution.
+        
+        Coarse Hough votes are weaker (fewer edge pixels per circle), so the
+        accumulator threshold is lowered by sqrt(scale): downscaling also
+        smooths edges, which makes the remaining votes more coherent. Each proposal is
+        confirmed by fitting the full-resolution edge contours around it
+        (_fit_circle); proposals no contour confirms are dropped.
+        """
+        params = self.hough_params
+        coarse_params = dict(
+            params,
+            min_dist=max(1.0, params['min_dist'] * scale),
+            param2=max(8, int(round(params['param2'] * np.sqrt(scale)))),
+            min_radius=max(1, int(params['min_radius'] * scale)),
+            max_radius=max(2, int(np.ceil(params['max_radius'] * scale)))
+        )
+        margin = self.multiscale_params['refine_margin']
+        
+        circles, seen = [], set()
+        for proposal in self._detect_circles(small, coarse_params):
+            px, py, pw, _ = (v / scale for v in proposal['bbox'])
+            radius = pw / 2
+            # A coarse pixel is 1/scale full-resolution pixels
+            slack = 2.0 / scale + 0.2 * radius
+            reach = int(np.ceil(radius + slack)) + margin
+            wx, wy, ww, wh = self._clip_window(int(px + radius) - reach, int(py + radius) - reach,
+                                               2 * reach, 2 * reach, gray.shape)
+            
+            fit = self._fit_circle(gray[wy:wy + wh, wx:wx + ww],
+                                   (px + radius - wx, py + radius - wy, radius), slack)
+            if fit is None:
+                continue
+            cx, cy, r = fit[0] + wx, fit[1] + wy, fit[2]
+            if not params['min_radius'] <= r <= params['max_radius'] or cx - r < 0 or cy - r < 0:
+                continue
+            
+            bbox = (int(round(cx - r)), int(round(cy - r)), int(round(2 * r)), int(round(2 * r)))
+            if bbox not in seen:
+                seen.add(bbox)
+                circles.append({'bbox': bbox, 'type': 'circle', 'confidence': proposal['confidence']})
+        return circles
+    
+    def _fit_circle(self, window: np.ndarray, expected: Tuple[float, float, float],
+                    slack: float) -> Optional[Tuple[float, float, float]]:
+        """(cx, cy, r) of the edge contour in window best matching `expected`, or None.
+        
+        A contour qualifies when its enclosing circle is within `slack` of
+        the expected center and radius, its points lie on that circle (radial
+        spread under 10% of r) and they surround the center (12 of 16
+        angular sectors).
+        """
+        ex, ey, er = expected
+        high = self.hough_params['param1']
+        edges = cv2.Canny(window, high // 2, high)
+        contours, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+        
+        best, best_spread = None, 0.1
+        # A contour around at least half the smallest acceptable circle
+        min_points = max(8, int(np.pi * (er - slack)))
+        for contour in contours:
+            if len(contour) < min_points:
+                continue
+            (cx, cy), r = cv2.minEnclosingCircle(contour)
+            if abs(r - er) > slack or np.hypot(cx - ex, cy - ey) > slack or r <= 0:
+                continue
+            points = contour.reshape(-1, 2).astype(np.float64) - (cx, cy)
+            distances = np.hypot(points[:, 0], points[:, 1])
+            spread = distances.std() / r
+            if spread >= best_spread:
+                continue
+            sectors = np.unique(((np.arctan2(points[:, 1], points[:, 0]) + np.pi) / (2 * np.pi) * 16).astype(int) % 16)
+            if len(sectors) >= 12:
+                best, best_spread = (cx, cy, float(distances.mean())), spread
+        return best
+    
     def extract_color_info(self, image: np.ndarray, bbox: Tuple[int, int, int, int]) -> Dict[str, str]:
         """Extract dominant colors from a region with bounds checking"""
+        return self.extract_color_info_batch(image, [bbox])[0]
+    
+    def extract_color_info_batch(self, image: np.ndarray,
+                                 bboxes: List[Tuple[int, int, int, int]]) -> List[Dict[str, Any]]:
+        """Color info for many (x, y, w, h) boxes with one pass over the image.
+        
+        Mean colors come from a summed-area table, so each box costs four
+        lookups regardless of its size. Boxes outside the image get the
+        neutral gray default, as with extract_color_info.
+        """
+        if len(bboxes) == 0:
+            return []
+        with stage('extract_colors', items=len(bboxes)):
+            return self._extract_color_info_batch(image, bboxes)
+    
+    def _extract_color_info_batch(self, image: np.ndarray,
+                                  bboxes: List[Tuple[int, int, int, int]]) -> List[Dict[str, Any]]:
         try:
-            x, y, w, h = bbox
-            
-            # Check bounds
-            if (x < 0 or y < 0 or x + w > image.shape[1] or y + h > image.shape[0] or 
-                w <= 0 or h <= 0):
-                print(f"DEBUG: Invalid bbox {bbox} for image shape {image.shape}")
-                return {'dominant_rgb': 'rgb(128, 128, 128)', 'dominant_hex': '#808080'}
-            
-            roi = image[y:y+h, x:x+w]
+            boxes = np.asarray(bboxes, dtype=np.int64).reshape(-1, 4)
+            height, width = image.shape[:2]
+            x, y, w, h = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+            valid = (x >= 0) & (y >= 0) & (x + w <= width) & (y + h <= height) & (w > 0) & (h > 0)
+            # Per-box messages are only built when someone is listening
+            if logger.isEnabledFor(logging.DEBUG):
+                for bbox in boxes[~valid]:
+                    logger.debug("Invalid bbox %s for image shape %s", tuple(bbox.tolist()), image.shape, extra=SAMPLED)
             
-            if roi.size == 0:
-                return {'dominant_rgb': 'rgb(128, 128, 128)', 'dominant_hex': '#808080'}
+            results: List[Dict[str, Any]] = [dict(DEFAULT_COLOR_INFO) for _ in range(len(boxes))]
+            rows = np.flatnonzero(valid)
+            if rows.size == 0:
+                return results
             
-            # Convert to RGB
-            roi_rgb = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
+            if self.color_params['mode'] == 'palette':
+                for row in rows:
+                    results[row] = self._palette_color_info(image, tuple(int(v) for v in boxes[row]))
+                return results
             
-            # Reshape for clustering
-            pixels = roi_rgb.reshape(-1, 3)
+            sums = self._box_sums(image, boxes[rows])
+            # Same truncation as np.mean(...).astype(int) over the ROI
+            means = (sums / (w[rows] * h[rows])[:, None]).astype(int)
+            for row, (blue, green, red) in zip(rows, means):
+                results[row] = self._format_color(red, green, blue)
+            return results
+        except Exception as e:
+            logger.warning("Color extraction failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return [dict(DEFAULT_COLOR_INFO) for _ in bboxes]
+    
+    @staticmethod
+    def _format_color(red: int, green: int, blue: int) -> Dict[str, Any]:
+        return {
+            'dominant_rgb': f"rgb({red}, {green}, {blue})",
+            'dominant_hex': f"#{red:02x}{green:02x}{blue:02x}"
+        }
+    
+    @staticmethod
+    def _box_sums(image: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        """Per-box BGR pixel sums (float64, N x 3) for in-bounds (x, y, w, h) boxes.
+        
+        Boxes are grouped into horizontal bands so each summed-area table
+        stays under INTEGRAL_MAX_PIXELS; a box taller than that gets its own
+        float64 table.
+        """
+        if image.ndim == 2:
+            image = image[:, :, None]
+        sums = np.zeros((len(boxes), image.shape[2]), dtype=np.float64)
+        order = np.argsort(boxes[:, 1], kind='stable')
+        
+        start = 0
+        while start < len(order):
+            # Grow the band while its crop stays within the pixel budget
+            members = [order[start]]
+            y1, y2 = boxes[order[start], 1], boxes[order[start], 1] + boxes[order[start], 3]
+            x1, x2 = boxes[order[start], 0], boxes[order[start], 0] + boxes[order[start], 2]
+            end = start + 1
+            while end < len(order):
+                box = boxes[order[end]]
+                nx1, nx2 = min(x1, box[0]), max(x2, box[0] + box[2])
+                ny2 = max(y2, box[1] + box[3])
+                if (ny2 - y1) * (nx2 - x1) > INTEGRAL_MAX_PIXELS:
+                    break
+                members.append(order[end])
+                x1, x2, y2 = nx1, nx2, ny2
+                end += 1
+            start = end
             
-            # Simple dominant color extraction
-            dominant_color = np.mean(pixels, axis=0).astype(int)
+            crop = np.ascontiguousarray(image[y1:y2, x1:x2])
+            depth = cv2.CV_32S if (y2 - y1) * (x2 - x1) <= INTEGRAL_MAX_PIXELS else cv2.CV_64F
+            table = cv2.integral(crop, sdepth=depth)
+            if table.ndim == 2:
+                table = table[:, :, None]
             
-            return {
-                'dominant_rgb': f"rgb({dominant_color[0]}, {dominant_color[1]}, {dominant_color[2]})",
-                'dominant_hex': f"#{dominant_color[0]:02x}{dominant_color[1]:02x}{dominant_color[2]:02x}"
+            band = boxes[members]
+            bx1, by1 = band[:, 0] - x1, band[:, 1] - y1
+            bx2, by2 = bx1 + band[:, 2], by1 + band[:, 3]
+            sums[members] = (
+                table[by2, bx2].astype(np.float64) - table[by1, bx2] - table[by2, bx1] + table[by1, bx1]
+            )
+        return sums
+    
+    def _palette_color_info(self, image: np.ndarray, bbox: Tuple[int, int, int, int]) -> Dict[str, Any]:
+        """k-means palette of one box; the largest cluster is the dominant color"""
+        try:
+            from sklearn.cluster import KMeans
+        except ImportError:
+            logger.warning("scikit-learn is not installed, falling back to mean colors")
+            sums = self._box_sums(image, np.array([bbox], dtype=np.int64))
+            blue, green, red = (sums[0] / (bbox[2] * bbox[3])).astype(int)
+            return self._format_color(red, green, blue)
+        
+        x, y, w, h = bbox
+        pixels = image[y:y + h, x:x + w].reshape(-1, image.shape[2])[:, ::-1]  # BGR -> RGB
+        max_pixels = self.color_params['max_sample_pixels']
+        if len(pixels) > max_pixels:
+            # Fixed seed keeps results (and the result cache) deterministic
+            picks = np.random.default_rng(0).choice(len(pixels), max_pixels, replace=False)
+            pixels = pixels[picks]
+        
+        clusters = min(self.color_params['palette_size'], len(np.unique(pixels, axis=0)))
+        kmeans = KMeans(n_clusters=clusters, n_init=1, random_state=0).fit(pixels.astype(np.float64))
+        counts = np.bincount(kmeans.labels_, minlength=clusters)
+        ranked = np.argsort(-counts, kind='stable')
+        centers = np.clip(np.rint(kmeans.cluster_centers_), 0, 255).astype(int)
+        
+        red, green, blue = centers[ranked[0]]
+        color_info = self._format_color(red, green, blue)
+        color_info['palette'] = [
+            {
+                'hex': "#{:02x}{:02x}{:02x}".format(*centers[cluster]),
+                'fraction': round(float(counts[cluster]) / len(pixels), 3)
             }
-        except Exception as e:
-            print(f"DEBUG: Color extraction failed: {e}")
-            return {'dominant_rgb': 'rgb(128, 128, 128)', 'dominant_hex': '#808080'}
+            for cluster in ranked
+        ]
+        return color_info
@@ -0,0 +1,191 @@
+import math
+import re
+from typing import List, Dict, Tuple, Optional, Iterable
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import UIComponent, ComponentType
+from models.spatial_relationship import RelationType
+from models.layout_graph import LayoutGraph, layout_graph
+from utils.spatial_index import GridIndex
+
+# Reference colors for named-color queries; each component is filed under
+# the nearest one in Lab space
+NAMED_COLORS: Dict[str, Tuple[int, int, int]] = {
+    'red': (220, 40, 40),
+    'orange': (255, 140, 0),
+    'yellow': (250, 220, 40),
+    'green': (40, 160, 60),
+    'blue': (40, 90, 220),
+    'purple': (130, 60, 170),
+    'pink': (240, 130, 180),
+    'brown': (130, 80, 40),
+    'gray': (128, 128, 128),
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+}
+
+# Lab distance beyond which a color is not called by its nearest name
+MAX_NAMED_COLOR_DELTA = 60.0
+
+# Side of the quantized Lab buckets used for arbitrary-color lookups
+LAB_BUCKET_SIZE = 10.0
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a piece of text"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_hex_color(value: str) -> Optional[Tuple[int, int, int]]:
+    """RGB triple from '#rrggbb', or None"""
+    value = (value or '').strip().lstrip('#')
+    if len(value) != 6:
+        return None
+    try:
+        return (int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16))
+    except ValueError:
+        return None
+
+
+def rgb_to_lab(rgb: Tuple[int, int, int]) -> Tuple[float, float, float]:
+    """CIE L*a*b* (D65) of an sRGB color"""
+    def linear(channel: float) -> float:
+        channel /= 255.0
+        return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+    r, g, b = (linear(c) for c in rgb)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t: float) -> float:
+        return t ** (1.0 / 3.0) if t > 0.008856 else 7.787 * t + 16.0 / 116.0
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz))
+
+
+_NAMED_LAB = {name: rgb_to_lab(rgb) for name, rgb in NAMED_COLORS.items()}
+
+
+def nearest_color_name(rgb: Tuple[int, int, int]) -> Tuple[str, float]:
+    """Closest NAMED_COLORS entry and its Lab distance"""
+    lab = rgb_to_lab(rgb)
+    return min(((name, math.dist(lab, reference)) for name, reference in _NAMED_LAB.items()),
+               key=lambda item: item[1])
+
+
+class LayoutIndex:
+    """Lookup structures over one layout, built once and reused by every query.
+
+    Components are referred to by row (their position in
+    layout.components iteration order, so the first row is the first
+    component a linear scan would see). Holds:
+      - tokens: word token -> rows whose text contains it
+      - by_type: ComponentType -> rows
+      - by_color_name: named color -> rows, and quantized Lab buckets for
+        arbitrary colors
+      - spatial: GridIndex over the bounding boxes
+      - graph: the layout's LayoutGraph (relationship adjacency lists and
+        containment tree), reused when the layout already has one
+    """
+
+    def __init__(self, layout):
+        self.components: List[UIComponent] = list(layout.components.values())
+        self.row_by_id: Dict[str, int] = {comp.id: row for row, comp in enumerate(self.components)}
+
+        self.by_type: Dict[ComponentType, List[int]] = {}
+        self.tokens: Dict[str, List[int]] = {}
+        self.by_color_name: Dict[str, List[int]] = {}
+        self._lab_buckets: Dict[Tuple[int, int, int], List[int]] = {}
+        self._labs: Dict[int, Tuple[float, float, float]] = {}
+
+        for row, comp in enumerate(self.components):
+            self.by_type.setdefault(comp.component_type, []).append(row)
+
+            if comp.text_content:
+                for token in set(tokenize(comp.text_content)):
+                    self.tokens.setdefault(token, []).append(row)
+
+            rgb = parse_hex_color(comp.color_info.get('dominant_hex', '')) if comp.color_info else None
+            if rgb is not None:
+                lab = rgb_to_lab(rgb)
+                self._labs[row] = lab
+                self._lab_buckets.setdefault(self._lab_bucket(lab), []).append(row)
+                name, delta = nearest_color_name(rgb)
+                if delta <= MAX_NAMED_COLOR_DELTA:
+                    self.by_color_name.setdefault(name, []).append(row)
+
+        self.spatial = GridIndex([comp.bounding_box for comp in self.components])
+
+        self.graph: LayoutGraph = layout_graph(layout)
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    @staticmethod
+    def _lab_bucket(lab: Tuple[float, float, float]) -> Tuple[int, int, int]:
+        return tuple(int(math.floor(channel / LAB_BUCKET_SIZE)) for channel in lab)
+
+    def count_by_type(self) -> Dict[ComponentType, int]:
+        """Component count per type, in order of first appearance"""
+        return {component_type: len(rows) for component_type, rows in self.by_type.items()}
+
+    def find_text(self, text: str) -> List[int]:
+        """Rows whose text contains `text` (case-insensitive), in row order"""
+        needle = text.lower()
+        query_tokens = tokenize(text)
+        if not query_tokens:
+            candidates: Iterable[int] = range(len(self.components))
+        else:
+            candidates = None
+            for token in query_tokens:
+                postings = self.tokens.get(token)
+                if postings is None:
+                    # Partial word: union the postings of every token containing it
+                    postings = [row for vocab, rows in self.tokens.items() if token in vocab for row in rows]
+                candidates = set(postings) if candidates is None else candidates & set(postings)
+                if not candidates:
+                    return []
+        return sorted(
+            row for row in candidates
+            if self.components[row].text_content and needle in self.components[row].text_content.lower()
+        )
+
+    def find_color(self, color, max_delta: float = MAX_NAMED_COLOR_DELTA) -> List[int]:
+        """Rows with a named color ('red') or within max_delta (Lab) of an RGB triple"""
+        if isinstance(color, str):
+            return list(self.by_color_name.get(color.lower(), []))
+
+        target = rgb_to_lab(color)
+        reach = int(math.ceil(max_delta / LAB_BUCKET_SIZE))
+        bl, ba, bb = self._lab_bucket(target)
+        matches = []
+        for dl in range(-reach, reach + 1):
+            for da in range(-reach, reach + 1):
+                for db in range(-reach, reach + 1):
+                    for row in self._lab_buckets.get((bl + dl, ba + da, bb + db), ()):
+                        if math.dist(self._labs[row], target) <= max_delta:
+                            matches.append(row)
+        return sorted(matches)
+
+    def related_to(self, row: int, relation_type: RelationType) -> List[int]:
+        """Rows of components that are `relation_type` of `row`, nearest first"""
+        return [self.row_by_id[comp_id] for comp_id in self.graph.related_to(self.components[row].id, relation_type)]
+
+    def containers_of(self, row: int) -> List[int]:
+        """Rows of the components containing `row`, innermost first"""
+        return [self.row_by_id[comp_id] for comp_id in self.graph.ancestors(self.components[row].id)]
+
+    def children_of(self, row: int) -> List[int]:
+        """Rows of the components directly inside `row`"""
+        return [self.row_by_id[comp_id] for comp_id in self.graph.children(self.components[row].id)]
+
+    def nearest_in_direction(self, row: int, direction: RelationType, limit: int = 3) -> List[int]:
+        """Spatial fallback for directions the mapped relationships don't cover"""
+        return self.spatial.nearest_by_direction(row, max_neighbors=limit)[direction]
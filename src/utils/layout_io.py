@@ -0,0 +1,252 @@
+from typing import Dict, Any, IO, Iterable, Iterator, List, Optional
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import UIComponent, ComponentType, BoundingBox
+from models.spatial_relationship import SpatialRelationship, RelationType, UILayout
+from models.component_tree import ComponentTree
+
+
+def plain_value(value: Any) -> Any:
+    """Convert NumPy scalars/arrays (and containers holding them) to JSON types.
+    
+    Duck-typed on .tolist()/.item() so this module stays free of NumPy.
+    """
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(key): plain_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain_value(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def component_record(comp: UIComponent) -> Dict[str, Any]:
+    """JSON-ready dict for one component, as found under screen_analysis.components"""
+    bbox = comp.bounding_box
+    return {
+        "id": comp.id,
+        "type": comp.component_type.value,
+        "position": {
+            "x": int(bbox.x),
+            "y": int(bbox.y),
+            "width": int(bbox.width),
+            "height": int(bbox.height),
+            "center": [int(bbox.center[0]), int(bbox.center[1])]
+        },
+        "text_content": comp.text_content,
+        "color_info": plain_value(comp.color_info),
+        "confidence": float(comp.confidence),
+        "attributes": plain_value(comp.attributes) if comp.attributes else {}
+    }
+
+
+def relationship_record(rel: SpatialRelationship) -> Dict[str, Any]:
+    """JSON-ready dict for one relationship, as found under screen_analysis.relationships"""
+    return {
+        "from_component": rel.component1_id,
+        "to_component": rel.component2_id,
+        "relationship": rel.relation_type.value,
+        "distance": float(rel.distance),
+        "confidence": float(rel.confidence),
+        "description": rel.description
+    }
+
+
+def hierarchy_record(layout: UILayout) -> List[Dict[str, Any]]:
+    """Nested containment tree, as found under screen_analysis.hierarchy.
+    
+    Each node is {"id", "type"} plus "children" where the component
+    contains others; the full records stay in the components list.
+    """
+    components = layout.components
+    return layout.hierarchy.to_nested(
+        lambda comp_id: {"id": comp_id, "type": components[comp_id].component_type.value}
+    )
+
+
+def hierarchy_from_records(records: List[Dict[str, Any]], component_ids: Iterable[str]) -> ComponentTree:
+    """ComponentTree from hierarchy records, in the order of component_ids"""
+    parents = ComponentTree.from_nested(records).parents
+    return ComponentTree({comp_id: parents.get(comp_id) for comp_id in component_ids})
+
+
+def summary_record(layout: UILayout) -> Dict[str, Any]:
+    """Everything in screen_analysis except the component and relationship lists"""
+    summary = {
+        "dimensions": {
+            "width": int(layout.screen_dimensions[0]),
+            "height": int(layout.screen_dimensions[1])
+        },
+        "confidence_score": float(layout.confidence_score),
+        "ambiguities": list(layout.ambiguities)
+    }
+    if layout.metadata:
+        summary["metadata"] = plain_value(layout.metadata)
+    if layout.timings:
+        summary["timings"] = plain_value(layout.timings)
+    return summary
+
+
+def _dumps(record: Any, indent: Optional[int]) -> str:
+    if indent is None:
+        return json.dumps(record, separators=(',', ':'))
+    return json.dumps(record, indent=indent)
+
+
+def _write_array(stream: IO[str], key: str, records: Iterable[Dict[str, Any]],
+                 indent: Optional[int], level: int) -> None:
+    """Write `"key": [ ... ]` one record at a time"""
+    if indent is None:
+        stream.write(f'"{key}":[')
+        for position, record in enumerate(records):
+            if position:
+                stream.write(',')
+            stream.write(_dumps(record, None))
+        stream.write(']')
+        return
+    
+    pad = ' ' * (indent * level)
+    stream.write(f'{pad}"{key}": [')
+    first = True
+    for record in records:
+        stream.write('\n' if first else ',\n')
+        first = False
+        # Re-indent the nested record to sit inside the array
+        stream.write(pad + ' ' * indent + _dumps(record, indent).replace('\n', '\n' + pad + ' ' * indent))
+    stream.write(']' if first else '\n' + pad + ']')
+
+
+def write_layout_json(layout: UILayout, stream: IO[str], indent: Optional[int] = None) -> None:
+    """Stream the export_structured_output document to a text stream.
+    
+    Components and relationships are serialized one at a time, so peak
+    memory stays at one record rather than the whole nested document.
+    indent=None writes compact JSON.
+    """
+    summary = summary_record(layout)
+    
+    if indent is None:
+        stream.write('{"screen_analysis":{')
+        for key, value in summary.items():
+            stream.write(f'"{key}":{_dumps(value, None)},')
+        _write_array(stream, 'components', (component_record(c) for c in layout.components.values()), None, 0)
+        stream.write(',')
+        _write_array(stream, 'relationships', (relationship_record(r) for r in layout.relationships), None, 0)
+        if getattr(layout, 'hierarchy', None) is not None:
+            stream.write(',')
+            _write_array(stream, 'hierarchy', hierarchy_record(layout), None, 0)
+        stream.write('}}\n')
+        return
+    
+    pad = ' ' * (2 * indent)
+    stream.write('{\n' + ' ' * indent + '"screen_analysis": {\n')
+    for key, value in summary.items():
+        stream.write(f'{pad}"{key}": ' + _dumps(value, indent).replace('\n', '\n' + pad) + ',\n')
+    _write_array(stream, 'components', (component_record(c) for c in layout.components.values()), indent, 2)
+    stream.write(',\n')
+    _write_array(stream, 'relationships', (relationship_record(r) for r in layout.relationships), indent, 2)
+    if getattr(layout, 'hierarchy', None) is not None:
+        stream.write(',\n')
+        _write_array(stream, 'hierarchy', hierarchy_record(layout), indent, 2)
+    stream.write('\n' + ' ' * indent + '}\n}\n')
+
+
+def iter_layout_ndjson(layout: UILayout) -> Iterator[str]:
+    """NDJSON lines for a layout: one summary record, then one line per component and relationship.
+    
+    Every line carries a "record" field ("screen", "component",
+    "relationship" or "hierarchy"); a hierarchy line holds one top-level
+    subtree of the containment tree.
+    """
+    yield json.dumps({"record": "screen", **summary_record(layout)}, separators=(',', ':'))
+    for comp in layout.components.values():
+        yield json.dumps({"record": "component", **component_record(comp)}, separators=(',', ':'))
+    for rel in layout.relationships:
+        yield json.dumps({"record": "relationship", **relationship_record(rel)}, separators=(',', ':'))
+    if getattr(layout, 'hierarchy', None) is not None:
+        for subtree in hierarchy_record(layout):
+            yield json.dumps({"record": "hierarchy", **subtree}, separators=(',', ':'))
+
+
+def write_layout_ndjson(layout: UILayout, stream: IO[str]) -> None:
+    """Stream a layout as newline-delimited JSON"""
+    for line in iter_layout_ndjson(layout):
+        stream.write(line)
+        stream.write('\n')
+
+
+def read_layout_ndjson(lines: Iterable[str]) -> UILayout:
+    """Rebuild a UILayout from the lines written by write_layout_ndjson"""
+    analysis: Dict[str, Any] = {'components': [], 'relationships': []}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        kind = record.pop('record')
+        if kind == 'screen':
+            analysis.update(record)
+        elif kind == 'component':
+            analysis['components'].append(record)
+        elif kind == 'relationship':
+            analysis['relationships'].append(record)
+        elif kind == 'hierarchy':
+            analysis.setdefault('hierarchy', []).append(record)
+        else:
+            raise ValueError(f"Unknown NDJSON record type: {kind}")
+    return layout_from_structured_output({'screen_analysis': analysis})
+
+
+def layout_from_structured_output(data: Dict[str, Any]) -> UILayout:
+    """Rebuild a UILayout from the dict produced by export_structured_output"""
+    analysis = data['screen_analysis']
+
+    components = {}
+    for comp in analysis.get('components', []):
+        position = comp['position']
+        components[comp['id']] = UIComponent(
+            id=comp['id'],
+            component_type=ComponentType(comp['type']),
+            bounding_box=BoundingBox(
+                position['x'], position['y'], position['width'], position['height']
+            ),
+            text_content=comp.get('text_content'),
+            color_info=comp.get('color_info'),
+            confidence=comp.get('confidence', 0.0),
+            attributes=comp.get('attributes') or {}
+        )
+
+    relationships = [
+        SpatialRelationship(
+            component1_id=rel['from_component'],
+            component2_id=rel['to_component'],
+            relation_type=RelationType(rel['relationship']),
+            distance=rel['distance'],
+            confidence=rel['confidence'],
+            description=rel['description']
+        )
+        for rel in analysis.get('relationships', [])
+    ]
+
+    hierarchy = None
+    if 'hierarchy' in analysis:
+        hierarchy = hierarchy_from_records(analysis['hierarchy'], components)
+
+    dimensions = analysis.get('dimensions', {})
+    return UILayout(
+        components=components,
+        relationships=relationships,
+        screen_dimensions=(dimensions.get('width', 0), dimensions.get('height', 0)),
+        ambiguities=list(analysis.get('ambiguities', [])),
+        confidence_score=analysis.get('confidence_score', 0.0),
+        metadata=dict(analysis.get('metadata', {})),
+        timings=dict(analysis.get('timings', {})),
+        hierarchy=hierarchy
+    )
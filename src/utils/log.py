@@ -0,0 +1,95 @@
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple, IO
+
+# Every module logs under this root, so one call configures the whole package
+ROOT_LOGGER = 'ui_parser'
+
+# Pass as extra= on per-component / per-region messages that may be sampled
+SAMPLED = {'sampled': True}
+
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+logging.getLogger(ROOT_LOGGER).addHandler(logging.NullHandler())
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Per-module logger under the package root (pass __name__)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extras and exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and key != 'sampled':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in every round(1 / rate) records marked with extra=SAMPLED.
+
+    Counting is per call site (logger + message template), so a flood of
+    identical per-component messages is thinned while the first one always
+    gets through. Unmarked records are never dropped.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        if not 0.0 < rate <= 1.0:
+            raise ValueError("Sample rate must be in (0, 1]")
+        self.every = max(1, int(round(1.0 / rate)))
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or not getattr(record, 'sampled', False):
+            return True
+        key = (record.name, str(record.msg))
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+def configure_logging(level: str = 'WARNING', log_format: str = 'text',
+                      sample_rate: float = 1.0, stream: Optional[IO[str]] = None) -> logging.Logger:
+    """Install a single stderr handler on the package logger.
+
+    level: DEBUG / INFO / WARNING / ERROR. log_format: 'text' or 'json'.
+    sample_rate: share of SAMPLED records to keep. Calling again replaces
+    the previous configuration.
+    """
+    if log_format not in ('text', 'json'):
+        raise ValueError(f"Unknown log format: {log_format}")
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        if not isinstance(handler, logging.NullHandler):
+            root.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    # Our handler is authoritative; don't duplicate into the application's root logger
+    root.propagate = False
+    return root
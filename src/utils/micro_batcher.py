@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Any, Optional
+
+
+class MicroBatcher:
+    """Groups concurrently submitted items into small batches for one worker thread.
+
+    The worker blocks for a first item, then keeps collecting until either
+    max_batch_size items are queued or max_wait seconds have passed, and
+    hands the whole group to process_batch. process_batch must return one
+    result per item, in order; if the count differs, every item of the
+    batch fails with a RuntimeError. Each submit() returns a Future.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait: float = 0.02,
+                 name: str = 'micro-batcher'):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches_processed = 0
+        self.items_processed = 0
+
+        self._queue: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items_processed / self.batches_processed if self.batches_processed else 0.0
+
+    def close(self) -> None:
+        """Stop the worker after the items already queued"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            # Drop requests whose callers already gave up (timed out / cancelled)
+            live = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if live:
+                self._process(live)
+
+            if stop:
+                return
+
+    def _process(self, batch: List[tuple]) -> None:
+        try:
+            results = list(self.process_batch([item for item, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            error = RuntimeError(f"process_batch returned {len(results)} results for {len(batch)} items")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+
+        self.batches_processed += 1
+        self.items_processed += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
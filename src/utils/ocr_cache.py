@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.log import get_logger
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows): the shared file is then never compacted
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# Bump when crop normalization changes, so persisted keys are not reused
+CROP_KEY_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 50000
+
+# A hit must come from a crop this close in width (relative, at least 2 px)
+WIDTH_TOLERANCE = 0.1
+
+
+def crop_key(crop: np.ndarray, height: int = 24, levels: int = 16) -> Optional[str]:
+    """Hash of a grayscale text crop after normalization, or None for an empty crop.
+
+    The crop is resized to a fixed height (keeping its aspect ratio),
+    stretched to the full 0-255 range and quantized to `levels` gray
+    levels, so the same label rendered at another size, brightness or
+    with slight compression noise still maps to the same key. The key
+    alone can also join two different short labels that normalize alike;
+    RecognitionCache guards against that by also comparing crop widths.
+    """
+    if crop.size == 0 or crop.shape[0] == 0 or crop.shape[1] == 0:
+        return None
+    width = max(1, round(crop.shape[1] * height / crop.shape[0]))
+    small = cv2.resize(crop, (width, height), interpolation=cv2.INTER_AREA)
+    normalized = cv2.normalize(small, None, 0, 255, cv2.NORM_MINMAX)
+    quantized = (normalized // (256 // levels)).astype(np.uint8)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{CROP_KEY_VERSION}|{quantized.shape}|".encode())
+    digest.update(quantized.tobytes())
+    return digest.hexdigest()
+
+
+class RecognitionCache:
+    """LRU cache of OCR recognitions keyed by normalized text-crop hash.
+
+    Headers, navigation bars and button labels recur across an app's
+    screens; a hit returns the stored (text, confidence) without running
+    the recognizer. With a path, entries are loaded from and appended to a
+    JSON Lines file, one small line per new entry, so the cache carries
+    over between batch runs and concurrent batch worker processes can share
+    the file (appends of short lines are atomic). The file is compacted to
+    the newest max_entries entries when it is loaded, under an exclusive
+    lock that appenders wait for, so no worker's appends are lost.
+
+    Each entry also records the pixel width of its crop, and a hit needs a
+    crop within WIDTH_TOLERANCE of that width: two different labels that
+    share a key after normalization would also have to match in size. The
+    same label repeated across screens of one app keeps its width.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[str, float, Optional[int]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, width: Optional[int] = None) -> Optional[Tuple[str, float]]:
+        """(text, confidence) for a crop key and crop width, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not _same_width(entry[2], width):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: str, text: str, confidence: float, width: Optional[int] = None) -> None:
+        entry = (str(text), float(confidence), int(width) if width is not None else None)
+        with self._lock:
+            is_new = key not in self._entries
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if is_new and self.path:
+                self._append(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this cache instance"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = 0
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Advisory lock on a sidecar file: shared for appends, exclusive for compaction"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, key: str, entry: Tuple[str, float, Optional[int]]) -> None:
+        try:
+            with self._file_lock(exclusive=False), open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps([key, *entry], ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.warning("Could not persist OCR cache entry to %s: %s", self.path, e)
+
+    def _read(self) -> int:
+        """Load the file's entries (newest last); returns the number of lines read"""
+        lines = 0
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    key, text, confidence, *width = json.loads(line)
+                except ValueError:
+                    # A line cut short by a killed process
+                    continue
+                self._entries[key] = (text, float(confidence), width[0] if width else None)
+                self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return lines
+
+    def _load(self) -> None:
+        try:
+            lines = self._read()
+            if lines > len(self._entries) and fcntl is not None:
+                with self._file_lock(exclusive=True):
+                    # Re-read under the lock, so appends made since are kept
+                    lines = self._read()
+                    if lines > len(self._entries):
+                        self._compact()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning("Could not read OCR cache %s: %s", self.path, e)
+            return
+        logger.info("Loaded %d OCR cache entries from %s", len(self._entries), self.path)
+
+    def _compact(self) -> None:
+        """Rewrite the file with one line per live entry (atomically; caller holds the exclusive lock)"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for key, entry in self._entries.items():
+                    f.write(json.dumps([key, *entry], ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not compact OCR cache %s: %s", self.path, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _same_width(stored: Optional[int], width: Optional[int]) -> bool:
+    if stored is None or width is None:
+        return True
+    return abs(stored - width) <= max(2, WIDTH_TOLERANCE * stored)
@@ -0,0 +1,250 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any, Iterator, Callable
+
+# Profile collecting stage timings for the current analysis, if any
+_current: ContextVar[Optional['Profile']] = ContextVar('ui_parser_profile', default=None)
+
+
+class _NoopStage:
+    """Returned by stage() when profiling is off: entering it costs nothing"""
+
+    def __enter__(self) -> '_NoopStage':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def add_items(self, count: int) -> None:
+        pass
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ('profile', 'name', 'items', 'wall_start', 'cpu_start', 'memory_start', 'memory_peak')
+
+    def __init__(self, profile: 'Profile', name: str, items: Optional[int]):
+        self.profile = profile
+        self.name = name
+        self.items = items or 0
+
+    def __enter__(self) -> '_Stage':
+        if self.profile.trace_memory:
+            self.profile._open_stage(self)
+        self.cpu_start = time.thread_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.thread_time() - self.cpu_start
+        peak = self.profile._close_stage(self) if self.profile.trace_memory else None
+        self.profile._record(self.name, wall, cpu, self.items, peak)
+        return False
+
+    def add_items(self, count: int) -> None:
+        self.items += count
+
+
+class Profile:
+    """Per-stage wall time, CPU time, item counts and (optionally) peak memory.
+
+    Stages with the same name accumulate. CPU time is that of the thread
+    running the stage. With trace_memory, tracemalloc is started and each
+    stage reports the peak traced memory while it was open, above its level
+    on entry; stages running concurrently on other threads share that peak.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._open: List[_Stage] = []
+
+    def _fold_peak(self) -> int:
+        """Push the traced peak since the last reset into every open stage"""
+        current, peak = tracemalloc.get_traced_memory()
+        for open_stage in self._open:
+            open_stage.memory_peak = max(open_stage.memory_peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _open_stage(self, open_stage: _Stage) -> None:
+        with self._lock:
+            current = self._fold_peak()
+            open_stage.memory_start = current
+            open_stage.memory_peak = current
+            self._open.append(open_stage)
+
+    def _close_stage(self, open_stage: _Stage) -> int:
+        with self._lock:
+            self._fold_peak()
+            self._open.remove(open_stage)
+            return max(0, open_stage.memory_peak - open_stage.memory_start)
+
+    def _record(self, name: str, wall: float, cpu: float, items: int, peak: Optional[int]) -> None:
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'items': 0}
+            entry['calls'] += 1
+            entry['wall_ms'] += wall * 1000.0
+            entry['cpu_ms'] += cpu * 1000.0
+            entry['items'] += items
+            if peak is not None:
+                entry['peak_memory_bytes'] = max(entry.get('peak_memory_bytes', 0), peak)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Stage name -> totals, in order of first use (milliseconds rounded to 0.001)"""
+        with self._lock:
+            return {
+                name: {key: round(value, 3) if isinstance(value, float) else value for key, value in entry.items()}
+                for name, entry in self.stages.items()
+            }
+
+
+def stage(name: str, items: Optional[int] = None):
+    """Context manager timing one pipeline stage of the active profile.
+
+    A no-op (a single context-variable lookup) unless called inside
+    profiling(). `items` is the number of things processed; it can also be
+    added later with .add_items(n).
+    """
+    profile = _current.get()
+    if profile is None:
+        return _NOOP_STAGE
+    return _Stage(profile, name, items)
+
+
+@contextmanager
+def profiling(trace_memory: bool = False) -> Iterator[Profile]:
+    """Collect stage timings for everything run inside the block on this thread"""
+    profile = Profile(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def bind_profile(function: Callable) -> Callable:
+    """Wrap a function so it records into the caller's profile on a worker thread.
+
+    Thread pools do not inherit context variables; call this on the
+    submitting thread.
+    """
+    profile = _current.get()
+    if profile is None:
+        return function
+
+    def run(*args, **kwargs):
+        token = _current.set(profile)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run
+
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+class TimingAggregator:
+    """Collects UILayout.timings across a batch and summarizes each stage"""
+
+    def __init__(self):
+        self._wall: Dict[str, List[float]] = {}
+        self._cpu: Dict[str, List[float]] = {}
+        self._items: Dict[str, int] = {}
+        self._peaks: Dict[str, int] = {}
+        self.images = 0
+
+    def add(self, timings: Dict[str, Dict[str, float]]) -> None:
+        if not timings:
+            return
+        self.images += 1
+        for name, entry in timings.items():
+            self._wall.setdefault(name, []).append(entry.get('wall_ms', 0.0))
+            self._cpu.setdefault(name, []).append(entry.get('cpu_ms', 0.0))
+            self._items[name] = self._items.get(name, 0) + int(entry.get('items', 0))
+            if 'peak_memory_bytes' in entry:
+                self._peaks[name] = max(self._peaks.get(name, 0), int(entry['peak_memory_bytes']))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per stage: images, total/mean/p50/p95/max wall ms, total CPU ms, items, histogram"""
+        result = {}
+        for name, walls in self._wall.items():
+            ordered = sorted(walls)
+            histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+            for wall in walls:
+                bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS_MS) if wall <= bound),
+                              len(HISTOGRAM_BOUNDS_MS))
+                histogram[bucket] += 1
+            result[name] = {
+                'images': len(walls),
+                'total_wall_ms': round(sum(walls), 3),
+                'mean_wall_ms': round(sum(walls) / len(walls), 3),
+                'p50_wall_ms': round(_percentile(ordered, 50), 3),
+                'p95_wall_ms': round(_percentile(ordered, 95), 3),
+                'max_wall_ms': round(ordered[-1], 3),
+                'total_cpu_ms': round(sum(self._cpu[name]), 3),
+                'items': self._items[name],
+                'histogram': histogram
+            }
+            if name in self._peaks:
+                result[name]['peak_memory_bytes'] = self._peaks[name]
+        return result
+
+
+def histogram_labels() -> List[str]:
+    """Column labels matching TimingAggregator histogram buckets"""
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS]
+    labels.append(f">{HISTOGRAM_BOUNDS_MS[-1]}ms")
+    return labels
+
+
+def format_timings(timings: Dict[str, Dict[str, float]]) -> str:
+    """Text table of one image's stage timings"""
+    has_memory = any('peak_memory_bytes' in entry for entry in timings.values())
+    lines = [f"{'stage':<22} {'calls':>5} {'wall ms':>10} {'cpu ms':>10} {'items':>7}"
+             + (f" {'peak MB':>8}" if has_memory else "")]
+    for name, entry in timings.items():
+        line = (f"{name:<22} {entry['calls']:>5} {entry['wall_ms']:>10.1f} "
+                f"{entry['cpu_ms']:>10.1f} {entry['items']:>7}")
+        if has_memory:
+            line += f" {entry.get('peak_memory_bytes', 0) / (1024 * 1024):>8.1f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Text table of a TimingAggregator summary with wall-time histograms"""
+    labels = histogram_labels()
+    lines = [f"{'stage':<22} {'images':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  "
+             + " ".join(f"{label:>8}" for label in labels)]
+    for name, entry in summary.items():
+        lines.append(
+            f"{name:<22} {entry['images']:>6} {entry['mean_wall_ms']:>9.1f} {entry['p50_wall_ms']:>9.1f} "
+            f"{entry['p95_wall_ms']:>9.1f} {entry['max_wall_ms']:>9.1f}  "
+            + " ".join(f"{count:>8}" for count in entry['histogram'])
+        )
+    return "\n".join(lines)
@@ -1,37 +1,84 @@
 import re
-from typing import List, Dict, Optional
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from models.spatial_relationship import UILayout, RelationType
-from models.ui_component import UIComponent, ComponentType
+from models.ui_component import UIComponent, ComponentType, describe_component
+from utils.layout_index import LayoutIndex, NAMED_COLORS, tokenize
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Word in a query -> direction asked about ("what is above X")
+DIRECTION_WORDS = {
+    'above': RelationType.ABOVE,
+    'over': RelationType.ABOVE,
+    'below': RelationType.BELOW,
+    'under': RelationType.BELOW,
+    'beneath': RelationType.BELOW,
+    'left': RelationType.LEFT_OF,
+    'right': RelationType.RIGHT_OF,
+}
+
+# Word in a query -> containment asked about: INSIDE for "what is inside X",
+# CONTAINS for "what contains X"
+CONTAINMENT_WORDS = {
+    'inside': RelationType.INSIDE,
+    'within': RelationType.INSIDE,
+    'contains': RelationType.CONTAINS,
+    'contain': RelationType.CONTAINS,
+    'containing': RelationType.CONTAINS,
+}
+
+COLOR_ALIASES = {'grey': 'gray'}
+
+STOPWORDS = {'the', 'a', 'an', 'of', 'to', 'is', 'are', 'what', 'which', 'whats', 's',
+             'with', 'text', 'labeled', 'labelled', 'called', 'that', 'says', 'on', 'side'}
+
+# Layout indexes kept per QueryHandler
+MAX_CACHED_INDEXES = 32
 
 
 class QueryHandler:
     def __init__(self):
-        self.color_patterns = {
-            'red': ['#ff', '#f00', 'rgb(255', 'red', '#ff0000'],
-            'blue': ['#00f', '#0000ff', 'rgb(0', 'blue', '#0066cc', '#4169e1'],
-            'green': ['#0f0', '#00ff00', 'rgb(0', 'green'],
-            'black': ['#000', '#000000', 'rgb(0,0,0)', 'black'],
-            'white': ['#fff', '#ffffff', 'rgb(255,255,255)', 'white'],
-            'orange': ['#ffa500', '#ff8c00', 'orange', '#ff6600']
-        }
+        # id(layout) -> (weak reference, size signature, index)
+        self._indexes: 'OrderedDict[int, Tuple[weakref.ref, Tuple[int, int], LayoutIndex]]' = OrderedDict()
+    
+    def get_index(self, layout: UILayout) -> LayoutIndex:
+        """Index for a layout, built on its first query and reused afterwards"""
+        key = id(layout)
+        signature = (len(layout.components), len(layout.relationships))
+        entry = self._indexes.get(key)
+        # The weakref guards against a recycled id(); the signature against in-place edits
+        if entry is not None and entry[0]() is layout and entry[1] == signature:
+            self._indexes.move_to_end(key)
+            return entry[2]
+        
+        index = LayoutIndex(layout)
+        self._indexes[key] = (weakref.ref(layout), signature, index)
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > MAX_CACHED_INDEXES:
+            self._indexes.popitem(last=False)
+        return index
     
     def process_query(self, layout: UILayout, query: str) -> str:
         """Process natural language queries about the UI layout"""
         query = query.lower().strip()
         
         try:
-            # Debug: Show what components we have
-            print(f"DEBUG: Processing query '{query}' with {len(layout.components)} components")
+            logger.debug("Processing query %r with %d components", query, len(layout.components))
             
             if 'how many' in query:
                 return self._handle_count_query(layout, query)
             elif 'where' in query or 'position' in query or 'find' in query or 'locate' in query:
                 return self._handle_location_query(layout, query)
+            elif any(word in CONTAINMENT_WORDS for word in tokenize(query)):
+                return self._handle_containment_query(layout, query)
             elif 'above' in query or 'below' in query or 'left' in query or 'right' in query:
                 return self._handle_relationship_query(layout, query)
             else:
@@ -45,20 +92,17 @@ class QueryHandler:
         if not layout.components:
             return "No components found in the layout"
             
-        component_counts = {}
-        for component in layout.components.values():
-            comp_type = component.component_type.value
-            component_counts[comp_type] = component_counts.get(comp_type, 0) + 1
+        component_counts = self.get_index(layout).count_by_type()
         
         total = sum(component_counts.values())
-        breakdown = ", ".join([f"{count} {comp_type}{'s' if count > 1 else ''}" 
+        breakdown = ", ".join([f"{count} {comp_type.value}{'s' if count > 1 else ''}" 
                              for comp_type, count in component_counts.items()])
         
         return f"Total components: {total}. Breakdown: {breakdown}"
     
     def _handle_location_query(self, layout: UILayout, query: str) -> str:
         """Handle queries asking about component locations"""
-        print(f"DEBUG: Handling location query: {query}")
+        logger.debug("Handling location query: %s", query)
         
         if not layout.components:
             return "No components found in the layout"
@@ -73,16 +117,14 @@ class QueryHandler:
             if quote_match:
                 text_to_find = quote_match.group(1) or quote_match.group(2)
             
-            print(f"DEBUG: Looking for text: '{text_to_find}'")
+            logger.debug("Looking for text: %r", text_to_find)
             
             if text_to_find:
-                matching_components = []
-                for comp in layout.components.values():
-                    if comp.text_content and text_to_find.lower() in comp.text_content.lower():
-                        matching_components.append(comp)
+                index = self.get_index(layout)
+                matching_rows = index.find_text(text_to_find)
                 
-                if matching_components:
-                    comp = matching_components[0]
+                if matching_rows:
+                    comp = index.components[matching_rows[0]]
                     return f"Found text '{text_to_find}' at position ({comp.bounding_box.x}, {comp.bounding_box.y}) in a {comp.component_type.value}"
                 else:
                     # List all available text for debugging
@@ -90,37 +132,36 @@ class QueryHandler:
                     return f"Text '{text_to_find}' not found. Available texts: {available_texts[:10]}"
         
         # Search for colors
-        for color_name, patterns in self.color_patterns.items():
-            if color_name in query:
-                print(f"DEBUG: Looking for color: {color_name}")
-                matching_components = []
-                
-                for comp in layout.components.values():
-                    if comp.color_info:
-                        color_hex = comp.color_info.get('dominant_hex', '').lower()
-                        if any(pattern.lower() in color_hex for pattern in patterns):
-                            matching_components.append(comp)
-                
-                if matching_components:
-                    descriptions = []
-                    for comp in matching_components[:3]:  # Limit to 3
-                        desc = f"{comp.component_type.value}"
-                        if comp.text_content:
-                            desc += f" with text '{comp.text_content}'"
-                        desc += f" at ({comp.bounding_box.x}, {comp.bounding_box.y})"
-                        descriptions.append(desc)
-                    return f"Found {color_name} elements: " + "; ".join(descriptions)
-                else:
-                    # Debug: show available colors
-                    available_colors = [comp.color_info.get('dominant_hex', 'unknown') for comp in layout.components.values() if comp.color_info]
-                    return f"No {color_name} elements found. Available colors: {available_colors[:10]}"
+        index = self.get_index(layout)
+        query_words = set(tokenize(query))
+        for word in query_words:
+            color_name = COLOR_ALIASES.get(word, word)
+            if color_name not in NAMED_COLORS:
+                continue
+            logger.debug("Looking for color: %s", color_name)
+            matching_rows = index.find_color(color_name)
+            
+            if matching_rows:
+                descriptions = []
+                for row in matching_rows[:3]:  # Limit to 3
+                    comp = index.components[row]
+                    desc = f"{comp.component_type.value}"
+                    if comp.text_content:
+                        desc += f" with text '{comp.text_content}'"
+                    desc += f" at ({comp.bounding_box.x}, {comp.bounding_box.y})"
+                    descriptions.append(desc)
+                return f"Found {color_name} elements: " + "; ".join(descriptions)
+            else:
+                # Debug: show available colors
+                available_colors = [comp.color_info.get('dominant_hex', 'unknown')
+                                    for comp in index.components if comp.color_info][:10]
+                return f"No {color_name} elements found. Available colors: {available_colors}"
         
         # Search for component types
         if 'button' in query:
-            buttons = [comp for comp in layout.components.values() 
-                      if comp.component_type == ComponentType.BUTTON]
+            buttons = index.by_type.get(ComponentType.BUTTON)
             if buttons:
-                button = buttons[0]
+                button = index.components[buttons[0]]
                 desc = f"Found button at position ({button.bounding_box.x}, {button.bounding_box.y})"
                 if button.text_content:
                     desc += f" with text '{button.text_content}'"
@@ -129,15 +170,102 @@ class QueryHandler:
         return "confused - Could not find the specified component"
     
     def _handle_relationship_query(self, layout: UILayout, query: str) -> str:
-        """Handle queries asking about relationships"""
-        relationships_text = []
-        for rel in layout.relationships[:5]:  # Limit to first 5
-            relationships_text.append(rel.description)
+        """Handle queries asking about relationships, e.g. what is above the 'Submit' button?"""
+        index = self.get_index(layout)
+        direction, target = self._parse_relationship_target(index, query)
+        
+        if direction is None or target is None:
+            relationships_text = []
+            for rel in layout.relationships[:5]:  # Limit to first 5
+                relationships_text.append(rel.description)
+            
+            if relationships_text:
+                return "Found relationships: " + "; ".join(relationships_text)
+            else:
+                return "No clear relationships found between components"
+        
+        target_comp = index.components[target]
+        target_desc = describe_component(target_comp.component_type, target_comp.text_content)
+        phrase = direction.value.replace('_', ' ')
+        
+        rows = index.related_to(target, direction)[:5]
+        if not rows:
+            # Mapped relationships don't cover it (e.g. beyond the nearest neighbors)
+            rows = index.nearest_in_direction(target, direction, limit=5)
+        if not rows:
+            return f"Nothing found {phrase} {target_desc}"
+        
+        return f"Components {phrase} {target_desc}: " + self._describe_rows(index, rows)
+    
+    def _handle_containment_query(self, layout: UILayout, query: str) -> str:
+        """Handle containment queries: what is inside the 'Login' container? what contains the 'OK' button?"""
+        index = self.get_index(layout)
+        relation, target = self._parse_relationship_target(index, query, CONTAINMENT_WORDS)
+        if relation is None or target is None:
+            return "confused - Could not find the specified component"
+        
+        target_comp = index.components[target]
+        target_desc = describe_component(target_comp.component_type, target_comp.text_content)
+        if relation == RelationType.INSIDE:
+            rows = index.children_of(target)
+            if not rows:
+                return f"Nothing found inside {target_desc}"
+            return f"Components inside {target_desc}: " + self._describe_rows(index, rows[:5])
         
-        if relationships_text:
-            return "Found relationships: " + "; ".join(relationships_text)
+        rows = index.containers_of(target)
+        if not rows:
+            return f"{target_desc} is not inside any other component"
+        return f"Components containing {target_desc} (innermost first): " + self._describe_rows(index, rows[:5])
+    
+    @staticmethod
+    def _describe_rows(index: LayoutIndex, rows: List[int]) -> str:
+        descriptions = []
+        for row in rows:
+            comp = index.components[row]
+            descriptions.append(
+                f"{describe_component(comp.component_type, comp.text_content)} "
+                f"at ({comp.bounding_box.x}, {comp.bounding_box.y})"
+            )
+        return "; ".join(descriptions)
+    
+    def _parse_relationship_target(self, index: LayoutIndex, query: str,
+                                   relation_words: Dict[str, RelationType] = DIRECTION_WORDS
+                                   ) -> Tuple[Optional[RelationType], Optional[int]]:
+        """Relation asked about (a direction by default) and the row of the component it is relative to"""
+        words = tokenize(query)
+        positions = [i for i, word in enumerate(words) if word in relation_words]
+        if not positions:
+            return None, None
+        direction = relation_words[words[positions[0]]]
+        
+        quote_match = re.search(r"'([^']*)'|\"([^\"]*)\"", query)
+        quoted = (quote_match.group(1) or quote_match.group(2)) if quote_match else None
+        
+        # Words after the direction word name the reference component
+        remaining = [word for word in words[positions[0] + 1:] if word not in STOPWORDS]
+        remaining_text = ' '.join(remaining)
+        target_type = None
+        for component_type in ComponentType:
+            type_words = component_type.value.replace('_', ' ')
+            if type_words in remaining_text:
+                target_type = component_type
+                remaining_text = remaining_text.replace(type_words, ' ')
+        
+        if quoted:
+            rows = index.find_text(quoted)
         else:
-            return "No clear relationships found between components"
+            rows = None
+            for word in remaining_text.split():
+                matches = set(index.find_text(word))
+                rows = matches if rows is None else rows & matches
+            rows = sorted(rows) if rows is not None else []
+        
+        if target_type is not None:
+            typed = [row for row in rows if index.components[row].component_type == target_type]
+            if typed or not rows:
+                rows = typed or index.by_type.get(target_type, [])
+        
+        return direction, (rows[0] if rows else None)
     
     def _handle_general_query(self, layout: UILayout, query: str) -> str:
         """Handle general queries"""
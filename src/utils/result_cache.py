@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+# Bump when the cached payload or the analysis pipeline changes incompatibly
+CACHE_FORMAT_VERSION = 2
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Eviction frees space down to this fraction of max_bytes, so the directory
+# scan it needs runs once per batch of stores rather than on every store
+EVICT_TO_FRACTION = 0.9
+
+
+class ResultCache:
+    """Content-addressed on-disk cache of exported analysis results.
+
+    Entries are keyed by a hash of the decoded pixels plus the detector and
+    mapper configuration, so a changed image or changed parameters always
+    miss. Each entry is the JSON produced by export_structured_output. The
+    cache is bounded by total size on disk and evicts least recently used
+    entries first (a hit refreshes the entry's mtime).
+
+    The size on disk is scanned once when the cache is opened and then kept
+    as a running total, so put does not list the directory. Entries written
+    by other processes sharing the directory are picked up by the rescan
+    that eviction does.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    def make_key(self, image: np.ndarray, config: Dict[str, Any]) -> str:
+        """Hash decoded pixels and analysis parameters into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_FORMAT_VERSION}|{image.shape}|{image.dtype}|".encode())
+        digest.update(json.dumps(config, sort_keys=True).encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached structured output for a key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Missing or corrupt (e.g. half-written by a killed process)
+            self.misses += 1
+            return None
+
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return data
+
+    def put(self, key: str, structured_output: Dict[str, Any]) -> None:
+        """Store a structured output and evict old entries if over budget"""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+
+        # Write atomically so concurrent batch workers never read partial files
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(structured_output, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._total_bytes += os.path.getsize(path) - replaced
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this cache instance"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._total_bytes = 0
+
+    def _entry_path(self, key: str) -> str:
+        # Shard by prefix to keep directories small
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_mtime, st.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is back under budget"""
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO_FRACTION
+            for path, _, size in sorted(entries, key=lambda entry: entry[1]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        self._total_bytes = total
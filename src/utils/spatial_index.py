@@ -0,0 +1,295 @@
+import math
+from typing import List, Dict, Tuple, Sequence, Iterable, Iterator, Optional, Set
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ui_component import BoundingBox
+from models.spatial_relationship import RelationType
+
+DIRECTIONS = (RelationType.ABOVE, RelationType.BELOW, RelationType.LEFT_OF, RelationType.RIGHT_OF)
+
+
+def direction_of(dx: float, dy: float) -> RelationType:
+    """Direction of an offset (other minus self) as seen from self"""
+    if abs(dx) > abs(dy):
+        return RelationType.RIGHT_OF if dx > 0 else RelationType.LEFT_OF
+    else:
+        return RelationType.BELOW if dy > 0 else RelationType.ABOVE
+
+
+class GridIndex:
+    """Uniform grid over a set of bounding boxes.
+
+    Every box is registered twice: once in the cell holding its center (for
+    nearest-neighbor searches that expand ring by ring) and once in every
+    cell its area covers (for overlap / proximity lookups). Items are
+    referred to by their position in the sequence passed to the constructor.
+    """
+
+    def __init__(self, boxes: Sequence[BoundingBox], cell_size: Optional[int] = None):
+        self.boxes = list(boxes)
+        self.cell_size = cell_size or self._estimate_cell_size(self.boxes)
+
+        self._center_cells: Dict[Tuple[int, int], List[int]] = {}
+        self._area_cells: Dict[Tuple[int, int], List[int]] = {}
+
+        for index, box in enumerate(self.boxes):
+            cx, cy = box.center
+            self._center_cells.setdefault(self.cell_of(cx, cy), []).append(index)
+            for cell in self._cells_covering(box.x, box.y, box.x + box.width, box.y + box.height):
+                self._area_cells.setdefault(cell, []).append(index)
+
+        if self.boxes:
+            centers = [box.center for box in self.boxes]
+            self.center_bounds = (
+                min(c[0] for c in centers), min(c[1] for c in centers),
+                max(c[0] for c in centers), max(c[1] for c in centers)
+            )
+            cells = self._center_cells.keys()
+            self._cell_bounds = (
+                min(c[0] for c in cells), min(c[1] for c in cells),
+                max(c[0] for c in cells), max(c[1] for c in cells)
+            )
+        else:
+            self.center_bounds = (0, 0, 0, 0)
+            self._cell_bounds = (0, 0, 0, 0)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    @staticmethod
+    def _estimate_cell_size(boxes: Sequence[BoundingBox]) -> int:
+        """Pick a cell size so a typical cell holds a handful of boxes"""
+        if not boxes:
+            return 64
+        sides = sorted((box.width + box.height) / 2 for box in boxes)
+        median_side = sides[len(sides) // 2]
+
+        min_x = min(box.x for box in boxes)
+        min_y = min(box.y for box in boxes)
+        max_x = max(box.x + box.width for box in boxes)
+        max_y = max(box.y + box.height for box in boxes)
+        density_side = math.sqrt(max(1, (max_x - min_x) * (max_y - min_y)) / len(boxes))
+
+        return max(8, int(max(median_side, density_side)))
+
+    def cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def _cells_covering(self, x1: float, y1: float, x2: float, y2: float) -> Iterator[Tuple[int, int]]:
+        gx1, gy1 = self.cell_of(x1, y1)
+        gx2, gy2 = self.cell_of(x2, y2)
+        for gx in range(gx1, gx2 + 1):
+            for gy in range(gy1, gy2 + 1):
+                yield (gx, gy)
+
+    def query_bbox(self, bbox: BoundingBox, margin: int = 0) -> Set[int]:
+        """Indices of boxes intersecting bbox grown by margin (edges touching count)"""
+        x1, y1 = bbox.x - margin, bbox.y - margin
+        x2, y2 = bbox.x + bbox.width + margin, bbox.y + bbox.height + margin
+
+        candidates = set()
+        for cell in self._cells_covering(x1, y1, x2, y2):
+            candidates.update(self._area_cells.get(cell, ()))
+
+        return {
+            index for index in candidates
+            if self.boxes[index].x <= x2 and self.boxes[index].x + self.boxes[index].width >= x1
+            and self.boxes[index].y <= y2 and self.boxes[index].y + self.boxes[index].height >= y1
+        }
+
+    def query_point(self, x: float, y: float) -> List[int]:
+        """Indices of boxes containing a point"""
+        return [
+            index for index in self._area_cells.get(self.cell_of(x, y), ())
+            if self.boxes[index].x <= x <= self.boxes[index].x + self.boxes[index].width
+            and self.boxes[index].y <= y <= self.boxes[index].y + self.boxes[index].height
+        ]
+
+    def iter_rings(self, x: float, y: float) -> Iterator[Tuple[float, List[int]]]:
+        """Walk outward from a point one ring of cells at a time.
+
+        Yields (reach, indices) where indices are the boxes whose centers lie
+        in the ring and reach is a radius such that every center within that
+        distance of (x, y) has been yielded by now. Rings, and the parts of
+        rings, outside the cells holding any center are skipped, so a point
+        far from the boxes costs no more than one near them.
+        """
+        if not self.boxes:
+            return
+        gx, gy = self.cell_of(x, y)
+        min_gx, min_gy, max_gx, max_gy = self._cell_bounds
+        max_ring = max(gx - min_gx, max_gx - gx, gy - min_gy, max_gy - gy, 0)
+        # Rings closer than this do not reach the occupied cells
+        first_ring = max(min_gx - gx, gx - max_gx, min_gy - gy, gy - max_gy, 0)
+        cells = self._center_cells
+
+        for ring in range(first_ring, max_ring + 1):
+            found = []
+            if ring == 0:
+                found.extend(cells.get((gx, gy), ()))
+            else:
+                x_range = range(max(gx - ring, min_gx), min(gx + ring, max_gx) + 1)
+                y_range = range(max(gy - ring + 1, min_gy), min(gy + ring - 1, max_gy) + 1)
+                for row in (gy - ring, gy + ring):
+                    if min_gy <= row <= max_gy:
+                        for cx in x_range:
+                            found.extend(cells.get((cx, row), ()))
+                for column in (gx - ring, gx + ring):
+                    if min_gx <= column <= max_gx:
+                        for cy in y_range:
+                            found.extend(cells.get((column, cy), ()))
+            yield ring * self.cell_size, found
+
+    def nearest_by_direction(self, i: int, max_neighbors: Optional[int] = 3,
+                             max_distance: Optional[float] = None) -> Dict[RelationType, List[int]]:
+        """Nearest boxes to box i in each direction, closest first, expanding ring by ring.
+
+        A box is in the direction its center offset is dominated by (see
+        direction_of). At least one of max_neighbors / max_distance bounds
+        the search.
+        """
+        cx, cy = self.boxes[i].center
+        min_cx, min_cy, max_cx, max_cy = self.center_bounds
+
+        # Past these radii no further candidates can exist in that direction
+        # (a neighbor in a direction is at most sqrt(2) * its offset away)
+        exhausted_at = {
+            RelationType.LEFT_OF: math.sqrt(2) * (cx - min_cx),
+            RelationType.RIGHT_OF: math.sqrt(2) * (max_cx - cx),
+            RelationType.ABOVE: math.sqrt(2) * (cy - min_cy),
+            RelationType.BELOW: math.sqrt(2) * (max_cy - cy),
+        }
+        found: Dict[RelationType, List[Tuple[float, int]]] = {direction: [] for direction in DIRECTIONS}
+
+        for reach, candidates in self.iter_rings(cx, cy):
+            for j in candidates:
+                if j == i:
+                    continue
+                ox, oy = self.boxes[j].center
+                distance = math.hypot(ox - cx, oy - cy)
+                if max_distance is not None and distance > max_distance:
+                    continue
+                found[direction_of(ox - cx, oy - cy)].append((distance, j))
+
+            if max_distance is not None and reach >= max_distance:
+                break
+            if max_neighbors is not None and all(
+                reach >= exhausted_at[direction] or
+                sum(1 for distance, _ in found[direction] if distance <= reach) >= max_neighbors
+                for direction in DIRECTIONS
+            ):
+                break
+
+        neighbors = {}
+        for direction in DIRECTIONS:
+            ranked = sorted(found[direction])
+            if max_neighbors is not None:
+                ranked = ranked[:max_neighbors]
+            neighbors[direction] = [j for _, j in ranked]
+        return neighbors
+
+
+class StabbingTree:
+    """Segment tree over a fixed set of coordinates for interval stabbing queries.
+
+    Closed intervals [lo, hi] whose ends are among the coordinates can be
+    added and removed while a sweep line passes; each is stored in the
+    O(log n) nodes that exactly cover it, so add/remove cost O(log n) and
+    stab(value) returns the k intervals containing a coordinate in
+    O(log n + k).
+    """
+
+    def __init__(self, coordinates: Iterable[float]):
+        self.coordinates = sorted(set(coordinates))
+        self._position = {value: position for position, value in enumerate(self.coordinates)}
+        self._nodes: Dict[int, Set[int]] = {}
+
+    def _update(self, item: int, lo: float, hi: float, add: bool) -> None:
+        if not self.coordinates:
+            return
+        first, last = self._position[lo], self._position[hi]
+        stack = [(1, 0, len(self.coordinates) - 1)]
+        while stack:
+            node, left, right = stack.pop()
+            if last < left or right < first:
+                continue
+            if first <= left and right <= last:
+                if add:
+                    self._nodes.setdefault(node, set()).add(item)
+                else:
+                    bucket = self._nodes.get(node)
+                    if bucket is not None:
+                        bucket.discard(item)
+                        if not bucket:
+                            del self._nodes[node]
+                continue
+            middle = (left + right) // 2
+            stack.append((2 * node, left, middle))
+            stack.append((2 * node + 1, middle + 1, right))
+
+    def add(self, item: int, lo: float, hi: float) -> None:
+        self._update(item, lo, hi, True)
+
+    def remove(self, item: int, lo: float, hi: float) -> None:
+        self._update(item, lo, hi, False)
+
+    def stab(self, value: float) -> List[int]:
+        """Items whose interval contains a coordinate"""
+        target = self._position.get(value)
+        if target is None:
+            raise KeyError(value)
+        found = []
+        node, left, right = 1, 0, len(self.coordinates) - 1
+        while True:
+            found.extend(self._nodes.get(node, ()))
+            if left == right:
+                return found
+            middle = (left + right) // 2
+            if target <= middle:
+                node, right = 2 * node, middle
+            else:
+                node, left = 2 * node + 1, middle + 1
+
+
+def containment_parents(boxes: Sequence[BoundingBox]) -> List[Optional[int]]:
+    """Index of the smallest box containing each box (edges may touch), or None.
+
+    A sweep line moves left to right over the box edges while a
+    StabbingTree holds the vertical extents of the boxes it currently
+    crosses. When a box starts, the boxes it can lie inside are among
+    those the tree returns for its top edge (on typical UIs little more
+    than its containers), so the pass is O(n log n) rather than O(n^2)
+    pairwise checks. Identical boxes nest in input order, so the result is a forest.
+    """
+    count = len(boxes)
+    # Containers must be seen before their contents: larger area first
+    rank = [0] * count
+    for position, index in enumerate(sorted(range(count), key=lambda i: (-boxes[i].area, i))):
+        rank[index] = position
+
+    tree = StabbingTree([box.y for box in boxes] + [box.y + box.height for box in boxes])
+    # At equal x, starts (0) go before ends (1) so boxes sharing an edge still nest
+    events = sorted(
+        [(box.x, 0, rank[i], i) for i, box in enumerate(boxes)] +
+        [(box.x + box.width, 1, rank[i], i) for i, box in enumerate(boxes)]
+    )
+
+    parents: List[Optional[int]] = [None] * count
+    for _, kind, _, i in events:
+        box = boxes[i]
+        if kind == 1:
+            tree.remove(i, box.y, box.y + box.height)
+            continue
+        best = None
+        for j in tree.stab(box.y):
+            other = boxes[j]
+            if (rank[j] < rank[i] and other.x + other.width >= box.x + box.width
+                    and other.y + other.height >= box.y + box.height
+                    and (best is None or rank[j] > rank[best])):
+                best = j
+        parents[i] = best
+        tree.add(i, box.y, box.y + box.height)
+    return parents
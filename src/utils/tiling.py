@@ -0,0 +1,51 @@
+import sys
+from typing import List, Tuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _axis_starts(length: int, tile: int, step: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile + 1, step))
+    if starts[-1] + tile < length:
+        # Last tile is flush with the far edge
+        starts.append(length - tile)
+    return starts
+
+
+def compute_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Split an image into overlapping (x, y, width, height) tiles covering it fully.
+
+    Neighbouring tiles share `overlap` pixels, so any element smaller than the
+    overlap appears whole in at least one tile.
+    """
+    if tile_size <= 0:
+        raise ValueError("tile_size must be positive")
+    if not 0 <= overlap < tile_size:
+        raise ValueError("overlap must be in [0, tile_size)")
+
+    step = tile_size - overlap
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in _axis_starts(height, tile_size, step)
+        for x in _axis_starts(width, tile_size, step)
+    ]
+
+
+def offset_bbox(bbox: Tuple[int, int, int, int], dx: int, dy: int) -> Tuple[int, int, int, int]:
+    """Translate a tile-local (x, y, w, h) box into image coordinates"""
+    x, y, w, h = bbox
+    return (int(x) + dx, int(y) + dy, int(w), int(h))
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """High-water mark of this process's resident memory, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,118 @@
+import os
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class VideoFrame:
+    index: int
+    timestamp: float  # seconds from the start of the video
+    image: np.ndarray  # BGR
+
+
+def iter_video_frames(path: str, sample_every: int = 1, start: float = 0.0,
+                      end: Optional[float] = None) -> Iterator[VideoFrame]:
+    """Decode a video (or screen recording) one frame at a time.
+
+    Only every sample_every-th frame is decoded; the ones in between are
+    grabbed (demuxed) but not converted to pixels. start/end are in
+    seconds. Timestamps come from the container when it reports them,
+    otherwise from the frame index and FPS.
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"Video file does not exist: {path}")
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        if start > 0:
+            capture.set(cv2.CAP_PROP_POS_MSEC, start * 1000.0)
+        index = int(capture.get(cv2.CAP_PROP_POS_FRAMES) or 0)
+        sample_every = max(1, sample_every)
+
+        while capture.grab():
+            position = capture.get(cv2.CAP_PROP_POS_MSEC)
+            timestamp = position / 1000.0 if position > 0 or index == 0 else (index / fps if fps else 0.0)
+            if end is not None and timestamp > end:
+                break
+            if index % sample_every == 0:
+                ok, image = capture.retrieve()
+                if not ok:
+                    logger.warning("Could not decode frame %d of %s", index, path)
+                else:
+                    yield VideoFrame(index, timestamp, image)
+            index += 1
+    finally:
+        capture.release()
+
+
+def video_info(path: str) -> dict:
+    """FPS, frame count and frame size as reported by the container"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    try:
+        return {
+            'fps': capture.get(cv2.CAP_PROP_FPS) or 0.0,
+            'frame_count': int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0),
+            'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        }
+    finally:
+        capture.release()
+
+
+def thumbnail(image: np.ndarray, width: int = 160) -> np.ndarray:
+    """Small grayscale copy used to compare frames"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height = max(1, round(gray.shape[0] * width / gray.shape[1]))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+
+class FrameDeduplicator:
+    """Decides whether a frame shows a new screen or a near-duplicate of the last one kept.
+
+    Frames are compared with the last *kept* frame, so a slow fade or
+    scroll is still caught once it adds up. A frame is a duplicate when
+    fewer than min_changed_fraction of the pixels of a thumb_width-wide
+    grayscale thumbnail changed by more than pixel_threshold, which ignores
+    compression noise and a blinking cursor but not a changed label.
+    (Perceptual hashes such as dHash are too coarse for UI screens: a
+    changed word flips no bits.)
+    """
+
+    def __init__(self, thumb_width: int = 160, pixel_threshold: int = 16,
+                 min_changed_fraction: float = 0.0005):
+        self.thumb_width = thumb_width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.kept = 0
+        self.skipped = 0
+        self._last_thumb: Optional[np.ndarray] = None
+
+    def changed_fraction(self, thumb: np.ndarray) -> float:
+        """Share of thumbnail pixels that differ from the last kept frame (1.0 for the first)"""
+        if self._last_thumb is None or self._last_thumb.shape != thumb.shape:
+            return 1.0
+        changed = cv2.absdiff(thumb, self._last_thumb) > self.pixel_threshold
+        return float(np.count_nonzero(changed)) / changed.size
+
+    def is_new(self, image: np.ndarray) -> Tuple[bool, float]:
+        """(whether the frame differs enough to analyze, changed fraction); remembers kept frames"""
+        thumb = thumbnail(image, self.thumb_width)
+        fraction = self.changed_fraction(thumb)
+        if fraction == 0.0 or fraction < self.min_changed_fraction:
+            self.skipped += 1
+            return False, fraction
+        self._last_thumb = thumb
+        self.kept += 1
+        return True, fraction
@@ -89,5 +89,113 @@ def debug_image_processing():
         import traceback
         traceback.print_exc()
 
+def _busy_analysis(duration):
+    """Stand-in for analyze_image: holds the CPU (in bytecode, so the GIL is shared) for `duration` seconds"""
+    import time
+    from models.spatial_relationship import UILayout
+    
+    def analyze(source):
+        start = time.perf_counter()
+        total = 0
+        while time.perf_counter() - start < duration:
+            total += sum(range(100))
+        return UILayout(components={}, relationships=[], screen_dimensions=(1, 1),
+                        ambiguities=[], confidence_score=1.0)
+    
+    return analyze
+
+
+def test_async_responsiveness(concurrent=16, duration=0.2):
+    """Run many analyses through the async API and check the event loop keeps ticking.
+    
+    The analysis is replaced by a fixed CPU-bound function, so the bound does
+    not depend on the machine or on model loading. The same function run
+    directly on the loop sets the baseline: that is how long a blocking call
+    stalls it. Offloaded, the loop only waits for the GIL and the CPU, so
+    the worst tick must stay well under that.
+    """
+    import asyncio
+    import time
+    
+    image_path = os.path.join(current_dir, "examples", "sample_screens", "test_image.png")
+    print(f"\n⏱️ Running {concurrent} concurrent async analyses...")
+    analyzer = ScreenAnalyzer()
+    analyzer.analyze_image = _busy_analysis(duration)
+    
+    async def heartbeat(stop, lags):
+        # How late each 10 ms tick fires is how long the loop was blocked
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+    
+    async def measure(work):
+        stop, lags = asyncio.Event(), []
+        ticker = asyncio.create_task(heartbeat(stop, lags))
+        await asyncio.sleep(0.02)
+        result = await work()
+        stop.set()
+        await ticker
+        return result, lags
+    
+    async def blocking():
+        return analyzer.analyze_image(image_path)
+    
+    async def run():
+        _, blocking_lags = await measure(blocking)
+        start = time.perf_counter()
+        layouts, lags = await measure(lambda: analyzer.analyze_many_async([image_path] * concurrent))
+        elapsed = time.perf_counter() - start
+        
+        try:
+            await analyzer.analyze_screen_async(image_path, timeout=0.001)
+            timed_out = False
+        except asyncio.TimeoutError:
+            timed_out = True
+        return layouts, elapsed, lags, max(blocking_lags), timed_out
+    
+    try:
+        layouts, elapsed, lags, blocking_lag, timed_out = asyncio.run(run())
+    finally:
+        analyzer.close()
+    
+    max_lag = blocking_lag / 4
+    worst_lag = max(lags, default=0.0)
+    print(f"  - {len(layouts)} layouts in {elapsed:.2f}s, {len(lags)} heartbeat ticks")
+    print(f"  - Worst event loop lag: {worst_lag * 1000:.1f} ms (blocking call: {blocking_lag * 1000:.1f} ms)")
+    assert lags, "heartbeat never ticked"
+    assert blocking_lag >= duration, f"baseline call blocked the loop for only {blocking_lag * 1000:.0f} ms"
+    assert worst_lag < max_lag, f"event loop blocked for {worst_lag * 1000:.0f} ms (limit {max_lag * 1000:.0f} ms)"
+    assert len(layouts) == concurrent, f"{len(layouts)} of {concurrent} analyses returned a layout"
+    assert all(layout.confidence_score > 0 for layout in layouts), "an async analysis failed"
+    assert timed_out, "per-call timeout did not raise asyncio.TimeoutError"
+    print(f"✓ Event loop stayed responsive (lag < {max_lag * 1000:.0f} ms)")
+
+
+def test_async_matches_sync(concurrent=4):
+    """Async analyses of an image give the same layout as analyze_screen"""
+    import asyncio
+    from utils.layout_io import component_record, relationship_record
+    
+    image_path = os.path.join(current_dir, "examples", "sample_screens", "test_image.png")
+    analyzer = ScreenAnalyzer()
+    try:
+        expected = analyzer.analyze_screen(image_path)
+        layouts = asyncio.run(analyzer.analyze_many_async([image_path] * concurrent))
+    finally:
+        analyzer.close()
+    
+    def records(layout):
+        return ([component_record(comp) for comp in layout.components.values()],
+                [relationship_record(rel) for rel in layout.relationships])
+    
+    assert expected.confidence_score > 0, f"analysis failed: {expected.ambiguities}"
+    assert len(layouts) == concurrent
+    for layout in layouts:
+        assert layout.confidence_score > 0, f"async analysis failed: {layout.ambiguities}"
+        assert records(layout) == records(expected)
+
 if __name__ == "__main__":
     debug_image_processing()
+    test_async_responsiveness()
+    test_async_matches_sync()
@@ -0,0 +1,187 @@
+import sys
+import os
+import io
+import json
+
+import numpy as np
+import pytest
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from models.ui_component import UIComponent, ComponentType, BoundingBox, stable_component_id
+from models.spatial_relationship import UILayout, SpatialRelationship, RelationType
+from models.columnar_layout import ColumnarLayout
+from core.hierarchy_builder import HierarchyBuilder
+from core.relationship_mapper import RelationshipMapper
+from utils.layout_io import write_layout_json, layout_from_structured_output
+from utils.binary_layout import MappedLayout, pack_layout, load_layout, binary_to_structured_output
+
+
+def as_float32(value):
+    """Shortest decimal that reads back as the same float32, as NumPy prints it"""
+    return float(str(np.float32(value)))
+
+
+def make_component(component_type, bbox, text=None, color_info=None, confidence=0.8, attributes=None):
+    return UIComponent(
+        id=stable_component_id(component_type, bbox, text),
+        component_type=component_type,
+        bounding_box=bbox,
+        text_content=text,
+        color_info=color_info,
+        confidence=confidence,
+        attributes=attributes
+    )
+
+
+def build_layout():
+    """Small screen exercising every field the formats store"""
+    components = [
+        make_component(ComponentType.CONTAINER, BoundingBox(0, 0, 400, 300),
+                       color_info={'dominant_rgb': 'rgb(240, 240, 240)', 'dominant_hex': '#f0f0f0'}),
+        make_component(ComponentType.TEXT_LABEL, BoundingBox(10, 10, 120, 20), 'Benutzername', confidence=0.93),
+        make_component(ComponentType.TEXT_INPUT, BoundingBox(10, 40, 200, 30), '', confidence=0.1),
+        make_component(ComponentType.BUTTON, BoundingBox(10, 80, 80, 30), 'Anmelden ✓',
+                       color_info={'dominant_rgb': 'rgb(0, 120, 215)', 'dominant_hex': '#0078d7',
+                                   'palette': ['#ffffff']},
+                       attributes={'shape': 'rectangle', 'aspect_ratio': 2.6666667}),
+        make_component(ComponentType.BUTTON, BoundingBox(100, 80, 80, 30), 'Anmelden ✓', confidence=1 / 3),
+        make_component(ComponentType.ICON, BoundingBox(500, 20, 16, 16), color_info={'dominant_hex': 'bogus'}),
+        make_component(ComponentType.UNKNOWN, BoundingBox(500, 200, 0, 0), confidence=0.0),
+    ]
+    by_id = {comp.id: comp for comp in components}
+    hierarchy = HierarchyBuilder().build(components)
+    relationships = RelationshipMapper(mode='exhaustive').map_relationships(components, hierarchy=hierarchy)
+    # A hand-written description is stored in the string table rather than regenerated
+    relationships.append(SpatialRelationship(
+        component1_id=components[3].id, component2_id=components[4].id,
+        relation_type=RelationType.ALIGNED_HORIZONTAL, distance=90.12345678, confidence=0.7,
+        description='Both sign-in buttons share a row'
+    ))
+    return UILayout(
+        components=by_id,
+        relationships=relationships,
+        screen_dimensions=(600, 320),
+        ambiguities=['Two identical "Anmelden ✓" buttons'],
+        confidence_score=0.75,
+        metadata={'source': 'test'},
+        timings={'detect': {'seconds': 0.5}},
+        hierarchy=hierarchy
+    )
+
+
+def json_round_trip(layout):
+    stream = io.StringIO()
+    write_layout_json(layout, stream)
+    return layout_from_structured_output(json.loads(stream.getvalue()))
+
+
+def assert_same_components(actual, expected):
+    assert list(actual.components) == list(expected.components)
+    for comp_id, comp in expected.components.items():
+        other = actual.components[comp_id]
+        assert other.id == comp.id
+        assert other.component_type == comp.component_type
+        assert other.bounding_box == comp.bounding_box
+        assert other.text_content == comp.text_content
+        assert other.color_info == comp.color_info
+        assert other.attributes == (comp.attributes or {})
+        # float32 storage reads back as the shortest decimal for that float32
+        assert other.confidence == as_float32(comp.confidence)
+
+
+def assert_same_relationships(actual, expected, descriptions=True):
+    assert len(actual.relationships) == len(expected.relationships)
+    for other, rel in zip(actual.relationships, expected.relationships):
+        assert (other.component1_id, other.component2_id, other.relation_type) == \
+            (rel.component1_id, rel.component2_id, rel.relation_type)
+        assert other.distance == as_float32(rel.distance)
+        assert other.confidence == as_float32(rel.confidence)
+        if descriptions:
+            assert other.description == rel.description
+
+
+def assert_same_summary(actual, expected):
+    assert tuple(actual.screen_dimensions) == tuple(expected.screen_dimensions)
+    assert actual.ambiguities == expected.ambiguities
+    assert actual.confidence_score == expected.confidence_score
+    assert actual.metadata == expected.metadata
+    assert actual.timings == expected.timings
+    assert actual.hierarchy.parents == expected.hierarchy.parents
+
+
+def test_json_to_uilb_round_trip(tmp_path):
+    layout = json_round_trip(build_layout())
+    path = str(tmp_path / 'layout.uilb')
+    with open(path, 'wb') as f:
+        f.write(pack_layout(layout))
+
+    with load_layout(path) as mapped:
+        assert isinstance(mapped, MappedLayout)
+        assert_same_summary(mapped, layout)
+        assert_same_components(mapped, layout)
+        assert_same_relationships(mapped, layout)
+        # Indexing and iterating decode the same records
+        assert list(mapped.relationships) == [mapped.relationships[i] for i in range(len(mapped.relationships))]
+        assert mapped.relationships[-1].description == 'Both sign-in buttons share a row'
+
+        # ID index: every component is found by binary search, unknown IDs are not
+        for row, comp_id in enumerate(layout.components):
+            assert mapped.row_of(comp_id) == row
+        with pytest.raises(KeyError):
+            mapped.row_of('missing')
+
+        # The string table holds each distinct string once
+        with open(path, 'rb') as f:
+            assert f.read().count('Anmelden ✓'.encode('utf-8')) == 1
+
+        # Exporting the mapped layout gives back the JSON document, floats aside
+        stream = io.StringIO()
+        write_layout_json(layout, stream)
+        expected = json.loads(stream.getvalue())
+        analysis = expected['screen_analysis']
+        for record in analysis['components']:
+            record['confidence'] = as_float32(record['confidence'])
+        for record in analysis['relationships']:
+            record['distance'] = as_float32(record['distance'])
+            record['confidence'] = as_float32(record['confidence'])
+        assert binary_to_structured_output(mapped) == expected
+
+        decoded = mapped.to_layout()
+    assert_same_components(decoded, layout)
+
+
+def test_uilb_repacks_identically(tmp_path):
+    packed = pack_layout(json_round_trip(build_layout()))
+    path = str(tmp_path / 'layout.uilb')
+    with open(path, 'wb') as f:
+        f.write(packed)
+    with load_layout(path) as mapped:
+        assert pack_layout(mapped) == packed
+
+
+def test_columnar_round_trip():
+    layout = json_round_trip(build_layout())
+    columnar = ColumnarLayout.from_layout(layout)
+
+    assert_same_summary(columnar, layout)
+    assert_same_components(columnar, layout)
+    # ColumnarLayout regenerates every description instead of storing it
+    assert_same_relationships(columnar, layout, descriptions=False)
+    assert [rel.description for rel in columnar.relationships][:-1] == \
+        [rel.description for rel in layout.relationships][:-1]
+
+    decoded = columnar.to_layout()
+    assert_same_components(decoded, layout)
+    assert_same_relationships(ColumnarLayout.from_layout(decoded), columnar)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'not_a_layout.uilb'
+    path.write_bytes(b'{"screen_analysis": {}}' + b'\0' * 128)
+    with pytest.raises(ValueError):
+        MappedLayout(str(path))
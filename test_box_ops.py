@@ -0,0 +1,119 @@
+import sys
+import os
+import random
+
+import numpy as np
+import pytest
+
+# Add the src and benchmarks directories to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+for path in (os.path.join(current_dir, 'src'), os.path.join(current_dir, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import utils.box_ops as box_ops
+from utils.box_ops import boxes_to_array, suppress_lower_confidence, greedy_nms, suppress_contained
+from models.ui_component import BoundingBox
+from bench_nms import legacy_overlap, legacy_remove_duplicates
+
+
+def make_boxes(count, seed):
+    """Boxes on a coarse grid so ties, shared edges and zero-area boxes are common"""
+    rng = random.Random(seed)
+    boxes, scores = [], []
+    for _ in range(count):
+        roll = rng.random()
+        if boxes and roll < 0.2:
+            # Exact duplicate, often with the same score
+            x, y, w, h = boxes[rng.randrange(len(boxes))]
+        elif boxes and roll < 0.4:
+            # Neighbour sharing the right or bottom edge of an earlier box
+            x, y, w, h = boxes[rng.randrange(len(boxes))]
+            x, y = (x + w, y) if rng.random() < 0.5 else (x, y + h)
+        else:
+            w, h = rng.choice([0, 5, 10, 20, 40]), rng.choice([0, 5, 10, 20])
+            x, y = rng.randrange(0, 80, 5), rng.randrange(0, 60, 5)
+        boxes.append((x, y, w, h))
+        scores.append(rng.choice([0.3, 0.5, 0.5, 0.7, 0.9]))
+    return boxes, scores
+
+
+def legacy_greedy_nms(bboxes, scores, thresholds):
+    """Reference loop: visit by descending score, suppress overlaps of kept boxes"""
+    kept = []
+    for i in sorted(range(len(bboxes)), key=lambda i: -scores[i]):
+        if all(legacy_overlap(bboxes[i], bboxes[k]) <= thresholds[i] for k in kept):
+            kept.append(i)
+    return sorted(kept)
+
+
+def legacy_suppress_contained(bboxes, scores, groups, threshold):
+    """Reference loop for seam merging between tiles"""
+    def covered(inner, outer):
+        x_overlap = max(0, min(inner.x + inner.width, outer.x + outer.width) - max(inner.x, outer.x))
+        y_overlap = max(0, min(inner.y + inner.height, outer.y + outer.height) - max(inner.y, outer.y))
+        return x_overlap * y_overlap > threshold * inner.area
+
+    kept = []
+    for i, box in enumerate(bboxes):
+        if not any(
+            groups[j] != groups[i] and covered(box, other) and
+            (other.area, scores[j], -j) > (box.area, scores[i], -i)
+            for j, other in enumerate(bboxes)
+        ):
+            kept.append(i)
+    return kept
+
+
+@pytest.fixture(params=[False, True], ids=['one-window', 'chunked'])
+def chunking(request, monkeypatch):
+    """Run each comparison with and without splitting the IoU matrix into windows"""
+    if request.param:
+        monkeypatch.setattr(box_ops, 'MAX_CHUNK_CELLS', 50)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_suppress_lower_confidence_matches_legacy(seed, chunking):
+    raw, raw_scores = make_boxes(60, seed)
+    keep = suppress_lower_confidence(boxes_to_array(raw), np.array(raw_scores), np.full(len(raw), 0.5))
+
+    expected = legacy_remove_duplicates([BoundingBox(*b) for b in raw], raw_scores, threshold=0.5)
+    assert list(np.flatnonzero(keep)) == expected
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_greedy_nms_matches_legacy(seed, chunking):
+    raw, raw_scores = make_boxes(60, seed)
+    thresholds = [random.Random(seed).choice([0.0, 0.3, 0.5]) for _ in raw]
+    keep = greedy_nms(boxes_to_array(raw), np.array(raw_scores), np.array(thresholds))
+
+    expected = legacy_greedy_nms([BoundingBox(*b) for b in raw], raw_scores, thresholds)
+    assert list(np.flatnonzero(keep)) == expected
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_suppress_contained_matches_legacy(seed, chunking):
+    raw, raw_scores = make_boxes(60, seed)
+    groups = [random.Random(seed + i).randrange(3) for i in range(len(raw))]
+    keep = suppress_contained(boxes_to_array(raw), np.array(raw_scores), np.array(groups), 0.7)
+
+    expected = legacy_suppress_contained([BoundingBox(*b) for b in raw], raw_scores, groups, 0.7)
+    assert list(np.flatnonzero(keep)) == expected
+
+
+def test_edge_cases():
+    # Boxes touching at an edge do not overlap; identical boxes with equal scores both survive
+    touching = boxes_to_array([(0, 0, 10, 10), (10, 0, 10, 10), (0, 10, 10, 10)])
+    assert suppress_lower_confidence(touching, np.array([0.9, 0.1, 0.1]), np.zeros(3)).all()
+    assert greedy_nms(touching, np.array([0.9, 0.1, 0.1]), np.zeros(3)).all()
+
+    twins = boxes_to_array([(5, 5, 10, 10), (5, 5, 10, 10)])
+    assert suppress_lower_confidence(twins, np.array([0.5, 0.5]), np.full(2, 0.5)).all()
+    # Greedy NMS breaks the tie by input order
+    assert list(greedy_nms(twins, np.array([0.5, 0.5]), np.full(2, 0.5))) == [True, False]
+
+    # Zero-area boxes have no IoU with anything, including themselves
+    flat = boxes_to_array([(0, 0, 0, 10), (0, 0, 0, 10), (3, 3, 0, 0)])
+    assert greedy_nms(flat, np.array([0.9, 0.8, 0.7]), np.zeros(3)).all()
+
+    assert len(greedy_nms(boxes_to_array([]), np.zeros(0), np.zeros(0))) == 0
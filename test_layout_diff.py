@@ -0,0 +1,190 @@
+import sys
+import os
+
+import pytest
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from models.ui_component import UIComponent, ComponentType, BoundingBox, stable_component_id
+from models.spatial_relationship import UILayout
+from models.timeline import ChangeKind
+from models.layout_diff import DiffTolerances
+from core.layout_diff import diff_layouts, match_components, analysis_files, diff_directories
+from utils.layout_io import write_layout_json
+from utils.binary_layout import pack_layout
+
+
+def component(component_type, x, y, width, height, text=None, color=None):
+    bbox = BoundingBox(x, y, width, height)
+    return UIComponent(
+        id=stable_component_id(component_type, bbox, text),
+        component_type=component_type,
+        bounding_box=bbox,
+        text_content=text,
+        color_info={'dominant_hex': color} if color else None,
+        confidence=0.9
+    )
+
+
+def layout(*components):
+    return UILayout(
+        components={comp.id: comp for comp in components},
+        relationships=[],
+        screen_dimensions=(1024, 768),
+        ambiguities=[],
+        confidence_score=0.9
+    )
+
+
+def changes_by_kind(diff):
+    """{kind: sorted (before_id, after_id) pairs}"""
+    found = {}
+    for change in diff.changes:
+        found.setdefault(change.kind, []).append((change.before_id, change.after_id))
+    return {kind: sorted(pairs, key=str) for kind, pairs in found.items()}
+
+
+def login_screen():
+    return [
+        component(ComponentType.CONTAINER, 0, 0, 400, 300, color='#f0f0f0'),
+        component(ComponentType.TEXT_LABEL, 10, 10, 200, 20, 'Account settings'),
+        component(ComponentType.BUTTON, 10, 250, 80, 30, 'Save', '#0078d7'),
+        component(ComponentType.BUTTON, 100, 250, 80, 30, 'Cancel'),
+        component(ComponentType.ICON, 370, 10, 16, 16, color='#000000'),
+    ]
+
+
+def test_identical_layouts_match_by_id():
+    before = login_screen()
+    diff = diff_layouts(layout(*before), layout(*reversed(login_screen())))
+
+    assert not diff.has_changes
+    assert diff.matched == diff.unchanged == len(before)
+    assert match_components(before, list(reversed(before))) == [(i, len(before) - 1 - i) for i in range(len(before))]
+
+
+def test_small_changes_are_tolerated():
+    container, label, save, cancel, icon = login_screen()
+    after = [
+        component(ComponentType.CONTAINER, 1, 0, 401, 300, color='#eeeeee'),
+        label, save, cancel, icon,
+    ]
+    diff = diff_layouts(layout(container, label, save, cancel, icon), layout(*after))
+    assert diff.matched == 5 and diff.unchanged == 5 and not diff.has_changes
+
+
+def test_changes_found_by_grid_matching():
+    container, label, save, cancel, icon = login_screen()
+    moved_save = component(ComponentType.BUTTON, 30, 250, 80, 30, 'Save', '#0078d7')
+    edited_label = component(ComponentType.TEXT_LABEL, 10, 10, 200, 20, 'Account setting')
+    recolored_icon = component(ComponentType.ICON, 370, 10, 16, 16, color='#ff0000')
+    resized_container = component(ComponentType.CONTAINER, 0, 0, 400, 340, color='#f0f0f0')
+    checkbox = component(ComponentType.CHECKBOX, 10, 200, 16, 16, 'Remember me')
+
+    diff = diff_layouts(
+        layout(container, label, save, cancel, icon),
+        layout(resized_container, edited_label, moved_save, recolored_icon, checkbox)
+    )
+
+    assert changes_by_kind(diff) == {
+        ChangeKind.MOVED: [(save.id, moved_save.id)],
+        ChangeKind.TEXT_CHANGED: [(label.id, edited_label.id)],
+        ChangeKind.RECOLORED: [(icon.id, recolored_icon.id)],
+        ChangeKind.RESIZED: [(container.id, resized_container.id)],
+        ChangeKind.ADDED: [(None, checkbox.id)],
+        ChangeKind.REMOVED: [(cancel.id, None)],
+    }
+    assert diff.matched == 4 and diff.unchanged == 0
+    assert diff.of_kind(ChangeKind.MOVED)[0].details == {'dx': 20, 'dy': 0}
+    assert diff.of_kind(ChangeKind.TEXT_CHANGED)[0].details == {'from': 'Account settings', 'to': 'Account setting'}
+    assert diff.of_kind(ChangeKind.RESIZED)[0].details == {'dw': 0, 'dh': 40}
+    assert diff.counts() == {'moved': 1, 'text_changed': 1, 'recolored': 1, 'resized': 1, 'added': 1, 'removed': 1}
+
+
+def test_relocation_beyond_search_radius():
+    help_before = component(ComponentType.TEXT_LABEL, 10, 10, 40, 20, 'Help')
+    help_after = component(ComponentType.TEXT_LABEL, 900, 700, 40, 20, 'Help')
+    # A button with other text takes the old spot; it cannot be the label
+    other = component(ComponentType.BUTTON, 10, 10, 40, 20, 'Logout')
+
+    diff = diff_layouts(layout(help_before), layout(other, help_after), DiffTolerances(search_radius=64))
+
+    assert changes_by_kind(diff) == {
+        ChangeKind.MOVED: [(help_before.id, help_after.id)],
+        ChangeKind.ADDED: [(None, other.id)],
+    }
+    assert diff.of_kind(ChangeKind.MOVED)[0].details == {'dx': 890, 'dy': 690}
+
+    # Without identical text a far move is a removal plus an addition
+    renamed = component(ComponentType.TEXT_LABEL, 900, 700, 40, 20, 'Support')
+    diff = diff_layouts(layout(help_before), layout(renamed))
+    assert diff.counts() == {'added': 1, 'removed': 1}
+
+
+def test_identical_buttons_relocate_nearest_first():
+    before = [component(ComponentType.BUTTON, 10, 50 * row, 60, 30, 'Edit') for row in range(5)]
+    # The column moves to the far side of the screen and loses its last row
+    after = [component(ComponentType.BUTTON, 800, 50 * row, 60, 30, 'Edit') for row in range(4)]
+
+    assert match_components(before, after) == [(row, row) for row in range(4)]
+
+    diff = diff_layouts(layout(*before), layout(*after))
+    assert changes_by_kind(diff) == {
+        ChangeKind.MOVED: sorted(((b.id, a.id) for b, a in zip(before, after)), key=str),
+        ChangeKind.REMOVED: [(before[4].id, None)],
+    }
+    assert all(change.details == {'dx': 790, 'dy': 0} for change in diff.of_kind(ChangeKind.MOVED))
+
+
+def write_json(path, layout_value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        write_layout_json(layout_value, f)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_diff_directories(tmp_path, workers):
+    before_dir, after_dir = str(tmp_path / 'before'), str(tmp_path / 'after')
+    container, label, save, cancel, icon = login_screen()
+
+    write_json(os.path.join(before_dir, 'login_analysis.json'), layout(container, label, save, cancel, icon))
+    write_json(os.path.join(after_dir, 'login_analysis.json'), layout(container, label, save, icon))
+    write_json(os.path.join(before_dir, 'nested', 'home_analysis.json'), layout(container, label))
+    os.makedirs(os.path.join(after_dir, 'nested'))
+    with open(os.path.join(after_dir, 'nested', 'home_analysis.uilb'), 'wb') as f:
+        f.write(pack_layout(layout(container, label)))
+    write_json(os.path.join(before_dir, 'old_analysis.json'), layout(label))
+    write_json(os.path.join(after_dir, 'new_analysis.json'), layout(label))
+    with open(os.path.join(before_dir, 'broken_analysis.json'), 'w') as f:
+        f.write('{"screen_analysis": ')
+    write_json(os.path.join(after_dir, 'broken_analysis.json'), layout(label))
+    # Not named like an analysis, so ignored
+    write_json(os.path.join(before_dir, 'timeline.json'), layout(label))
+
+    assert sorted(analysis_files(before_dir)) == [
+        'broken_analysis', 'login_analysis', os.path.join('nested', 'home_analysis'), 'old_analysis'
+    ]
+
+    results = {result.name: result for result in diff_directories(before_dir, after_dir, workers=workers)}
+    assert sorted(results) == [
+        'broken_analysis', 'login_analysis', os.path.join('nested', 'home_analysis'),
+        'new_analysis', 'old_analysis'
+    ]
+
+    login = results['login_analysis']
+    assert login.error is None
+    assert changes_by_kind(login.diff) == {ChangeKind.REMOVED: [(cancel.id, None)]}
+
+    home = results[os.path.join('nested', 'home_analysis')]
+    assert home.after_path.endswith('.uilb')
+    assert home.diff is not None and not home.diff.has_changes
+
+    assert results['old_analysis'].after_path is None and results['old_analysis'].diff is None
+    assert results['new_analysis'].before_path is None and results['new_analysis'].diff is None
+
+    broken = results['broken_analysis']
+    assert broken.diff is None and broken.error.startswith('JSONDecodeError')
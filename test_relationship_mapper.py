@@ -0,0 +1,88 @@
+import sys
+import os
+
+import pytest
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from models.ui_component import UIComponent, ComponentType, BoundingBox
+from core.relationship_mapper import RelationshipMapper
+
+
+def sign_in_screen():
+    """A form holding a label, an input and a button, with an icon and a button beside it"""
+    def component(comp_id, component_type, x, y, width, height, text=None):
+        return UIComponent(comp_id, component_type, BoundingBox(x, y, width, height), text, None, 0.9)
+
+    return [
+        component('form', ComponentType.CONTAINER, 0, 0, 300, 200),
+        component('email', ComponentType.TEXT_LABEL, 20, 20, 100, 20, 'Email'),
+        component('input', ComponentType.TEXT_INPUT, 20, 50, 200, 30),
+        component('submit', ComponentType.BUTTON, 20, 120, 80, 30, 'Submit'),
+        component('icon', ComponentType.ICON, 400, 20, 20, 20),
+        component('help', ComponentType.BUTTON, 400, 150, 80, 30, 'Help'),
+    ]
+
+
+# Children relate to their container and to each other; top-level
+# components relate to each other, never to another container's children
+HIERARCHY = {
+    ('form', 'email', 'contains'), ('form', 'input', 'contains'), ('form', 'submit', 'contains'),
+    ('email', 'form', 'inside'), ('input', 'form', 'inside'), ('submit', 'form', 'inside'),
+    ('email', 'input', 'adjacent'), ('email', 'input', 'aligned_vertical'), ('email', 'input', 'left_of'),
+    ('input', 'email', 'adjacent'), ('input', 'email', 'aligned_vertical'), ('input', 'email', 'right_of'),
+    ('email', 'submit', 'above'), ('email', 'submit', 'aligned_vertical'),
+    ('submit', 'email', 'below'), ('submit', 'email', 'aligned_vertical'),
+    ('input', 'submit', 'above'), ('input', 'submit', 'aligned_vertical'),
+    ('submit', 'input', 'below'), ('submit', 'input', 'aligned_vertical'),
+    ('form', 'icon', 'left_of'), ('icon', 'form', 'right_of'),
+    ('form', 'help', 'left_of'), ('help', 'form', 'right_of'),
+    ('icon', 'help', 'above'), ('icon', 'help', 'aligned_vertical'),
+    ('help', 'icon', 'below'), ('help', 'icon', 'aligned_vertical'),
+}
+
+# Nearest neighbors per direction also reach across the form's border
+NEIGHBORS = HIERARCHY | {
+    ('email', 'icon', 'left_of'), ('email', 'icon', 'aligned_horizontal'),
+    ('icon', 'email', 'right_of'), ('icon', 'email', 'aligned_horizontal'),
+    ('input', 'icon', 'left_of'), ('icon', 'input', 'right_of'),
+    ('submit', 'icon', 'left_of'), ('icon', 'submit', 'right_of'),
+    ('input', 'help', 'left_of'), ('help', 'input', 'right_of'),
+    ('submit', 'help', 'left_of'), ('help', 'submit', 'right_of'),
+}
+
+# Every pair; help's three nearest leftward neighbors crowd out the label
+EXHAUSTIVE = NEIGHBORS | {
+    ('email', 'help', 'left_of'), ('help', 'email', 'right_of'),
+}
+
+
+def relationship_set(relationships):
+    found = [(rel.component1_id, rel.component2_id, rel.relation_type.value) for rel in relationships]
+    assert len(found) == len(set(found)), "duplicate relationships"
+    return set(found)
+
+
+@pytest.mark.parametrize('mode, expected', [
+    ('hierarchy', HIERARCHY),
+    ('neighbors', NEIGHBORS),
+    ('exhaustive', EXHAUSTIVE),
+])
+def test_relationship_set(mode, expected):
+    components = sign_in_screen()
+    relationships = RelationshipMapper(mode=mode).map_relationships(components)
+    assert relationship_set(relationships) == expected
+
+    # Reusing every relationship of unchanged components gives the same set
+    reused = RelationshipMapper(mode=mode).map_relationships(
+        components, previous=relationships, stable_ids={comp.id for comp in components}
+    )
+    assert relationship_set(reused) == expected
+
+
+def test_default_mode_is_hierarchy():
+    assert relationship_set(RelationshipMapper().map_relationships(sign_in_screen())) == HIERARCHY
@@ -0,0 +1,87 @@
+import sys
+import os
+import random
+
+import pytest
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from models.ui_component import BoundingBox
+from utils.spatial_index import StabbingTree, containment_parents
+
+
+def contains(outer, inner):
+    return (outer.x <= inner.x and outer.y <= inner.y
+            and outer.x + outer.width >= inner.x + inner.width
+            and outer.y + outer.height >= inner.y + inner.height)
+
+
+def brute_force_parents(boxes):
+    """Smallest box containing each box; equal-area boxes nest under the closest earlier copy"""
+    parents = []
+    for i, box in enumerate(boxes):
+        candidates = [
+            j for j, other in enumerate(boxes)
+            if j != i and contains(other, box)
+            and (other.area > box.area or (other.area == box.area and j < i))
+        ]
+        parents.append(min(candidates, key=lambda j: (boxes[j].area, -j)) if candidates else None)
+    return parents
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_containment_parents_random(seed):
+    rng = random.Random(seed)
+    boxes = [
+        BoundingBox(rng.randrange(0, 50, 5), rng.randrange(0, 50, 5), rng.randrange(0, 40, 5), rng.randrange(0, 40, 5))
+        for _ in range(rng.randint(0, 60))
+    ]
+    # Exact copies of some boxes
+    boxes += [BoundingBox(b.x, b.y, b.width, b.height) for b in rng.sample(boxes, min(5, len(boxes)))]
+    rng.shuffle(boxes)
+    assert containment_parents(boxes) == brute_force_parents(boxes)
+
+
+def test_containment_parents_identical_boxes():
+    boxes = [BoundingBox(10, 10, 20, 20) for _ in range(4)]
+    assert containment_parents(boxes) == [None, 0, 1, 2]
+
+
+def test_containment_parents_shared_edges():
+    boxes = [
+        BoundingBox(0, 0, 100, 100),   # Screen
+        BoundingBox(0, 0, 50, 100),    # Left half, shares three edges with the screen
+        BoundingBox(50, 0, 50, 100),   # Right half, touches the left half
+        BoundingBox(50, 90, 50, 10),   # Footer of the right half, shares its bottom corner
+    ]
+    assert containment_parents(boxes) == [None, 0, 0, 2]
+    assert containment_parents(boxes) == brute_force_parents(boxes)
+
+
+def test_containment_parents_nested_chain():
+    # Listed innermost first so input order does not match nesting order
+    boxes = [BoundingBox(depth, depth, 100 - 2 * depth, 100 - 2 * depth) for depth in range(40, -1, -5)]
+    assert containment_parents(boxes) == [1, 2, 3, 4, 5, 6, 7, 8, None]
+    assert containment_parents(boxes) == brute_force_parents(boxes)
+
+
+def test_stabbing_tree_matches_brute_force():
+    rng = random.Random(0)
+    coordinates = list(range(0, 40, 2))
+    tree = StabbingTree(coordinates)
+    active = {}
+    for item in range(200):
+        if active and rng.random() < 0.4:
+            removed = rng.choice(sorted(active))
+            tree.remove(removed, *active.pop(removed))
+        else:
+            lo, hi = sorted(rng.sample(coordinates, 2))
+            tree.add(item, lo, hi)
+            active[item] = (lo, hi)
+        for value in coordinates:
+            expected = sorted(i for i, (lo, hi) in active.items() if lo <= value <= hi)
+            assert sorted(tree.stab(value)) == expected